@@ -0,0 +1,67 @@
+import random
+
+
+class ProbabilityMatching:
+    ''' Adaptive operator selection by probability matching.
+
+    Each operator has a quality estimate, set to the first credit received by the offspring it produces and then
+    updated with the next ones (q = q + alpha * (credit - q)), so it is on the scale of the credits from the start.
+    Operators are chosen with probability p_min + (1 - K * p_min) * q / sum(q), so the best operators are used more
+    often while every one of the K operators keeps being tried (operators that did not receive credit yet count with
+    the mean quality of the others).
+    '''
+    def __init__(self, operators, p_min=None, alpha=0.3):
+        '''
+        Args:
+            operators (list): Operators to choose from.
+            p_min (float): Minimum probability of choosing each operator (by default, 0.2 / number of operators).
+            alpha (float): Adaptation rate of the quality estimates (between 0 and 1).
+        '''
+        self.operators = list(operators)
+        self.p_min = 0.2 / len(self.operators) if p_min is None else p_min
+        self.alpha = alpha
+        self.qualities = [None] * len(self.operators)
+        self.probabilities = [1 / len(self.operators)] * len(self.operators)
+        self.uses = [0] * len(self.operators)
+
+    def choose(self):
+        ''' Chooses an operator according to the current probabilities.
+
+        Returns:
+            int: Index of the chosen operator.
+        '''
+        return random.choices(range(len(self.operators)), self.probabilities)[0]
+
+    def reward(self, index, credit):
+        ''' Counts a use of an operator, and updates its quality and the probabilities of all operators.
+
+        Args:
+            index (int): Index of the operator that produced the offspring (only operators that actually ran).
+            credit (float): Credit assigned to the offspring (negative values are treated as 0).
+        '''
+        credit = max(credit, 0)
+        self.uses[index] += 1
+        if self.qualities[index] is None:
+            self.qualities[index] = credit
+        else:
+            self.qualities[index] += self.alpha * (credit - self.qualities[index])
+
+        observed = [quality for quality in self.qualities if quality is not None]
+        mean_quality = sum(observed) / len(observed)
+        qualities = [mean_quality if quality is None else quality for quality in self.qualities]
+
+        total = sum(qualities)
+        if total <= 0:
+            self.probabilities = [1 / len(self.operators)] * len(self.operators)
+        else:
+            scale = 1 - len(self.operators) * self.p_min
+            self.probabilities = [self.p_min + scale * quality / total for quality in qualities]
+
+    def summary(self):
+        ''' Summarizes the current state of the adaptation.
+
+        Returns:
+            list: (operator name, probability, number of times it ran) of each operator.
+        '''
+        return [(operator.__name__, probability, uses)
+                for operator, probability, uses in zip(self.operators, self.probabilities, self.uses)]
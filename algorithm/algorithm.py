@@ -1,20 +1,377 @@
 import os
 import sys
-import inspect
 
-currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+currentdir = os.path.dirname(os.path.abspath(__file__))
 parentdir = os.path.dirname(currentdir)
-sys.path.insert(0, parentdir) 
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
 
 from initializers.population import *
 from initializers.test_data import *
+from initializers.elite_archive import default_elite_archive
+from initializers.individual import areas, inherited_geo_gains
 from operators.crossovers import *
 from operators.mutators import *
 from operators.selectors import *
+from operators.diversity import GenotypeDiversity
+
+# algorithm/ is a package when imported from the project root, and a plain directory in sys.path when its scripts are run
+if __package__:
+    from .archive import default_archive
+    from .dashboard import ProgressDashboard
+    from .adaptation import ProbabilityMatching
+    from .memory import MemoryMonitor, budget_pop_size
+else:
+    from archive import default_archive
+    from dashboard import ProgressDashboard
+    from adaptation import ProbabilityMatching
+    from memory import MemoryMonitor, budget_pop_size
+
+from functools import partial, update_wrapper
+import heapq
+import time
+
+def select_parents(population, fitnesses, selector, ts_size):
+    ''' Selects two different parents to reproduce (repeats the selection at most 5 times, to avoid an infinite loop).
+
+    Args:
+        population (list): Array of individuals.
+        fitnesses (list): Fitness values of the population.
+        selector (Callable): The selection function for parent individuals.
+        ts_size (int): Tournament size, in case selector = tournament_selection.
+
+    Returns:
+        tuple: Selected individuals.
+    '''
+    counter = 0
+
+    while True:
+        if selector == tournament_selection:
+            p1, p2 = selector(population, fitnesses, ts_size)
+        else:
+            p1, p2 = selector(population, fitnesses)
+
+        if p1 != p2 or counter >= 5:
+            return p1, p2
+        counter += 1
+
+
+def mutate(individual, mutator, p_m):
+    ''' Applies a mutator to an individual, keeping the original individual (and its cached fitness) if the mutator
+        did not change it.
+
+    Args:
+        individual (Individual): The individual to mutate.
+        mutator (Callable): The mutation function.
+        p_m (float): The probability of performing mutation.
+
+    Returns:
+        Individual: The mutated individual (dirty), or the original individual.
+    '''
+    mutated = mutator(individual, p_m)
+
+    return individual if mutated == individual else Individual(mutated)
+
+
+def bind_selector(selector, diversity, pool_size):
+    ''' Binds the state of the current population to the selectors that use it: its diversity for self-adaptative
+        tournament selection, and a new pool of parents for stochastic universal sampling.
+
+    Args:
+        selector (Callable): The selection function for parent individuals.
+        diversity (float): Diversity of the population (of its fitness values, or its genotype diversity).
+        pool_size (int): Number of parents selected in each sweep of stochastic universal sampling.
+
+    Returns:
+        Callable: The selector to use until the population changes.
+    '''
+    # selectors may be partials with their own arguments (e.g. stochastic_universal_sampling with a shift), which are
+    # kept (binding a partial merges its keywords), except the pool, which belongs to the population
+    function, keywords = getattr(selector, 'func', selector), getattr(selector, 'keywords', {})
+    if function == self_adaptative_tournament_selection:
+        return partial(selector, diversity=keywords.get('diversity', diversity))
+    if function == stochastic_universal_sampling:
+        return partial(selector, pool=[], pool_size=keywords.get('pool_size', pool_size))
+
+    return selector
+
+
+def bind_points_matrix(crossover_operator, points_matrix):
+    ''' Passes the points matrix to the crossover operators that use it (matrix_crossovers), keeping their names.
+
+    Args:
+        crossover_operator (Callable or list): The crossover operator, or a list of operators.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+    Returns:
+        Callable or list: The crossover operator (or operators), called with points_matrix if they use it.
+    '''
+    if isinstance(crossover_operator, (list, tuple)):
+        return [bind_points_matrix(operator, points_matrix) for operator in crossover_operator]
+
+    if crossover_operator in matrix_crossovers:
+        return update_wrapper(partial(crossover_operator, points_matrix=points_matrix), crossover_operator)
+
+    return crossover_operator
+
+
+def validate(child, points_matrix):
+    ''' Checks if a child complies with all constraints (check_constraints may also swap KS and PH in the child, in
+        which case its fitness has to be calculated again).
+
+    Args:
+        child (Individual): The individual to check.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+    Returns:
+        bool: True if the child does not violate any constraints, False if it does.
+    '''
+    had_ph = 'PH' in child
+    child.feasible = not check_constraints(child, points_matrix)
+
+    if ('PH' in child) != had_ph:
+        child.dirty = True
+
+    return child.feasible
+
+
+def breed(population, fitnesses, points_matrix, crossover_operator, mutator, selector, ts_size, p_xo, p_m,
+          adaptations=None, fitness_evaluator=None, incremental=False):
+    ''' Produces children from two parents selected from the population. Children are new (dirty) individuals when
+        crossover or mutation change them, and copies of their parents (with the fitness of the parents) otherwise.
+
+        In case the operators are chosen adaptively, the children are evaluated right away, and the operators that
+        produced them are credited with the improvement of the best child over the mean fitness of the parents.
+
+        In case of incremental evaluation, the crossover operators that report the segments copied from the parents
+        (segment_crossovers) give the fitness of the children that are not mutated right away (inherited_geo_gains).
+
+    Args:
+        population (list): Array of individuals.
+        fitnesses (list): Fitness values of the population.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+        crossover_operator (Callable): The crossover operator for generating offspring individuals.
+        mutator (Callable): The mutation function for offspring individuals.
+        selector (Callable): The selection function for parent individuals.
+        ts_size (int): Tournament size, in case selector = tournament_selection.
+        p_xo (float): The probability of performing crossover.
+        p_m (float): The probability of performing mutation.
+        adaptations (tuple): Adaptive choice of the crossover operator and of the mutator (None if not adaptive).
+        fitness_evaluator (Callable): The function to evaluate the fitness of the population (only used if adaptive).
+        incremental (bool): Whether to calculate the fitness of the children from the edges of their parents.
+
+    Returns:
+        list: Children that do not violate any constraints (between 0 and 2).
+    '''
+    # select parents to reproduce
+    p1, p2 = select_parents(population, fitnesses, selector, ts_size)
+    segments = None
+
+    # choose the operators, in case they are adaptive
+    if adaptations:
+        crossover_adaptation, mutation_adaptation = adaptations
+        xo_index, m_index = None, mutation_adaptation.choose()
+        mutator = mutation_adaptation.operators[m_index]
+
+    # perform crossover with probability p_xo
+    if random.random() <= p_xo:
+        if adaptations:
+            xo_index = crossover_adaptation.choose()
+            crossover_operator = crossover_adaptation.operators[xo_index]
+        if incremental and crossover_operator in segment_crossovers:
+            segments = []
+            c1, c2 = (Individual(child) for child in crossover_operator(p1, p2, segments=segments))
+        else:
+            c1, c2 = (Individual(child) for child in crossover_operator(p1, p2))
+    else:
+        c1, c2 = p1.clone(), p2.clone()
+
+    # perform mutation on children with probability p_m
+    m1, m2 = mutate(c1, mutator, p_m), mutate(c2, mutator, p_m)
+
+    # keep children only if they don't violate any constraints
+    children = [child for child in (m1, m2) if validate(child, points_matrix)]
+
+    # mutated children are evaluated from scratch (by the fitness evaluator)
+    if segments is not None:
+        for child_index, (child, mutated) in enumerate(((c1, m1), (c2, m2))):
+            if child is mutated and child.feasible:
+                child_segments = [segment for segment in segments if segment[0] == child_index]
+                child.fitness = inherited_geo_gains(child, child_segments, points_matrix)
+                child.dirty = False
+
+    if adaptations:
+        evaluate_individuals(children, points_matrix, fitness_evaluator)
+
+        # children violating constraints receive no credit, and only the operators that ran are rewarded (and counted)
+        credit = max(child.fitness for child in children) - (p1.fitness + p2.fitness) / 2 if children else 0
+        if xo_index is not None:
+            crossover_adaptation.reward(xo_index, credit)
+        if m1 is not c1 or m2 is not c2:
+            mutation_adaptation.reward(m_index, credit)
+
+    return children
+
+
+def breed_into(population, fitnesses, c1, c2, points_matrix, crossover_into, mutator_inplace, selector, ts_size,
+               p_xo, p_m):
+    ''' Produces two children from two parents selected from the population, writing them into preallocated
+        individuals (buffered crossover operator and in-place mutator, so no route is allocated).
+
+    Args:
+        population (list): Array of individuals.
+        fitnesses (list): Fitness values of the population.
+        c1 (Individual): Buffer for the first child.
+        c2 (Individual): Buffer for the second child.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+        crossover_into (Callable): Buffered crossover operator (e.g. order_crossover_into).
+        mutator_inplace (Callable): In-place mutation function (e.g. swap_mutation_inplace).
+        selector (Callable): The selection function for parent individuals.
+        ts_size (int): Tournament size, in case selector = tournament_selection.
+        p_xo (float): The probability of performing crossover.
+        p_m (float): The probability of performing mutation.
+
+    Returns:
+        Tuple(bool, bool): Whether each child does not violate any constraints.
+    '''
+    # select parents to reproduce
+    p1, p2 = select_parents(population, fitnesses, selector, ts_size)
+
+    # perform crossover with probability p_xo (otherwise the children are copies of the parents, with their fitness)
+    if random.random() <= p_xo:
+        crossover_into(p1, p2, c1, c2)
+        c1.dirty = c2.dirty = True
+    else:
+        for child, parent in ((c1, p1), (c2, p2)):
+            child[:] = parent
+            child.fitness, child.dirty = parent.fitness, parent.dirty
+
+    # perform mutation on children with probability p_m
+    for child in (c1, c2):
+        if mutator_inplace(child, p_m):
+            child.dirty = True
+
+    return validate(c1, points_matrix), validate(c2, points_matrix)
+
+
+def buffered_generation(population, fitnesses, offsprings, spare, points_matrix, elite_size, crossover_into,
+                        mutator_inplace, selector, ts_size, p_xo, p_m):
+    ''' Produces the next generation into a preallocated population (double buffering: the individuals of offsprings
+        are overwritten, and children that violate constraints are overwritten by the next ones).
+
+    Args:
+        population (list): Array of individuals (current generation).
+        fitnesses (list): Fitness values of the population.
+        offsprings (list): Array of individuals (same size as population) overwritten with the next generation.
+        spare (Individual): Extra buffer, used when only one more child is needed.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+        elite_size (int): Quantity of best individuals to preserve in the next generation.
+        crossover_into (Callable): Buffered crossover operator (e.g. order_crossover_into).
+        mutator_inplace (Callable): In-place mutation function (e.g. swap_mutation_inplace).
+        selector (Callable): The selection function for parent individuals.
+        ts_size (int): Tournament size, in case selector = tournament_selection.
+        p_xo (float): The probability of performing crossover.
+        p_m (float): The probability of performing mutation.
+
+    Returns:
+        Individual: The spare buffer (it may have been swapped with one of the offsprings).
+    '''
+    # perform elitism if specified in parameters (elites are copied with their cached fitness)
+    k = 0
+    for index in select_elites(fitnesses, elite_size):
+        offsprings[k][:] = population[index]
+        offsprings[k].fitness, offsprings[k].dirty = population[index].fitness, population[index].dirty
+        k += 1
+
+    while k < len(offsprings):
+        last_slot = k + 1 == len(offsprings)
+        second = spare if last_slot else offsprings[k + 1]
+
+        valid_1, valid_2 = breed_into(population, fitnesses, offsprings[k], second, points_matrix, crossover_into,
+                                      mutator_inplace, selector, ts_size, p_xo, p_m)
+
+        # a valid second child takes the place of an invalid first child (buffers are swapped, not copied)
+        if valid_2 and not valid_1:
+            if last_slot:
+                offsprings[k], spare = spare, offsprings[k]
+            else:
+                offsprings[k], offsprings[k + 1] = offsprings[k + 1], offsprings[k]
+
+        k += int(valid_1 or valid_2) if last_slot else int(valid_1) + int(valid_2)
+
+    return spare
+
+
+def select_elites(fitnesses, elite_size):
+    ''' Selects the best individuals of the population in O(n), without sorting it.
+
+    Args:
+        fitnesses (list): Fitness values of the population.
+        elite_size (int): Quantity of best individuals to select.
+
+    Returns:
+        list: Indexes of the elite_size best individuals (in no particular order).
+    '''
+    if elite_size <= 0:
+        return []
+    if elite_size >= len(fitnesses):
+        return list(range(len(fitnesses)))
+
+    return np.argpartition(fitnesses, len(fitnesses) - elite_size)[-elite_size:].tolist()
+
+
+def steady_state_generation(population, fitnesses, worst_heap, points_matrix, fitness_evaluator, batch_size,
+                            crossover_operator, mutator, selector, ts_size, p_xo, p_m, adaptations=None,
+                            diversity=None, incremental=False):
+    ''' Performs one generation of a steady-state genetic algorithm: batches of batch_size children are produced and
+        each batch replaces the worst individuals of the population, until len(population) children have been produced.
+        Population, fitnesses and heap are updated in place and only the children are evaluated.
+
+    Args:
+        population (list): Array of Individual objects.
+        fitnesses (list): Fitness values of the population.
+        worst_heap (list): Min-heap of (fitness, index) with one entry per individual of the population.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+        fitness_evaluator (Callable): The function to evaluate the fitness of the population.
+        batch_size (int): Number of children produced (and individuals replaced) in each step.
+        crossover_operator (Callable): The crossover operator for generating offspring individuals.
+        mutator (Callable): The mutation function for offspring individuals.
+        selector (Callable): The selection function for parent individuals.
+        ts_size (int): Tournament size, in case selector = tournament_selection.
+        p_xo (float): The probability of performing crossover.
+        p_m (float): The probability of performing mutation.
+        adaptations (tuple): Adaptive choice of the crossover operator and of the mutator (None if not adaptive).
+        diversity (GenotypeDiversity): Genotype diversity of the population, updated as individuals are replaced.
+        incremental (bool): Whether to calculate the fitness of the children from the edges of their parents.
+    '''
+    # the best individual is never replaced, so the batch can not be larger than the rest of the population
+    batch_size = max(1, min(batch_size, len(population) - 1))
+    produced = 0
+
+    while produced < len(population):
+        children = []
+        while len(children) < batch_size:
+            children.extend(breed(population, fitnesses, points_matrix, crossover_operator, mutator, selector,
+                                  ts_size, p_xo, p_m, adaptations, fitness_evaluator, incremental))
+        children = children[:batch_size]
+        children_fits = evaluate_individuals(children, points_matrix, fitness_evaluator)
+
+        # the children take the places of the current worst individuals
+        worst_indexes = [heapq.heappop(worst_heap)[1] for _ in children]
+
+        for index, child, child_fit in zip(worst_indexes, children, children_fits):
+            if diversity is not None:
+                diversity.replace(population[index], child)
+            population[index], fitnesses[index] = child, child_fit
+            heapq.heappush(worst_heap, (child_fit, index))
+
+        produced += batch_size
+
+        # parents selected in advance (stochastic universal sampling) may have been replaced
+        pool = getattr(selector, 'keywords', {}).get('pool')
+        if pool:
+            pool.clear()
 
-from copy import deepcopy
-import matplotlib.pyplot as plt
-import csv
 
 def genetic_algorithm(initializer, 
                       pop_size,
@@ -31,7 +388,17 @@ def genetic_algorithm(initializer,
                       verbosity,
                       plot,
                       seed,
-                      log):  
+                      log,
+                      replacement='generational',
+                      ss_batch_size=2,
+                      buffered=False,
+                      min_diversity=0.0,
+                      elite_archive=None,
+                      offspring_workers=0,
+                      memory=None,
+                      memory_budget=None,
+                      incremental_evaluation=False,
+                      genotype_selection=False):
     ''' Performs a genetic algorithm based on various parameters.
 
     Args:
@@ -40,115 +407,280 @@ def genetic_algorithm(initializer,
         points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
         fitness_evaluator (Callable): The function to evaluate the fitness of the population.
         generations (int): The number of generations to evolve the population.
-        crossover_operator (Callable): The crossover operator for generating offspring individuals.
-        mutator (Callable): The mutation function for offspring individuals.
+        crossover_operator (Callable or list): The crossover operator for generating offspring individuals, or a list of
+                                               operators to choose from adaptively during the run.
+        mutator (Callable or list): The mutation function for offspring individuals, or a list of mutators to choose
+                                    from adaptively during the run.
         selector (Callable): The selection function for parent individuals.
         ts_size (int): Tournament size, in case selector = tournament_selection.
         elite_size (int): Quantity of best individuals to preserve in the next generation.
         verbosity (bool): Whether to display verbose output during the optimization process.
         p_xo (float): The probability of performing crossover.
         p_m (float): The probability of performing mutation.
-        plot (bool): Whether to plot fitness landscape.
+        plot (bool or str): Whether to plot fitness landscape and diversity to log/ga_progress.png while the algorithm
+                            runs, or the file (.png or .html) where they should be plotted.
         seed (int): Initial value used by random number generator.
-        log (bool): Whether to log the results to a file.
+        log (bool or RunArchive): Whether to record the run in the default archive (log/ga_archive), or the archive
+                                  where the run should be recorded.
+        replacement (str): 'generational' (each generation is replaced by its offspring, apart from the elite) or
+                           'steady_state' (small batches of children replace the worst individuals in place; a
+                           generation is completed when pop_size children have been produced, elite_size is ignored).
+        ss_batch_size (int): Number of children produced in each step, in case replacement = 'steady_state' (between 1
+                             and pop_size).
+        buffered (bool): Whether to use the buffered version of the crossover operator and the in-place version of the
+                         mutator, writing each generation into a preallocated population (double buffering), so
+                         that no individual is allocated during the run (only for generational replacement, without
+                         adaptive operators).
+        min_diversity (float): Stop the algorithm early when the genotype (edge) diversity of the population falls
+                               below this value (between 0 and 1; by default, the algorithm never stops early).
+        elite_archive (bool or EliteArchive): Whether to add the best routes of the final population to the elite
+                                              archive of this process (used by warm_start_population), or the
+                                              archive where they should be added.
+        offspring_workers (int): Number of worker processes producing the offspring of each generation, reading the
+                                 population from shared memory (for very large populations; only for generational
+                                 replacement, without buffered or adaptive operators). By default, the offspring are
+                                 produced in this process.
+        memory (bool or MemoryMonitor): Whether to record the memory used after each generation (tracemalloc snapshot,
+                                        peak RSS and bytes per individual), or the monitor where it should be
+                                        recorded (its records can be read after the run).
+        memory_budget (int): Memory (in bytes) available for the individuals of the run; the population size is
+                             reduced if they would not fit in it (in the encoded form kept by the offspring workers,
+                             if any).
+        incremental_evaluation (bool): Whether to calculate the fitness of the children of the crossover operators
+                                       that report the segments copied from the parents (segment_crossovers) from the
+                                       edge prefix sums of the parents, so only their new edges are looked up (children
+                                       that are mutated are evaluated by fitness_evaluator, which must be equivalent to
+                                       evaluate_population; not available with buffered operators or offspring workers).
+        genotype_selection (bool): Whether self-adaptative tournament selection sizes its tournaments with the
+                                   genotype (edge) diversity of the population instead of the diversity of its fitness
+                                   values. Random populations have an edge diversity of about 0.9, so tournaments start
+                                   almost as large as the population.
 
     Returns:
-        Tuple(list, int): The best individual produced and its fitness value.
+        Tuple(list, float): The best individual produced and its fitness value.
     '''
+    # parameters of the run, recorded in the archive
+    params = {'initializer': initializer, 'pop_size': pop_size, 'fitness_evaluator': fitness_evaluator,
+              'generations': generations, 'crossover_operator': crossover_operator, 'mutator': mutator,
+              'selector': selector, 'ts_size': ts_size, 'elite_size': elite_size, 'p_xo': p_xo, 'p_m': p_m,
+              'replacement': replacement, 'ss_batch_size': ss_batch_size, 'buffered': buffered,
+              'min_diversity': min_diversity, 'elite_archive': bool(elite_archive),
+              'offspring_workers': offspring_workers, 'memory_budget': memory_budget,
+              'incremental_evaluation': incremental_evaluation, 'genotype_selection': genotype_selection}
+    start_time = time.perf_counter()
+
+    # unsupported combinations are rejected before any resource (worker processes, shared memory) is created
+    if replacement not in ('generational', 'steady_state'):
+        raise ValueError(f"Unknown replacement: {replacement!r} (use 'generational' or 'steady_state').")
+    if replacement == 'steady_state' and not 1 <= ss_batch_size <= pop_size:
+        raise ValueError(f'ss_batch_size must be between 1 and pop_size ({pop_size}), got {ss_batch_size}.')
+    adaptive = isinstance(crossover_operator, (list, tuple)) or isinstance(mutator, (list, tuple))
+    if offspring_workers and (replacement != 'generational' or buffered or adaptive):
+        raise ValueError('Parallel offspring production is only available for generational replacement without '
+                         'buffered or adaptive operators.')
+    # these selectors go through the whole population for every pair of parents (O(population²) per generation)
+    if offspring_workers and selector in (roulette_wheel_selection, linear_ranking_selection,
+                                          exponential_ranking_selection):
+        raise ValueError(f'{selector.__name__} is too slow for the populations of parallel offspring production (use '
+                         'tournament selection or stochastic universal sampling).')
+    if buffered and (replacement != 'generational' or adaptive):
+        raise ValueError('Buffered operators are only available for generational replacement without adaptive operators.')
+    # (partial operators, e.g. edge_recombination_crossover bound to a points matrix, are named after their function)
+    if buffered and crossover_operator not in buffered_crossovers:
+        name = getattr(crossover_operator, 'func', crossover_operator).__name__
+        raise ValueError(f'Buffered operators are not available with {name}, which has no buffered version.')
+    if buffered and mutator not in inplace_mutators:
+        name = getattr(mutator, 'func', mutator).__name__
+        raise ValueError(f'Buffered operators are not available with {name}, which has no in-place version.')
+    # buffered operators overwrite the parents and offspring workers decode them again, so their edges can not be cached
+    if incremental_evaluation and (buffered or offspring_workers):
+        raise ValueError('Incremental evaluation is not available with buffered operators or offspring workers.')
+
     # getting up the seed
     random.seed(seed)
     np.random.seed(seed)
 
-    # generate initial population
-    population = initializer(pop_size, points_matrix)
-    # evaluate initial population
-    fitnesses = fitness_evaluator(population, points_matrix)
+    # opt-in memory instrumentation
+    monitor = MemoryMonitor() if memory is True else memory or None
 
-    # verbose information: maximum fitness in population
-    if verbosity:
-        print('Initializing the population')
-        print(f'Generation 0 | best fitness: {max(fitnesses)}')
-
-    # create list to store best fitnesses of each generation
-    best_fits = [max(fitnesses)]
-
-    for i in range(generations):
-        
-        # perform elitism if specified in parameters
-        if elite_size !=0:
-            ranked_pop = sorted(zip(population, fitnesses), key=lambda x: x[1], reverse=True)
-            offsprings = [ranked_pop[i][0] for i in range(elite_size)]
-        else: 
-            offsprings = []
-
-        while len(offsprings) < len(population):
-
-            # select parents to reproduce
-            if selector == tournament_selection:
-                 p1, p2 = selector(population, fitnesses, ts_size)
+    # worker processes, shared memory, the dashboard thread and tracing are released even if the run is interrupted
+    breeder = dashboard = None
+    try:
+        # reduce the population size if the individuals would not fit in the memory budget (the sample route is built
+        # by hand, since generating one would consume random numbers and change the run of the seed); the offspring
+        # workers keep the population encoded, in the shared arrays, the chunks of children and their concatenation
+        if memory_budget:
+            capped_size = budget_pop_size(pop_size, memory_budget, Individual(areas + ['D'], 0.0),
+                                          copies=3 if offspring_workers else 2, encoded=bool(offspring_workers))
+            if capped_size < pop_size and verbosity:
+                print(f'Population size reduced from {pop_size} to {capped_size} to fit in the memory budget.')
+            pop_size = capped_size
+
+        # generate initial population
+        population = [Individual(individual) for individual in initializer(pop_size, points_matrix)]
+        # evaluate initial population
+        fitnesses = evaluate_individuals(population, points_matrix, fitness_evaluator)
+
+        # verbose information: maximum fitness in population
+        if verbosity:
+            print('Initializing the population')
+            print(f'Generation 0 | best fitness: {np.max(fitnesses)}')
+
+        crossover_operator = bind_points_matrix(crossover_operator, points_matrix)
+
+        # offspring are produced by worker processes, which read the (encoded) population from shared memory
+        if offspring_workers:
+            if __package__:
+                from .parallel import ParallelBreeder
             else:
-                p1, p2 = selector(population, fitnesses)
-            
-            # make sure the parents are different individuals (repeate only for 5 iterations, to avoid infinite loop)
-            counter = 0
-            while p1 == p2 and counter<5:
-                if selector == tournament_selection:
-                    p1, p2 = selector(population, fitnesses, ts_size)
-                else:
-                    p1, p2 = selector(population, fitnesses)
-                counter += 1
-
-            # perform crossover with probability p_xo
-            if random.random() <= p_xo:
-                c1, c2 = crossover_operator(p1, p2)
+                from parallel import ParallelBreeder
+
+            breeder = ParallelBreeder(population, fitnesses, offspring_workers, points_matrix, fitness_evaluator,
+                                      crossover_operator, mutator, ts_size, p_xo, p_m)
+            population, fitnesses = breeder.population, breeder.fitnesses
+
+        # genotype diversity of the population (updated incrementally, except with buffered operators and offspring
+        # workers)
+        diversity = GenotypeDiversity()
+        if breeder:
+            diversity.reset_array(breeder.route_indexes())
+        else:
+            diversity.reset(population)
+
+        # create lists to store best and mean fitnesses, diversity and duration of each generation (fitnesses are
+        # stored as plain floats, whether they come from a list or from the shared array of the offspring workers)
+        best_fits = [float(np.max(fitnesses))]
+        mean_fits = [float(np.mean(fitnesses))]
+        diversities = [diversity.value()]
+        gen_times = [time.perf_counter() - start_time]
+
+        if monitor:
+            monitor.snapshot(0, population)
+
+        # the dashboard is rendered in a background thread, so it does not slow down the algorithm
+        if plot:
+            dashboard = ProgressDashboard() if plot is True else ProgressDashboard(plot)
+            dashboard.update(0, best_fits[-1], mean_fits[-1], diversities[-1])
+
+        # lists of operators are chosen adaptively during the run, according to the improvements of their offspring
+        adaptations = None
+        if isinstance(crossover_operator, (list, tuple)) or isinstance(mutator, (list, tuple)):
+            adaptations = (ProbabilityMatching(crossover_operator if isinstance(crossover_operator, (list, tuple))
+                                               else [crossover_operator]),
+                           ProbabilityMatching(mutator if isinstance(mutator, (list, tuple)) else [mutator]))
+
+        # buffers for the next generation (the population and offsprings swap roles every generation)
+        if buffered:
+            crossover_into, mutator_inplace = buffered_crossovers[crossover_operator], inplace_mutators[mutator]
+            offsprings = [individual.clone() for individual in population]
+            spare = population[0].clone()
 
+        # min-heap of (fitness, index) used to find the worst individuals in steady-state mode
+        if replacement == 'steady_state':
+            worst_heap = [(fit, index) for index, fit in enumerate(fitnesses)]
+            heapq.heapify(worst_heap)
+
+        for i in range(generations):
+            gen_start = time.perf_counter()
+
+            # the tournament size of self-adaptative tournament selection follows the diversity of the population
+            # (calculated once per generation), and stochastic universal sampling selects the parents of each
+            # generation (or steady-state batch) at once (each chunk of the offspring workers gets its own pool)
+            selection_diversity = None
+            if selector == self_adaptative_tournament_selection:
+                selection_diversity = diversities[-1] if genotype_selection else calculate_diversity(fitnesses)
+            pool_size = (2 * ss_batch_size if replacement == 'steady_state' else breeder.chunk_size if breeder
+                         else len(population))
+            gen_selector = bind_selector(selector, selection_diversity, pool_size)
+
+            if replacement == 'steady_state':
+                # replace the worst individuals of the population in place, a small batch of children at a time
+                steady_state_generation(population, fitnesses, worst_heap, points_matrix, fitness_evaluator,
+                                        ss_batch_size, crossover_operator, mutator, gen_selector, ts_size, p_xo, p_m,
+                                        adaptations, diversity, incremental_evaluation)
+            elif buffered:
+                spare = buffered_generation(population, fitnesses, offsprings, spare, points_matrix, elite_size,
+                                            crossover_into, mutator_inplace, gen_selector, ts_size, p_xo, p_m)
+                population, offsprings = offsprings, population
+                fitnesses = evaluate_individuals(population, points_matrix, fitness_evaluator)
+                # the buffers are overwritten in place, so the population is counted again
+                diversity.reset(population)
+            elif breeder:
+                # chunks of offspring are produced in parallel, each one with its own random stream
+                population, fitnesses = breeder.generation(elite_size, gen_selector, np.random.randint(2**32))
+                diversity.reset_array(breeder.route_indexes())
             else:
-                c1, c2 = deepcopy(p1), deepcopy(p2)
+                # perform elitism if specified in parameters (elites keep their cached fitness)
+                offsprings = [population[index] for index in select_elites(fitnesses, elite_size)]
 
-            # perform mutation on children with probability p_m
-            c1 = mutator(c1, p_m)
-            c2 = mutator(c2, p_m)
+                while len(offsprings) < len(population):
+                    offsprings.extend(breed(population, fitnesses, points_matrix, crossover_operator, mutator,
+                                            gen_selector, ts_size, p_xo, p_m, adaptations, fitness_evaluator,
+                                            incremental_evaluation))
 
-            # add children to offspring list if they don't violate any constraints
-            if not check_constraints(c1, points_matrix):
-                offsprings.append(c1)
-            if not check_constraints(c2, points_matrix):
-                offsprings.append(c2)
+                # new generation becomes the population for the next iteration
+                # make sure that offpring population list is the same size as initial population 
+                # (only the individuals that changed are evaluated, and counted in the genotype diversity)
+                diversity.replace_population(population, offsprings[:pop_size])
+                population = offsprings[:pop_size]
+                fitnesses = evaluate_individuals(population, points_matrix, fitness_evaluator)
 
-        # new generation becomes the population for the next iteration
-        # make sure that offpring population list is the same size as initial population 
-        population = offsprings[:pop_size]
-        fitnesses = fitness_evaluator(population, points_matrix)
+            best_fits.append(float(np.max(fitnesses)))
+            mean_fits.append(float(np.mean(fitnesses)))
+            diversities.append(diversity.value())
+            gen_times.append(time.perf_counter() - gen_start)
 
-        best_fits.append(max(fitnesses))
+            if monitor:
+                monitor.snapshot(i+1, population)
 
-        # verbose information: best fitness in each generation
-        if verbosity:
-            print(f'Generation {i+1} | best fitness: {max(fitnesses)}')
-
-    # plot fitness landscape (best fitness values over generations)
-    if plot: 
-        plt.plot(range(generations+1), best_fits)
-        plt.xlabel('Generation')
-        plt.ylabel('Best Fitness')
-        plt.title('Fitness Landscape')
-        plt.xticks(range(generations+1))
-        plt.show()
-
-    # return winner (individual with best fitness)
-    winner, winner_fit = population[np.argmax(fitnesses)], max(fitnesses)
-
-    # Log the parameters and results
-    if log:
-        with open('PROJETO_OA\log\ga_log.csv', 'a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([winner, winner_fit, points_matrix])
+            if plot:
+                dashboard.update(i+1, best_fits[-1], mean_fits[-1], diversities[-1])
+
+            # verbose information: best fitness in each generation
+            if verbosity:
+                print(f'Generation {i+1} | best fitness: {best_fits[-1]}')
+
+            # stop early if the population has converged
+            if diversities[-1] < min_diversity:
+                if verbosity:
+                    print(f'Stopping early: genotype diversity {diversities[-1]:.3f} is below {min_diversity}.')
+                break
+
+        # return winner (individual with best fitness)
+        winner_index = int(np.argmax(fitnesses))
+        winner, winner_fit = list(population[winner_index]), float(fitnesses[winner_index])
+
+        # Record the parameters and results in the run archive (written to disk in buffered chunks)
+        if log:
+            archive = default_archive() if log is True else log
+            archive.record(points_matrix, params, seed, winner, winner_fit, best_fits, mean_fits, gen_times,
+                           time.perf_counter() - start_time, diversities)
+
+        # Archive the best routes, to warm-start later runs on the same (or a similar) instance
+        if elite_archive:
+            archive = default_elite_archive() if elite_archive is True else elite_archive
+            archive.add(points_matrix, population, fitnesses)
+    finally:
+        # render the final state of the dashboard
+        if dashboard:
+            dashboard.close()
+        if breeder:
+            breeder.close()
+        if monitor:
+            monitor.stop()
+
+    if monitor and verbosity:
+        print(f'Memory: {monitor.summary()}')
 
     # Remove PH from winner in case it appears
     if 'PH' in winner:
         winner.remove('PH')
 
     if verbosity:
+        if adaptations:
+            for adaptation in adaptations:
+                for name, probability, uses in adaptation.summary():
+                    print(f'{name} | probability: {probability:.3f} | uses: {uses}')
         print(f'Best Route: {winner}.')
         print(f'Geo points gained from this route: {winner_fit}.')
 
@@ -0,0 +1,327 @@
+import os
+import sys
+import time
+import glob
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+from initializers.individual import areas
+from initializers.test_data import instance_hash
+
+import numpy as np
+
+# areas that can appear in a route (PH is the placeholder that replaces KS)
+route_areas = areas + ['PH']
+
+# default location of the archive used when genetic_algorithm is called with log=True
+default_path = os.path.join(parentdir, 'log', 'ga_archive')
+
+
+def encode_route(route):
+    ''' Encodes a route as an array of area indexes.
+
+    Args:
+        route (list): The individual representing a route.
+
+    Returns:
+        np.ndarray: Index of each area of the route in route_areas.
+    '''
+    return np.array([route_areas.index(area) for area in route], dtype=np.int8)
+
+
+def decode_route(codes):
+    ''' Decodes an array of area indexes back into a route (padding values are ignored).
+
+    Args:
+        codes (np.ndarray): Index of each area of the route in route_areas.
+
+    Returns:
+        list: The individual representing a route.
+    '''
+    return [route_areas[code] for code in codes if code >= 0]
+
+
+def param_value(value):
+    ''' Converts a parameter value into something that can be stored in a numpy column.
+
+    Args:
+        value: Value of a parameter of the genetic algorithm.
+
+    Returns:
+        Name of the function for callables, the value itself for numbers and strings, and its string otherwise.
+    '''
+    if callable(value):
+        return value.__name__
+    if isinstance(value, (bool, int, float, str, np.number)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return ','.join(str(param_value(v)) for v in value)
+
+    return str(value)
+
+
+def pad_rows(rows, fill, dtype):
+    ''' Stacks arrays of different lengths into a matrix, padding the shorter ones.
+
+    Args:
+        rows (list): Arrays to stack.
+        fill: Value used for padding.
+        dtype: Type of the matrix.
+
+    Returns:
+        np.ndarray: Matrix with one row per array.
+    '''
+    width = max((len(row) for row in rows), default=0)
+    matrix = np.full((len(rows), width), fill, dtype=dtype)
+
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+
+    return matrix
+
+
+def concat_columns(columns):
+    ''' Concatenates the same column loaded from several chunks of the archive.
+
+    Args:
+        columns (list): Arrays of the column in each chunk.
+
+    Returns:
+        np.ndarray: Concatenated column.
+    '''
+    # matrices (routes and per-generation stats) can have different widths in each chunk
+    if columns[0].ndim == 2:
+        fill = -1 if columns[0].dtype.kind == 'i' else np.nan
+        width = max(column.shape[1] for column in columns)
+        columns = [np.pad(column, ((0, 0), (0, width - column.shape[1])), constant_values=fill) for column in columns]
+
+    try:
+        return np.concatenate(columns)
+    # parameters with different types in different chunks are compared as strings (numpy >= 1.25 raises
+    # DTypePromotionError, a subclass of TypeError, so this also works with older versions)
+    except TypeError:
+        return np.concatenate([column.astype(str) for column in columns])
+
+
+class RunArchive:
+    ''' Archive of genetic algorithm runs.
+
+    Every instance (points matrix) is stored once, in instances/<hash>.npy. Runs are kept in a memory buffer and written
+    in chunks (runs/*.npz), each one with a column per field: the instance hash, the seed, one column per parameter
+    (named param_<parameter>), the best fitness, the best route (encoded as area indexes), the best and mean fitness
+    and the genotype diversity of each generation, the time of each generation and the total time of the run.
+
+    Every process writes its own chunk files, so the same archive can be used by all the workers of a grid search.
+    '''
+    def __init__(self, path=default_path, buffer_size=256):
+        '''
+        Args:
+            path (str): Directory of the archive (created if it does not exist).
+            buffer_size (int): Number of runs kept in memory before being written to disk.
+        '''
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.known_instances = set()
+        self.chunks_written = 0
+        self.cache = (None, None)
+
+        os.makedirs(os.path.join(path, 'instances'), exist_ok=True)
+        os.makedirs(os.path.join(path, 'runs'), exist_ok=True)
+
+    def add_instance(self, points_matrix):
+        ''' Stores an instance in the archive, in case it is not already there.
+
+        Args:
+            points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+        Returns:
+            str: Hash of the instance.
+        '''
+        key = instance_hash(points_matrix)
+
+        if key not in self.known_instances:
+            file_path = os.path.join(self.path, 'instances', key + '.npy')
+            if not os.path.exists(file_path):
+                np.save(file_path, np.asarray(points_matrix, dtype=np.float64))
+            self.known_instances.add(key)
+
+        return key
+
+    def instance(self, key):
+        ''' Loads an instance from the archive.
+
+        Args:
+            key (str): Hash of the instance.
+
+        Returns:
+            np.ndarray: Points matrix of the instance.
+        '''
+        return np.load(os.path.join(self.path, 'instances', key + '.npy'))
+
+    def record(self, points_matrix, params, seed, best_route, best_fit, best_fits, mean_fits, gen_times, elapsed,
+               diversities=()):
+        ''' Adds a run to the archive. Runs are only written to disk when the buffer is full or flush is called.
+
+        Args:
+            points_matrix (list): Matrix of the instance solved by the run.
+            params (dict): Parameters of the run (callables are stored by name).
+            seed (int): Seed of the run.
+            best_route (list): Best individual produced.
+            best_fit (float): Fitness of the best individual.
+            best_fits (list): Best fitness of each generation.
+            mean_fits (list): Mean fitness of each generation.
+            gen_times (list): Time (in seconds) taken by each generation.
+            elapsed (float): Total time (in seconds) of the run.
+            diversities (list): Genotype diversity of each generation.
+        '''
+        self.buffer.append({'instance': self.add_instance(points_matrix),
+                            'seed': -1 if seed is None else seed,
+                            'params': {name: param_value(value) for name, value in params.items()},
+                            'best_fit': best_fit,
+                            'best_route': encode_route(best_route),
+                            'best_fits': np.asarray(best_fits, dtype=np.float64),
+                            'mean_fits': np.asarray(mean_fits, dtype=np.float64),
+                            'gen_times': np.asarray(gen_times, dtype=np.float64),
+                            'diversities': np.asarray(diversities, dtype=np.float64),
+                            'elapsed': elapsed,
+                            'timestamp': time.time()})
+
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        ''' Writes the buffered runs to a new chunk of the archive.
+        '''
+        if not self.buffer:
+            return
+
+        runs, self.buffer = self.buffer, []
+        param_names = sorted({name for run in runs for name in run['params']})
+
+        columns = {'instance': np.array([run['instance'] for run in runs]),
+                   'seed': np.array([run['seed'] for run in runs], dtype=np.int64),
+                   'best_fit': np.array([run['best_fit'] for run in runs], dtype=np.float64),
+                   'elapsed': np.array([run['elapsed'] for run in runs], dtype=np.float64),
+                   'timestamp': np.array([run['timestamp'] for run in runs], dtype=np.float64),
+                   'best_route': pad_rows([run['best_route'] for run in runs], -1, np.int8)}
+
+        for name in ['best_fits', 'mean_fits', 'diversities', 'gen_times']:
+            columns[name] = pad_rows([run[name] for run in runs], np.nan, np.float64)
+
+        for name in param_names:
+            columns['param_' + name] = np.array([run['params'].get(name, '') for run in runs])
+
+        # chunks are named after the process that wrote them, so that several processes can share the archive
+        name = f'{time.time_ns()}-{os.getpid()}-{self.chunks_written}'
+        temp_path = os.path.join(self.path, 'runs', name + '.tmp.npz')
+        np.savez_compressed(temp_path, **columns)
+        os.replace(temp_path, os.path.join(self.path, 'runs', name + '.npz'))
+
+        self.chunks_written += 1
+
+    def load(self):
+        ''' Loads all the runs written to the archive (including the buffered ones, which are flushed first).
+
+        Returns:
+            dict: Column name -> array with the values of all runs.
+        '''
+        self.flush()
+
+        chunk_paths = sorted(glob.glob(os.path.join(self.path, 'runs', '*[0-9].npz')))
+
+        # the columns are only read again if new chunks were written since the last load
+        if self.cache[0] == chunk_paths:
+            return self.cache[1]
+
+        chunks = []
+        for chunk_path in chunk_paths:
+            with np.load(chunk_path) as chunk:
+                chunks.append({name: chunk[name] for name in chunk.files})
+
+        names = sorted({name for chunk in chunks for name in chunk})
+        columns = {}
+        for name in names:
+            parts = [chunk[name] if name in chunk else np.full(len(chunk['seed']), '') for chunk in chunks]
+            columns[name] = concat_columns(parts)
+
+        self.cache = (chunk_paths, columns)
+
+        return columns
+
+    def query(self, points_matrix=None, instance=None, min_fitness=None, **params):
+        ''' Selects the runs that match the given filters.
+
+        Args:
+            points_matrix (list): Only return runs of this instance.
+            instance (str): Only return runs of the instance with this hash.
+            min_fitness (float): Only return runs with best fitness greater or equal to this value.
+            **params: Only return runs with these parameters (callables can be given by name or as functions).
+
+        Returns:
+            dict: Column name -> array with the values of the selected runs.
+        '''
+        columns = self.load()
+        if not columns:
+            return columns
+
+        mask = np.ones(len(columns['seed']), dtype=bool)
+
+        if points_matrix is not None:
+            instance = instance_hash(points_matrix)
+        if instance is not None:
+            mask &= columns['instance'] == instance
+        if min_fitness is not None:
+            mask &= columns['best_fit'] >= min_fitness
+
+        for name, value in params.items():
+            column = columns.get('param_' + name)
+            if column is None:
+                return {key: values[:0] for key, values in columns.items()}
+            value = param_value(value)
+            mask &= (column == value) if column.dtype.kind != 'U' else (column == str(value))
+
+        return {name: column[mask] for name, column in columns.items()}
+
+    def best_runs(self, k=10, **filters):
+        ''' Selects the runs with the highest best fitness.
+
+        Args:
+            k (int): Number of runs to return.
+            **filters: Same filters as in query.
+
+        Returns:
+            list: (best fitness, best route, seed, instance hash) of each selected run, from best to worst.
+        '''
+        columns = self.query(**filters)
+        if not columns or len(columns['best_fit']) == 0:
+            return []
+
+        order = np.argsort(columns['best_fit'])[::-1][:k]
+
+        return [(columns['best_fit'][i], decode_route(columns['best_route'][i]), columns['seed'][i], columns['instance'][i])
+                for i in order]
+
+
+archive = None
+
+def default_archive():
+    ''' Returns the archive used when genetic_algorithm is called with log=True, creating it on first use.
+        The buffered runs are written to disk when the process exits (including multiprocessing workers).
+
+    Returns:
+        RunArchive: Archive stored in log/ga_archive.
+    '''
+    global archive
+
+    if archive is None:
+        # multiprocessing also runs these finalizers when pool workers exit
+        from multiprocessing.util import Finalize
+
+        archive = RunArchive()
+        Finalize(archive, archive.flush, exitpriority=10)
+
+    return archive
@@ -0,0 +1,121 @@
+import os
+import sys
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+from initializers.population import generate_batch_population, batch_evaluate_population
+from initializers.individual import batch_check_constraints, batch_decode_route, batch_skip_ks
+from operators.crossovers import batch_order_crossover, matrix_crossovers
+from operators.mutators import batch_swap_mutation
+from operators.selectors import batch_tournament_selection
+
+import numpy as np
+
+def batch_genetic_algorithm(points_matrices,
+                            pop_size,
+                            generations,
+                            crossover_operator=batch_order_crossover,
+                            mutator=batch_swap_mutation,
+                            ts_size=5,
+                            elite_size=1,
+                            p_xo=0.95,
+                            p_m=0.2,
+                            verbosity=False,
+                            seed=None,
+                            progress=None):
+    ''' Performs a genetic algorithm on many instances at once, evolving one population per instance. Selection,
+        crossover, mutation and evaluation are vectorized across all instances and individuals.
+
+        Routes are arrays with the indexes of the areas between the two D. KS is skipped (replaced by PH) during the
+        evaluation whenever DV comes right after QS and the route gains more geo without it. Children that violate
+        any constraints are replaced by their first parent.
+
+    Args:
+        points_matrices (np.ndarray): Geo gains matrix of each instance, of shape (instances, len(areas), len(areas)).
+        pop_size (int): The size of the population of each instance.
+        generations (int): The number of generations to evolve the populations.
+        crossover_operator (Callable): Batched crossover operator (e.g. batch_order_crossover or
+                                       batch_edge_recombination_crossover).
+        mutator (Callable): Batched mutation function (e.g. batch_swap_mutation or batch_inversion_mutation).
+        ts_size (int): Tournament size (parents are selected with batch_tournament_selection).
+        elite_size (int): Quantity of best individuals of each population to preserve in the next generation.
+        p_xo (float): The probability of performing crossover.
+        p_m (float): The probability of performing mutation.
+        verbosity (bool): Whether to display verbose output during the optimization process.
+        seed (int): Initial value used by random number generator.
+        progress (Callable): Function called after each generation with the generation number and the best fitness
+                             of each instance (optional).
+
+    Returns:
+        Tuple(list, np.ndarray, np.ndarray): The best individual produced for each instance, their fitness values, and
+                                             the best fitness of each instance in each generation
+                                             (shape (generations + 1, instances)).
+    '''
+    rng = np.random.default_rng(seed)
+    points_matrices = np.asarray(points_matrices, dtype=np.float64)
+    instances = points_matrices.shape[0]
+    instance_rows = np.arange(instances)[:, None]
+
+    # generate and evaluate initial populations
+    population = generate_batch_population(instances, pop_size, rng)
+    fitnesses, _ = batch_evaluate_population(population, points_matrices)
+
+    best_fits = [fitnesses.max(axis=1)]
+    if verbosity:
+        print(f'Generation 0 | mean best fitness: {best_fits[-1].mean()}')
+    if progress is not None:
+        progress(0, best_fits[-1])
+
+    n_children = pop_size - elite_size
+    n_pairs = (n_children + 1) // 2
+
+    # geo gains matrix of each pair of parents, for the crossover operators that use it
+    crossover_kwargs = {}
+    if crossover_operator in matrix_crossovers:
+        crossover_kwargs['points_matrices'] = np.repeat(points_matrices, n_pairs, axis=0)
+
+    for i in range(generations):
+        # select parents to reproduce (one pair for every two children)
+        parents = batch_tournament_selection(fitnesses, 2 * n_pairs, rng, ts_size)
+        parents_1 = population[instance_rows, parents[:, :n_pairs]].reshape(instances * n_pairs, -1)
+        parents_2 = population[instance_rows, parents[:, n_pairs:]].reshape(instances * n_pairs, -1)
+
+        # perform crossover with probability p_xo
+        c1, c2 = crossover_operator(parents_1, parents_2, rng, **crossover_kwargs)
+        crossed = (rng.random(len(parents_1)) <= p_xo)[:, None]
+        c1, c2 = np.where(crossed, c1, parents_1), np.where(crossed, c2, parents_2)
+
+        # perform mutation on children with probability p_m
+        children = mutator(np.concatenate([c1, c2]), p_m, rng)
+        children = children.reshape(2, instances, n_pairs, -1).transpose(1, 0, 2, 3).reshape(instances, 2 * n_pairs, -1)
+        children = children[:, :n_children]
+
+        # children that violate any constraints are replaced by their first parent
+        skip_ks, _ = batch_skip_ks(children, points_matrices)
+        first_parents = population[instance_rows, parents[:, :n_children]]
+        invalid = batch_check_constraints(children, skip_ks)
+        children = np.where(invalid[..., None], first_parents, children)
+
+        # perform elitism if specified in parameters
+        if elite_size > 0:
+            elite = np.argpartition(fitnesses, pop_size - elite_size, axis=1)[:, pop_size - elite_size:]
+            children = np.concatenate([population[instance_rows, elite], children], axis=1)
+
+        population = children
+        fitnesses, _ = batch_evaluate_population(population, points_matrices)
+        best_fits.append(fitnesses.max(axis=1))
+
+        if verbosity:
+            print(f'Generation {i+1} | mean best fitness: {best_fits[-1].mean()}')
+        if progress is not None:
+            progress(i + 1, best_fits[-1])
+
+    # return winners (individual with best fitness of each instance)
+    fitnesses, skip_ks = batch_evaluate_population(population, points_matrices)
+    best = fitnesses.argmax(axis=1)
+    winners = [batch_decode_route(population[j, best[j]], skip_ks[j, best[j]]) for j in range(instances)]
+
+    return winners, fitnesses[np.arange(instances), best], np.array(best_fits)
@@ -0,0 +1,121 @@
+import os
+import io
+import time
+import base64
+import queue
+import threading
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+
+# default location of the dashboard used when genetic_algorithm is called with plot=True
+default_path = os.path.join(parentdir, 'log', 'ga_progress.png')
+
+
+class ProgressDashboard:
+    ''' Background observer that renders the progress of a genetic algorithm run to a file.
+
+    The algorithm only puts the stats of each generation in a queue (which never blocks). A separate thread consumes
+    them and renders the best fitness, mean fitness and diversity of each generation to a PNG image, or to a
+    self-contained HTML page (the image is embedded and the page reloads itself), at most once every interval seconds.
+    Rendering does not need a display, so it also works on headless workers.
+    '''
+    def __init__(self, path=default_path, interval=1.0):
+        '''
+        Args:
+            path (str): File where the dashboard is rendered (.png or .html).
+            interval (float): Minimum time (in seconds) between two renders.
+        '''
+        self.path = path
+        self.interval = interval
+        self.stats = queue.SimpleQueue()
+        self.generations, self.best_fits, self.mean_fits, self.diversities = [], [], [], []
+        self.thread = threading.Thread(target=self.run, name='ProgressDashboard', daemon=True)
+        self.thread.start()
+
+    def update(self, generation, best_fit, mean_fit, diversity):
+        ''' Sends the stats of a generation to the dashboard.
+
+        Args:
+            generation (int): Generation number.
+            best_fit (float): Best fitness of the generation.
+            mean_fit (float): Mean fitness of the generation.
+            diversity (float): Diversity of the population.
+        '''
+        self.stats.put((generation, best_fit, mean_fit, diversity))
+
+    def close(self):
+        ''' Renders the final state of the dashboard and stops the observer thread.
+        '''
+        self.stats.put(None)
+        self.thread.join()
+
+    def run(self):
+        ''' Consumes the stats sent by the algorithm, rendering the dashboard when the interval has passed.
+        '''
+        last_render = 0.0
+        pending = False
+
+        while True:
+            try:
+                item = self.stats.get(timeout=self.interval)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                break
+
+            if item:
+                generation, best_fit, mean_fit, diversity = item
+                self.generations.append(generation)
+                self.best_fits.append(best_fit)
+                self.mean_fits.append(mean_fit)
+                self.diversities.append(diversity)
+                pending = True
+
+            if pending and time.monotonic() - last_render >= self.interval:
+                self.render()
+                last_render = time.monotonic()
+                pending = False
+
+        if pending or not os.path.exists(self.path):
+            self.render()
+
+    def render(self):
+        ''' Renders the fitness landscape and the diversity of the population to the dashboard file.
+        '''
+        # the object-oriented API of matplotlib does not use pyplot's global state (safe to use outside the main thread)
+        from matplotlib.figure import Figure
+
+        figure = Figure(figsize=(8, 6))
+        fitness_ax, diversity_ax = figure.subplots(2, 1, sharex=True)
+
+        fitness_ax.plot(self.generations, self.best_fits, label='Best Fitness')
+        fitness_ax.plot(self.generations, self.mean_fits, label='Mean Fitness')
+        fitness_ax.set_ylabel('Fitness')
+        fitness_ax.set_title('Fitness Landscape')
+        fitness_ax.legend()
+
+        diversity_ax.plot(self.generations, self.diversities, color='tab:green')
+        diversity_ax.set_xlabel('Generation')
+        diversity_ax.set_ylabel('Diversity')
+        figure.tight_layout()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = self.path + '.tmp'
+
+        # the file is replaced at once, so that it is never read while half written
+        if self.path.endswith('.html'):
+            image = io.BytesIO()
+            figure.savefig(image, format='png')
+            encoded = base64.b64encode(image.getvalue()).decode()
+            with open(temp_path, 'w') as file:
+                file.write(f'<!DOCTYPE html><html><head><meta http-equiv="refresh" content="{max(1, round(self.interval))}">'
+                           f'<title>Genetic Algorithm Progress</title></head><body>'
+                           f'<p>Generation {self.generations[-1] if self.generations else 0} | '
+                           f'best fitness: {self.best_fits[-1] if self.best_fits else "-"}</p>'
+                           f'<img src="data:image/png;base64,{encoded}"></body></html>')
+        else:
+            figure.savefig(temp_path, format='png')
+
+        os.replace(temp_path, self.path)
@@ -0,0 +1,381 @@
+from grid_search import *
+from collections import deque
+from multiprocessing.connection import Listener, Client
+import argparse
+import ipaddress
+import multiprocessing
+import secrets
+import threading
+
+
+def parse_address(address):
+    ''' Parses the address of a coordinator.
+
+    Args:
+        address (str): 'host:port' for a TCP socket, or the path of a Unix socket.
+
+    Returns:
+        tuple | str: (host, port) for a TCP socket, or the path of a Unix socket.
+    '''
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+
+    return address
+
+
+def is_loopback(address):
+    ''' Checks if an address can only be reached from this machine.
+
+    Args:
+        address (tuple | str): (host, port) of a TCP socket or path of a Unix socket.
+
+    Returns:
+        bool: True for Unix sockets and loopback hosts, False for any other host (including host names other than
+              localhost, which may resolve to any interface).
+    '''
+    if isinstance(address, str):
+        return True
+
+    host = address[0]
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class Coordinator:
+    ''' Serves parameter combinations to grid search workers over a TCP or Unix socket and collects their results.
+
+    Each worker receives the algorithm, the number of iterations and the data matrices when it connects, and then
+    repeatedly asks for a combination to evaluate (sending back the result of the previous one). Workers can join or
+    leave at any time: the combinations leased to a worker that disconnects before sending their results are put back
+    in the queue and served to another worker.
+
+    Combinations are served by index, from a counter, and only the best result so far is kept, so the space is never
+    materialized (the coordinator only holds the combinations that are leased or were given back by a worker).
+
+    Messages are pickled, so anyone who knows the authentication key can run code on the coordinator and the workers.
+    Without an explicit key, a random one is generated (and the coordinator only listens on loopback addresses).
+    '''
+    def __init__(self, combinations, algorithm, iterations, points_matrices, address=('127.0.0.1', 0), authkey=None):
+        '''
+        Args:
+            combinations (Sequence): Combinations of parameters to evaluate (e.g. a SearchSpace).
+            algorithm (callable): Function to test the parameters in.
+            iterations (int): Number iterations to be executed to evaluate each parameters combination.
+            points_matrices (list): Data matrices for each iteration.
+            address (tuple | str): (host, port) of a TCP socket (port 0 picks a free port) or path of a Unix socket.
+            authkey (bytes): Authentication key the workers must use to connect (required to listen on a non-loopback
+                             address; by default, a random key is generated).
+        '''
+        if authkey is None:
+            if not is_loopback(address):
+                raise ValueError(f'An explicit authentication key is required to listen on {address}.')
+            authkey = secrets.token_hex(16).encode()
+
+        self.combinations = combinations
+        self.setup = ('setup', algorithm, iterations, points_matrices)
+        self.authkey = authkey
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+
+        # indexes that were never served come from a counter, and the ones given back by workers from a queue
+        self.next_index = 0
+        self.pending = deque()
+        self.leases = {}
+        self.remaining = len(self.combinations)
+        self.best_index, self.best_fit = None, None
+        self.workers = 0
+        self.accepting = None
+        self.closing = False
+        self.condition = threading.Condition()
+
+    def accept(self):
+        ''' Accepts workers until the coordinator is closed, serving each one in its own thread.
+        '''
+        while True:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                # failed handshake (e.g. wrong authkey) or closed listener
+                if self.closing:
+                    break
+                continue
+
+            if self.closing:
+                connection.close()
+                break
+
+            threading.Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+    def lease(self, worker):
+        ''' Chooses the next message to send to a worker asking for work.
+
+        Args:
+            worker (int): Identifier of the worker.
+
+        Returns:
+            tuple: ('task', index, params), ('wait', seconds) if all combinations are leased, or ('done',).
+        '''
+        with self.condition:
+            if self.pending or self.next_index < len(self.combinations):
+                if self.pending:
+                    index = self.pending.popleft()
+                else:
+                    index = self.next_index
+                    self.next_index += 1
+                self.leases[index] = worker
+                return ('task', index, self.combinations[index])
+
+            if self.remaining > 0:
+                return ('wait', 0.5)
+
+            return ('done',)
+
+    def complete(self, index, result):
+        ''' Registers the result of a combination, keeping it if it is the best one so far (ties go to the lowest
+            index, as in grid_search).
+
+        Args:
+            index (int): Index of the combination.
+            result (float): Average performance of the combination.
+        '''
+        with self.condition:
+            # results of combinations that are no longer leased (already completed) are ignored
+            if self.leases.pop(index, None) is not None:
+                self.remaining -= 1
+                if self.best_fit is None or result > self.best_fit or (result == self.best_fit
+                                                                       and index < self.best_index):
+                    self.best_index, self.best_fit = index, result
+            self.condition.notify_all()
+
+    def release(self, worker):
+        ''' Puts back in the queue the combinations leased to a worker that left.
+
+        Args:
+            worker (int): Identifier of the worker.
+        '''
+        with self.condition:
+            for index, owner in list(self.leases.items()):
+                if owner == worker:
+                    del self.leases[index]
+                    self.pending.appendleft(index)
+            self.workers -= 1
+
+    def serve(self, connection):
+        ''' Serves a worker until it leaves or all combinations have been evaluated.
+
+        Args:
+            connection (Connection): Connection to the worker.
+        '''
+        with self.condition:
+            self.workers += 1
+            worker = id(connection)
+
+        try:
+            connection.send(self.setup)
+            while True:
+                message = connection.recv()
+                if message[0] == 'result':
+                    self.complete(message[1], message[2])
+
+                reply = self.lease(worker)
+                connection.send(reply)
+                if reply[0] == 'done':
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            self.release(worker)
+            connection.close()
+
+    def start(self):
+        ''' Starts accepting workers (in a background thread).
+        '''
+        self.accepting = threading.Thread(target=self.accept, daemon=True)
+        self.accepting.start()
+
+    def wait(self):
+        ''' Waits until all combinations have been evaluated (workers that connect later are told they are done).
+
+        Returns:
+            Tuple(int, float): Index of the best combination and its average performance (None if there are no
+                               combinations).
+        '''
+        with self.condition:
+            while self.remaining > 0:
+                self.condition.wait()
+
+        return self.best_index, self.best_fit
+
+    def run(self):
+        ''' Serves the combinations until all of them have been evaluated.
+
+        Returns:
+            Tuple(int, float): Index of the best combination and its average performance (None if there are no
+                               combinations).
+        '''
+        self.start()
+        try:
+            return self.wait()
+        finally:
+            self.close()
+
+    def close(self):
+        ''' Stops accepting workers.
+        '''
+        if not self.closing:
+            self.closing = True
+            # wake up the accepting thread, which is blocked until a worker connects
+            if self.accepting is not None and self.accepting.is_alive():
+                try:
+                    Client(self.address, authkey=self.authkey).close()
+                except OSError:
+                    pass
+            self.listener.close()
+
+
+def worker(address, authkey, timeout=30.0):
+    ''' Evaluates the combinations served by a coordinator until all of them have been evaluated.
+
+    Args:
+        address (tuple | str): (host, port) of the coordinator's TCP socket or path of its Unix socket.
+        authkey (bytes): Authentication key of the coordinator.
+        timeout (float): Time (in seconds) to keep trying to connect (workers may start before the coordinator).
+
+    Returns:
+        int: Number of combinations evaluated by the worker.
+    '''
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connection = Client(address, authkey=authkey)
+            break
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+    evaluated = 0
+    try:
+        _, algorithm, iterations, points_matrices = connection.recv()
+
+        message = ('ready',)
+        while True:
+            connection.send(message)
+            reply = connection.recv()
+
+            if reply[0] == 'task':
+                _, index, params = reply
+                message = ('result', index, evaluate_combination(params, algorithm, iterations, points_matrices))
+                evaluated += 1
+            elif reply[0] == 'wait':
+                time.sleep(reply[1])
+                message = ('ready',)
+            else:
+                break
+    except (EOFError, OSError):
+        # the coordinator finished (or stopped) while waiting for work
+        pass
+    finally:
+        connection.close()
+
+    return evaluated
+
+
+def distributed_grid_search(algorithm, iterations, parameters, address=('127.0.0.1', 0), authkey=None,
+                            local_workers=0, dataset=None):
+    ''' Grid search in which the combinations are evaluated by workers connected to a coordinator (see grid_search).
+
+    Workers are started with worker(address, authkey) (or 'python distributed.py worker --address ... --authkey ...'),
+    on this machine or on any other one that can reach the address, and can join or leave during the search.
+
+    Args:
+        algorithm (callable): Function to test the parameters in.
+        iterations (int): Number iterations to be executed to evaluate each parameters combination.
+        parameters (list): All parameters to test.
+        address (tuple | str): (host, port) of a TCP socket (port 0 picks a free port) or path of a Unix socket.
+        authkey (bytes): Authentication key the workers must use to connect (required to listen on a non-loopback
+                         address; by default, a random key is generated and printed).
+        local_workers (int): Number of workers to start on this machine.
+        dataset (str): .npy file with the data matrices to test, opened by each worker (it must be available at the same
+                       path on every machine); by default, random data matrices are generated and sent to the workers.
+
+    Returns:
+        dict: Set of parameters that performs the best.
+    '''
+    # combinations are computed from their indexes when they are served (redundant ts_size values are never generated)
+    combinations = SearchSpace(parameters)
+
+    print(f'There are {len(combinations)} combinations to test.')
+
+    # generate the data matrices to test across all parameter combinations (or open the dataset in each worker)
+    if dataset is None:
+        points_matrices = [generate_points_matrix() for _ in range(iterations)]
+    elif len(load_points_matrices(dataset)) < iterations:
+        raise ValueError(f'The dataset {dataset} has less than {iterations} data matrices.')
+    else:
+        points_matrices = dataset
+
+    coordinator = Coordinator(combinations, algorithm, iterations, points_matrices, address, authkey)
+    print(f'Coordinator listening on {coordinator.address}')
+    if authkey is None:
+        print(f'Authentication key: {coordinator.authkey.decode()}')
+
+    processes = [multiprocessing.Process(target=worker, args=(coordinator.address, coordinator.authkey))
+                 for _ in range(local_workers)]
+    for process in processes:
+        process.start()
+
+    coordinator.start()
+    try:
+        best_index, best_fit = coordinator.wait()
+
+        # keep accepting until the local workers leave (one that connects late would otherwise retry until its timeout)
+        for process in processes:
+            process.join()
+    finally:
+        coordinator.close()
+
+    print('Combinations concluded! ')
+
+    best_params = combinations[best_index]
+    print(f'Best Parameters: {best_params}')
+    print(f'Average fitness: {best_fit}')
+
+    return best_params
+
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Distributed grid search of the genetic algorithm parameters.')
+    parser.add_argument('role', choices=['coordinator', 'worker'])
+    parser.add_argument('--address', default='127.0.0.1:6000', help="'host:port' or path of a Unix socket")
+    parser.add_argument('--authkey', default=None,
+                        help='shared secret (required by workers, and by coordinators on non-loopback addresses; '
+                             'by default, the coordinator generates one and prints it)')
+    parser.add_argument('--iterations', type=int, default=15)
+    parser.add_argument('--workers', type=int, default=0, help='workers to start on this machine (coordinator)')
+    parser.add_argument('--dataset', default=None, help='.npy file with the data matrices to test (coordinator)')
+    args = parser.parse_args()
+    authkey = args.authkey.encode() if args.authkey else None
+
+    if args.role == 'coordinator':
+        if authkey is None and not is_loopback(parse_address(args.address)):
+            parser.error(f'--authkey is required to listen on {args.address}')
+        distributed_grid_search(genetic_algorithm, args.iterations, ga_parameters, parse_address(args.address),
+                                authkey, args.workers, args.dataset)
+    else:
+        if authkey is None:
+            parser.error('--authkey is required (use the key of the coordinator)')
+        print(f'Evaluated {worker(parse_address(args.address), authkey)} combinations.')
+
+
+'''
+python PROJETO_OA\algorithm\distributed.py coordinator --workers 4
+python PROJETO_OA\algorithm\distributed.py coordinator --address <private interface>:6000 --authkey <secret> --workers 4
+python PROJETO_OA\algorithm\distributed.py worker --address <coordinator host>:6000 --authkey <secret>
+'''
@@ -0,0 +1,205 @@
+import os
+import sys
+import ctypes
+import struct
+import hashlib
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+from initializers.population import evaluate_population
+from initializers.test_data import instance_hash
+
+# names of the counters in SharedFitnessCache.stats
+stat_names = ['lookups', 'hits', 'cross_hits', 'inserts', 'evictions']
+
+
+def route_key(instance, route):
+    ''' Creates the 64-bit key of a route of an instance.
+
+    Args:
+        instance (bytes): Hash of the instance (see instance_hash).
+        route (list): The individual representing a route.
+
+    Returns:
+        int: Non-zero signed 64-bit key (0 marks empty slots).
+    '''
+    digest = hashlib.blake2b(instance + ','.join(route).encode(), digest_size=8).digest()
+
+    return int.from_bytes(digest, 'little', signed=True) or 1
+
+
+def float_bits(value):
+    ''' Reinterprets a float as a signed 64-bit integer.
+
+    Args:
+        value (float): Value to reinterpret.
+
+    Returns:
+        int: Bits of the value.
+    '''
+    return struct.unpack('<q', struct.pack('<d', value))[0]
+
+
+class SharedFitnessCache:
+    ''' Fitness cache shared by all the processes of a pool, keyed by the instance hash and the route.
+
+    It is a bounded open-addressing table in shared memory (linear probing over at most max_probes slots) without
+    locks: a writer empties the key of a slot, writes the value, the owner and a check (key XOR value bits), and then
+    the key, and a reader only accepts an entry if its key did not change while it was read and the check matches.
+    A torn or overwritten entry is just a miss. When the probed slots are all used by other routes, one of them is
+    evicted. The stats count how many lookups hit an entry written by another process (cross_hits).
+
+    The cache must be created before the pool, and given to its workers with use_fitness_cache (pool initializer).
+    '''
+    def __init__(self, capacity=1 << 16, max_probes=8, evaluator=evaluate_population):
+        '''
+        Args:
+            capacity (int): Number of slots of the table.
+            max_probes (int): Maximum number of slots probed for each route.
+            evaluator (Callable): Function to evaluate the routes that are not in the cache.
+        '''
+        self.capacity = capacity
+        self.max_probes = max_probes
+        self.evaluator = evaluator
+        self.keys = RawArray(ctypes.c_int64, capacity)
+        self.checks = RawArray(ctypes.c_int64, capacity)
+        self.values = RawArray(ctypes.c_double, capacity)
+        self.owners = RawArray(ctypes.c_int32, capacity)
+        self.stats = RawArray(ctypes.c_int64, len(stat_names))
+        self.stats_lock = multiprocessing.Lock()
+
+    def lookup(self, key):
+        ''' Looks up the fitness of a route.
+
+        Args:
+            key (int): Key of the route (see route_key).
+
+        Returns:
+            Tuple(float, int): The fitness and the process that stored it (None if the route is not in the cache).
+        '''
+        keys = self.keys
+        for probe in range(self.max_probes):
+            index = (key + probe) % self.capacity
+            stored = keys[index]
+            if stored == 0:
+                return None
+            if stored == key:
+                value, owner, check = self.values[index], self.owners[index], self.checks[index]
+                if keys[index] == key and check == key ^ float_bits(value):
+                    return value, owner
+                return None
+
+        return None
+
+    def store(self, key, value):
+        ''' Stores the fitness of a route.
+
+        Args:
+            key (int): Key of the route (see route_key).
+            value (float): Fitness of the route.
+
+        Returns:
+            bool: Whether another route was evicted.
+        '''
+        keys = self.keys
+        evicted = True
+        index = (key + (key >> 32) % self.max_probes) % self.capacity
+        for probe in range(self.max_probes):
+            slot = (key + probe) % self.capacity
+            if keys[slot] == 0 or keys[slot] == key:
+                index, evicted = slot, False
+                break
+
+        keys[index] = 0
+        self.values[index] = value
+        self.owners[index] = os.getpid()
+        self.checks[index] = key ^ float_bits(value)
+        keys[index] = key
+
+        return evicted
+
+    def evaluate(self, population, points_matrix):
+        ''' Evaluates a population, reusing the fitness of the routes already evaluated by any process.
+
+        Args:
+            population (list): Array of individuals.
+            points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+        Returns:
+            list: Fitness values corresponding to each individual in the population.
+        '''
+        instance = instance_hash(points_matrix).encode()
+        pid = os.getpid()
+
+        keys = [route_key(instance, individual) for individual in population]
+        fitnesses = [None] * len(population)
+        missing = []
+        hits = cross_hits = 0
+
+        for i, key in enumerate(keys):
+            found = self.lookup(key)
+            if found is None:
+                missing.append(i)
+            else:
+                fitnesses[i] = found[0]
+                hits += 1
+                cross_hits += found[1] != pid
+
+        evictions = 0
+        if missing:
+            for i, fitness in zip(missing, self.evaluator([population[i] for i in missing], points_matrix)):
+                fitnesses[i] = fitness
+                evictions += self.store(keys[i], fitness)
+
+        with self.stats_lock:
+            for index, count in enumerate([len(keys), hits, cross_hits, len(missing), evictions]):
+                self.stats[index] += count
+
+        return fitnesses
+
+    def summary(self):
+        ''' Summarizes the use of the cache.
+
+        Returns:
+            dict: Number of lookups, hits, hits of entries stored by another process (cross_hits), inserts and
+                  evictions, and the hit rate.
+        '''
+        stats = dict(zip(stat_names, self.stats))
+        stats['hit_rate'] = stats['hits'] / stats['lookups'] if stats['lookups'] else 0.0
+
+        return stats
+
+
+# cache of this process, set by use_fitness_cache
+fitness_cache = None
+
+def use_fitness_cache(cache):
+    ''' Sets the fitness cache used by cached_evaluate_population in this process (pool initializer).
+
+    Args:
+        cache (SharedFitnessCache): Cache shared by the processes of the pool.
+    '''
+    global fitness_cache
+    fitness_cache = cache
+
+
+def cached_evaluate_population(population, points_matrix):
+    ''' Creates a list of the geo gains of each individual in the population, using the fitness cache of the process
+        (see use_fitness_cache), or evaluate_population if there is no cache.
+
+    Args:
+        population (list): Array of individuals.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+    Returns:
+        list: Total geo gains values corresponding to each individual in the population.
+    '''
+    if fitness_cache is None:
+        return evaluate_population(population, points_matrix)
+
+    return fitness_cache.evaluate(population, points_matrix)
@@ -1,5 +1,8 @@
 from algorithm import *
-import gc
+from fitness_cache import SharedFitnessCache, use_fitness_cache, cached_evaluate_population
+from memory import MemoryThrottle, with_peak_rss
+from itertools import product
+import csv
 import time
 
 def evaluate_combination(params, algorithm, iterations, points_matrices):
@@ -9,7 +12,7 @@ def evaluate_combination(params, algorithm, iterations, points_matrices):
         params (dict): Combination of parameters to evaluate.
         algorithm (callable): Function to test the parameters in.
         iterations (int): Number iterations to be executed to evaluate the parameters combination.
-        points_matrices (list): Data matrices for each iteration.
+        points_matrices (list or str): Data matrices for each iteration, or the file of a dataset of data matrices.
 
     Returns:
         float: Average performance of the parameters combination.
@@ -21,8 +24,13 @@ def evaluate_combination(params, algorithm, iterations, points_matrices):
     try:
         performances = []
 
+        # datasets are memory mapped by each worker, instead of being copied to it
+        if isinstance(points_matrices, str):
+            points_matrices = load_points_matrices(points_matrices)
+
         for i in range(iterations):
-            params['points_matrix'] = points_matrices[i]
+            points_matrix = points_matrices[i]
+            params['points_matrix'] = points_matrix.tolist() if isinstance(points_matrix, np.ndarray) else points_matrix
             result = algorithm(**params)
             performances.append(result[1])
 
@@ -41,35 +49,202 @@ def evaluate_combination(params, algorithm, iterations, points_matrices):
         return 0
 
 
-def clean_combinations(combinations):
-    ''' Filters out redundant combinations of parameters.
+def parameter_grid(parameters):
+    ''' Lazily generates all combinations of the specified parameters (in the same order as scikit-learn's ParameterGrid).
 
     Args:
-        combinations (list): All possible combinations of parameters of the genetic algorithm function.
+        parameters (dict): Values to test for each parameter.
 
-    Returns:
-        list: Combinations to test in the grid search.
+    Yields:
+        dict: One combination of parameters.
     '''
-    clean_combs = []
+    # keys are sorted so that combinations are always generated in the same order
+    keys = sorted(parameters)
 
-    # discard combinations of same parameters with different ts_size if the selector is not tournament selection (avoid redundancy)
-    for param_comb in combinations:
-        if param_comb['selector'] != tournament_selection and param_comb['ts_size'] == 5: 
-            clean_combs.append(param_comb)       
-        
-        if param_comb['selector'] == tournament_selection:
-            clean_combs.append(param_comb)  
-    
-    return clean_combs
+    for values in product(*(parameters[key] for key in keys)):
+        yield dict(zip(keys, values))
+
+
+class SearchSpace:
+    ''' Lazy space of combinations of parameters, with conditional parameters: a parameter that only matters for some
+        values of another one (e.g. ts_size, only used by tournament_selection) takes just its first value for the other
+        ones, instead of repeating the same combination for each of its values.
+
+        Combinations are never all generated at once: the number of combinations under each choice is counted (mixed
+        radix), so that any combination can be computed from its index, and the space can be split into shards of
+        indexes. Combinations come in the same order as parameter_grid (keys are sorted, and conditional parameters come
+        right after the parameter they depend on).
+    '''
+    def __init__(self, parameters, conditions=None):
+        '''
+        Args:
+            parameters (dict): Values to test for each parameter.
+            conditions (dict): For each conditional parameter, the parameter it depends on and the values of that
+                               parameter for which it matters (by default, ts_size only matters for tournament_selection).
+        '''
+        self.parameters = {key: list(values) for key, values in parameters.items()}
+        conditions = {'ts_size': ('selector', [tournament_selection])} if conditions is None else conditions
+        self.conditions = {key: (parent, list(values)) for key, (parent, values) in conditions.items()
+                           if key in self.parameters and parent in self.parameters}
+
+        # conditional parameters come after the parameter they depend on
+        self.keys, pending = [], []
+        for key in sorted(self.parameters):
+            pending.append(key)
+            added = True
+            while added:
+                added = False
+                for pending_key in list(pending):
+                    if pending_key not in self.conditions or self.conditions[pending_key][0] in self.keys:
+                        self.keys.append(pending_key)
+                        pending.remove(pending_key)
+                        added = True
+        if pending:
+            raise ValueError(f'Circular conditions between the parameters {pending}.')
+
+        self.sizes = {}
+
+    def choices(self, position, assignment):
+        ''' Gets the indexes of the values that a parameter can take, given the values of the previous parameters.
+
+        Args:
+            position (int): Position of the parameter in self.keys.
+            assignment (dict): Index of the value of each previous parameter.
+
+        Returns:
+            range: Indexes of the values of the parameter.
+        '''
+        key = self.keys[position]
+        if key in self.conditions:
+            parent, values = self.conditions[key]
+            if self.parameters[parent][assignment[parent]] not in values:
+                return range(1)
+
+        return range(len(self.parameters[key]))
+
+    def size(self, position, assignment):
+        ''' Counts the combinations of the parameters from a position onwards, given the values of the previous ones.
+
+        Args:
+            position (int): Position of the first parameter in self.keys.
+            assignment (dict): Index of the value of each previous parameter.
+
+        Returns:
+            int: Number of combinations.
+        '''
+        if position == len(self.keys):
+            return 1
+
+        # the count only depends on the values of the previous parameters that some remaining parameter depends on
+        parents = sorted({self.conditions[key][0] for key in self.keys[position:] if key in self.conditions} & set(assignment))
+        memo_key = (position, tuple(assignment[parent] for parent in parents))
+
+        if memo_key not in self.sizes:
+            key = self.keys[position]
+            self.sizes[memo_key] = sum(self.size(position + 1, {**assignment, key: choice})
+                                       for choice in self.choices(position, assignment))
+
+        return self.sizes[memo_key]
+
+    def __len__(self):
+        return self.size(0, {})
+
+    def __getitem__(self, index):
+        ''' Computes the combination with a given index.
+
+        Args:
+            index (int): Index of the combination.
+
+        Returns:
+            dict: The combination of parameters.
+        '''
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('SearchSpace index out of range')
+
+        assignment = {}
+        for position, key in enumerate(self.keys):
+            for choice in self.choices(position, assignment):
+                size = self.size(position + 1, {**assignment, key: choice})
+                if index < size:
+                    assignment[key] = choice
+                    break
+                index -= size
+
+        return {key: self.parameters[key][assignment[key]] for key in sorted(self.keys)}
+
+    def __iter__(self):
+        return self.iterate(0, {})
+
+    def iterate(self, position, assignment):
+        ''' Lazily generates the combinations of the parameters from a position onwards (depth first).
+
+        Args:
+            position (int): Position of the first parameter in self.keys.
+            assignment (dict): Index of the value of each previous parameter.
+
+        Yields:
+            dict: One combination of parameters.
+        '''
+        if position == len(self.keys):
+            yield {key: self.parameters[key][assignment[key]] for key in sorted(self.keys)}
+            return
+
+        for choice in self.choices(position, assignment):
+            yield from self.iterate(position + 1, {**assignment, self.keys[position]: choice})
+
+    def shard(self, shard_index, n_shards):
+        ''' Gets the indexes of one of n_shards contiguous slices of the space (e.g. the slice of a worker).
+
+        Args:
+            shard_index (int): Index of the shard (between 0 and n_shards - 1).
+            n_shards (int): Number of shards.
+
+        Returns:
+            range: Indexes of the combinations of the shard.
+        '''
+        total = len(self)
+
+        return range(total * shard_index // n_shards, total * (shard_index + 1) // n_shards)
 
 
 
 
-from sklearn.model_selection import ParameterGrid
 import multiprocessing
 from functools import partial
 
-def grid_search(algorithm, iterations, parameters):
+# search space of a grid search worker and parameters that override its combinations, set by init_worker
+worker_space, worker_overrides = None, {}
+
+def init_worker(space, overrides, cache):
+    ''' Prepares a grid search worker (pool initializer).
+
+    Args:
+        space (SearchSpace): Combinations of parameters to test.
+        overrides (dict): Parameters that replace the ones of every combination.
+        cache (SharedFitnessCache): Fitness cache shared by the workers (None if there is no cache).
+    '''
+    global worker_space, worker_overrides
+    worker_space, worker_overrides = space, overrides
+    use_fitness_cache(cache)
+
+
+def evaluate_index(index, algorithm, iterations, points_matrices):
+    ''' Evaluates the combination of parameters with a given index in the search space of the worker (the worker
+        computes the combination, so only its index is sent).
+
+    Args:
+        index (int): Index of the combination in the search space.
+        (remaining arguments are the same as in evaluate_combination)
+
+    Returns:
+        float: Average performance of the parameters combination.
+    '''
+    return evaluate_combination({**worker_space[index], **worker_overrides}, algorithm, iterations, points_matrices)
+
+
+def grid_search(algorithm, iterations, parameters, warm_start=False, dataset=None, cache_size=0, memory_budget=None):
     ''' Evaluates the performance of an algorithm with all combinations of the specified parameter across a certain amount of 
         iterations.
 
@@ -77,50 +252,86 @@ def grid_search(algorithm, iterations, parameters):
         algorithm (callable): Function to test the parameters in.
         iterations (int): Number iterations to be executed to evaluate each parameters combination.
         parameters (list): All parameters to test.
+        warm_start (bool): Whether to seed the population of each run with the best routes found by the previous runs
+                           of the same worker on the same data matrix (warm_start_population), instead of using the
+                           initializer of each combination.
+        dataset (str): .npy file with the data matrices to test (see save_points_matrices); by default, random data
+                       matrices are generated.
+        cache_size (int): Number of slots of a fitness cache shared by all workers (the fitness_evaluator of every
+                          combination is replaced by cached_evaluate_population); by default, there is no cache.
+        memory_budget (int): Memory (in bytes) available for all the workers. Workers report their peak RSS, and
+                             fewer combinations are evaluated at the same time when they would not fit in the budget.
 
     Returns:
         dict: Set of parameters that performs the best.
     '''
-    # use multiple CPU cores to parallelize processing (makes the grid search run faster)
-    pool = multiprocessing.Pool(processes=multiprocessing.cpu_count())
+    # the routes evaluated by any worker are not evaluated again by the others
+    cache = SharedFitnessCache(cache_size) if cache_size else None
 
-    # Generate all parameter combinations and remove the redundant ones (optimize computation)
-    combinations = ParameterGrid(parameters)    
-    combinations = clean_combinations(combinations)
+    # parameters that replace the ones of every combination
+    overrides = {}
+
+    # each worker keeps the elite routes of its runs in its own archive
+    if warm_start:
+        overrides.update(initializer=warm_start_population, elite_archive=True)
+
+    if cache is not None:
+        overrides['fitness_evaluator'] = cached_evaluate_population
+
+    # combinations are computed by the workers from their indexes (redundant ts_size values are never generated)
+    combinations = SearchSpace(parameters)
 
     print(f'There are {len(combinations)} combinations to test.')
 
-    # generate the data matrices to test across all parameter combinations
-    points_matrices = [generate_points_matrix() for _ in range(iterations)]
+    # generate the data matrices to test across all parameter combinations (or open the dataset in each worker)
+    if dataset is None:
+        points_matrices = [generate_points_matrix() for _ in range(iterations)]
+    elif len(load_points_matrices(dataset)) < iterations:
+        raise ValueError(f'The dataset {dataset} has less than {iterations} data matrices.')
+    else:
+        points_matrices = dataset
+
+    # use multiple CPU cores to parallelize processing (makes the grid search run faster)
+    processes = multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes=processes, initializer=init_worker, initargs=(combinations, overrides, cache))
 
     
-    partial_evaluator = partial(evaluate_combination, algorithm = algorithm,
+    partial_evaluator = partial(evaluate_index, algorithm = algorithm,
                                 iterations =  iterations,
                                   points_matrices = points_matrices)
-    
-    # parallelize evaluation of all parameter combinations
-    results = pool.map(partial_evaluator,
-                    combinations)
-        
+
+    # workers report their peak memory, and only as many combinations as fit in the budget are evaluated at once
+    tasks, throttle = range(len(combinations)), None
+    if memory_budget:
+        throttle = MemoryThrottle(memory_budget, processes)
+        partial_evaluator = partial(with_peak_rss, partial_evaluator)
+        tasks = throttle.limit(tasks)
+
+    # parallelize evaluation of all parameter combinations (results are consumed as they arrive, keeping only the best)
+    best_index, best_fit = None, None
+    for index, result in enumerate(pool.imap(partial_evaluator, tasks)):
+        if throttle:
+            result, worker_peak = result
+            throttle.done(worker_peak)
+
+        if best_fit is None or result > best_fit:
+            best_index, best_fit = index, result
+
+    best_params = {**combinations[best_index], **overrides}
+
     print('Combinations concluded! ')        
 
-    # Sort results based on average fitness (hightest one at the top)
-    ranked_results = sorted(zip(combinations, results), key=lambda x: x[1], reverse=True)
+    if cache is not None:
+        print(f'Fitness cache: {cache.summary()}')
+    if throttle:
+        print(f'Peak memory of a worker: {throttle.worker_peak / 2**20:.1f} MiB | combinations at once: {throttle.allowed}')
 
-    # delete unnecessary variables from memory
-    del results, combinations, points_matrices
-        
-    best_params, best_fit = ranked_results[0][0], ranked_results[0][1]
     print(f'Best Parameters: {best_params}')
     print(f'Average fitness: {best_fit}')
 
-    del ranked_results
-
-    # garbage collection to release unused memory
-    gc.collect()
-
-    # close multiprocessing pool
+    # close multiprocessing pool, waiting for the workers to exit (they flush their run archives when they exit)
     pool.close()
+    pool.join()
 
     return best_params
 
@@ -142,7 +353,8 @@ s_ops = [roulette_wheel_selection,
          tournament_selection, 
          self_adaptative_tournament_selection, 
          linear_ranking_selection,
-         exponential_ranking_selection]
+         exponential_ranking_selection,
+         stochastic_universal_sampling]
 
 ga_parameters = {'initializer' : [generate_population],
                 'pop_size' : [20, 50, 100],
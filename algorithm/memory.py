@@ -0,0 +1,217 @@
+import sys
+import threading
+import tracemalloc
+
+# resource is only available on Unix (peak RSS is not measured elsewhere)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss():
+    ''' Measures the peak resident set size (RSS) of this process.
+
+    Returns:
+        int: Peak RSS in bytes (None if it can not be measured on this platform).
+    '''
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def individual_size(individual):
+    ''' Estimates the memory used by an individual (the areas are shared strings, so they are not counted).
+
+    Args:
+        individual (list): The individual representing a route.
+
+    Returns:
+        int: Size of the individual in bytes.
+    '''
+    fitness = getattr(individual, 'fitness', None)
+
+    return sys.getsizeof(individual) + (sys.getsizeof(fitness) if fitness is not None else 0)
+
+
+def encoded_individual_size(individual):
+    ''' Calculates the memory used by an individual encoded by the offspring workers (see EncodedPopulation): a row of
+        area codes (int8) and a fitness value (float64).
+
+    Args:
+        individual (list): The individual representing a route.
+
+    Returns:
+        int: Size of the encoded individual in bytes.
+    '''
+    return len(individual) + 8
+
+
+def population_bytes_per_individual(population):
+    ''' Estimates the memory used by each individual of a population, in the representation it is stored in.
+
+    Args:
+        population (list or EncodedPopulation): Array of individuals.
+
+    Returns:
+        int: Bytes per individual (0 if the population is empty).
+    '''
+    if not len(population):
+        return 0
+
+    # populations of the offspring workers are stored as arrays of area codes and fitness values
+    codes = getattr(population, 'codes', None)
+    if codes is not None:
+        return codes.itemsize * codes.shape[1] + population.fitnesses.itemsize
+
+    return individual_size(population[0])
+
+
+def budget_pop_size(pop_size, memory_budget, individual, copies=2, encoded=False):
+    ''' Caps a population size so that its individuals fit in a memory budget.
+
+    Args:
+        pop_size (int): Desired population size.
+        memory_budget (int): Memory (in bytes) available for the individuals of a run.
+        individual (list): Sample individual, to estimate the bytes per individual.
+        copies (int): Number of populations alive at the same time (e.g. population and offsprings).
+        encoded (bool): Whether the population is kept encoded by offspring workers (the memory of the worker
+                        processes, which decode the chunks of children they produce, is not counted).
+
+    Returns:
+        int: Largest population size (at most pop_size, at least 2) that fits in the budget.
+    '''
+    # each individual is also referenced from a list (one pointer) and has a fitness value in the fitnesses list
+    decoded = individual_size(individual) + 8 + sys.getsizeof(0.0) + 8
+    if not encoded:
+        return max(2, min(pop_size, memory_budget // (copies * decoded)))
+
+    # with offspring workers, the initial population is the only list of individuals, and it is released once encoded
+    per_individual = max(decoded, copies * encoded_individual_size(individual))
+
+    return max(2, min(pop_size, memory_budget // per_individual))
+
+
+def with_peak_rss(function, *args):
+    ''' Calls a function and measures the peak RSS of the process afterwards (e.g. in a pool worker).
+
+    Args:
+        function (Callable): Function to call.
+        *args: Arguments of the function.
+
+    Returns:
+        tuple: Result of the function and peak RSS in bytes.
+    '''
+    return function(*args), peak_rss()
+
+
+class MemoryMonitor:
+    ''' Opt-in memory instrumentation of a genetic algorithm run.
+
+    After each generation, it takes a tracemalloc snapshot of the memory allocated by Python (current and peak) and
+    records it with the peak RSS of the process and the bytes per individual of the population. Tracing slows the
+    algorithm down, so it is only started when a monitor is created (and stopped by stop()).
+    '''
+    def __init__(self, top=10):
+        '''
+        Args:
+            top (int): Number of lines with the largest allocations kept from the last snapshot.
+        '''
+        self.top = top
+        self.records = []
+        self.top_allocations = []
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start()
+
+    def snapshot(self, generation, population):
+        ''' Records the memory used after a generation.
+
+        Args:
+            generation (int): Generation number.
+            population (list): Array of individuals.
+        '''
+        current, peak = tracemalloc.get_traced_memory()
+        self.records.append({'generation': generation, 'traced': current, 'traced_peak': peak, 'peak_rss': peak_rss(),
+                             'bytes_per_individual': population_bytes_per_individual(population)})
+
+        self.top_allocations = tracemalloc.take_snapshot().statistics('lineno')[:self.top]
+
+    def stop(self):
+        ''' Stops tracing (only if the monitor started it).
+        '''
+        if self.started and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.started = False
+
+    def summary(self):
+        ''' Summarizes the memory used in the run.
+
+        Returns:
+            dict: Peak traced memory, peak RSS and bytes per individual (of the last generation), in bytes.
+        '''
+        if not self.records:
+            return {}
+
+        return {'traced_peak': max(record['traced_peak'] for record in self.records),
+                'peak_rss': self.records[-1]['peak_rss'],
+                'bytes_per_individual': self.records[-1]['bytes_per_individual']}
+
+
+class MemoryThrottle:
+    ''' Limits how many tasks of a pool run at the same time, so that the peak memory of the workers stays within a
+        budget.
+
+    The tasks are taken from a generator (throttle.limit(tasks)) that waits, in the task feeding thread of the pool,
+    until there is room for one more task. The room is recalculated each time a task finishes, from the largest peak
+    RSS reported by a worker so far (budget // peak RSS tasks, between 1 and max_tasks).
+
+    It only delays the submission of tasks: the number of worker processes of the pool is not lowered, so the workers
+    left idle still hold the memory they use between tasks (the interpreter, imported modules and shared datasets).
+    The budget bounds the memory of the running tasks, not the baseline memory of every worker.
+    '''
+    def __init__(self, memory_budget, max_tasks):
+        '''
+        Args:
+            memory_budget (int): Memory (in bytes) available for all the workers.
+            max_tasks (int): Maximum number of tasks at the same time (e.g. number of workers).
+        '''
+        self.memory_budget = memory_budget
+        self.max_tasks = max_tasks
+        self.allowed = max_tasks
+        self.running = 0
+        self.worker_peak = 0
+        self.condition = threading.Condition()
+
+    def limit(self, tasks):
+        ''' Yields the tasks, waiting until each one fits in the budget.
+
+        Args:
+            tasks (iterable): Tasks to run.
+
+        Yields:
+            The next task.
+        '''
+        for task in tasks:
+            with self.condition:
+                while self.running >= self.allowed:
+                    self.condition.wait()
+                self.running += 1
+            yield task
+
+    def done(self, worker_peak):
+        ''' Registers that a task finished.
+
+        Args:
+            worker_peak (int): Peak RSS (in bytes) of the worker that ran it (None if unknown).
+        '''
+        with self.condition:
+            self.running -= 1
+            if worker_peak:
+                self.worker_peak = max(self.worker_peak, worker_peak)
+                self.allowed = max(1, min(self.max_tasks, self.memory_budget // self.worker_peak))
+            self.condition.notify_all()
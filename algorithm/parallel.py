@@ -0,0 +1,214 @@
+import os
+import sys
+import random
+import multiprocessing
+from collections.abc import Sequence
+from functools import partial
+from multiprocessing import shared_memory
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+from initializers.individual import Individual, route_index
+from initializers.population import evaluate_individuals
+
+if __package__:
+    from .algorithm import breed, select_elites
+    from .archive import route_areas
+else:
+    from algorithm import breed, select_elites
+    from archive import route_areas
+
+import numpy as np
+
+# code of each area in the encoded routes (index in route_areas, so that PH is kept apart from KS)
+route_codes = {area: code for code, area in enumerate(route_areas)}
+
+# route_index of each code (PH counted as KS, as in the genotype diversity)
+code_route_index = np.array([route_index[area] for area in route_areas], dtype=np.int8)
+
+
+class EncodedPopulation(Sequence):
+    ''' Read-only population stored as an array of area codes (see route_codes) and an array of fitness values.
+        Individuals are decoded only when they are accessed, so selecting a few parents from a very large population
+        does not decode all of it.
+    '''
+    def __init__(self, codes, fitnesses):
+        '''
+        Args:
+            codes (np.ndarray): Code of each area of each route, of shape (individuals, route length).
+            fitnesses (np.ndarray): Fitness of each route.
+        '''
+        self.codes = codes
+        self.fitnesses = fitnesses
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        return Individual([route_areas[code] for code in self.codes[index].tolist()], float(self.fitnesses[index]))
+
+
+def encode_routes(routes):
+    ''' Encodes routes as an array of area codes.
+
+    Args:
+        routes (list): Individuals representing routes (all of the same length).
+
+    Returns:
+        np.ndarray: Code of each area of each route, of shape (individuals, route length).
+    '''
+    return np.array([[route_codes[area] for area in route] for route in routes], dtype=np.int8)
+
+
+# state of a worker process, set by attach_breeder
+worker_state = {}
+
+def attach_breeder(codes_name, fitnesses_name, shape, points_matrix, fitness_evaluator, crossover_operator, mutator,
+                   ts_size, p_xo, p_m):
+    ''' Attaches a worker process to the shared population (pool initializer).
+
+    Args:
+        codes_name (str): Name of the shared memory block with the encoded population.
+        fitnesses_name (str): Name of the shared memory block with the fitness values.
+        shape (tuple): Shape of the encoded population.
+        (remaining arguments are the same as in genetic_algorithm)
+    '''
+    codes_memory = shared_memory.SharedMemory(name=codes_name)
+    fitnesses_memory = shared_memory.SharedMemory(name=fitnesses_name)
+
+    codes = np.ndarray(shape, dtype=np.int8, buffer=codes_memory.buf)
+    fitnesses = np.ndarray(shape[:1], dtype=np.float64, buffer=fitnesses_memory.buf)
+
+    # the memory blocks are kept referenced for as long as the worker lives
+    worker_state.update(memory=(codes_memory, fitnesses_memory), population=EncodedPopulation(codes, fitnesses),
+                        settings=(points_matrix, crossover_operator, mutator), evaluator=fitness_evaluator,
+                        ts_size=ts_size, p_xo=p_xo, p_m=p_m)
+
+
+def produce_offspring(task):
+    ''' Produces and evaluates a chunk of children of the shared population (runs in a worker process).
+
+    Args:
+        task (tuple): Number of children, seed of the random number generators of the chunk, and selector.
+
+    Returns:
+        Tuple(np.ndarray, np.ndarray): Encoded children and their fitness values.
+    '''
+    n_children, seed, selector = task
+    population = worker_state['population']
+    points_matrix, crossover_operator, mutator = worker_state['settings']
+
+    # the selector is bound to the current generation in the main process, but tasks sent together to a worker share
+    # its objects, so each chunk gets its own parent pool (stochastic universal sampling)
+    if 'pool' in getattr(selector, 'keywords', {}):
+        selector = partial(selector, pool=[])
+
+    # each chunk draws from its own random stream
+    random.seed(seed)
+    np.random.seed(seed)
+
+    children = []
+    while len(children) < n_children:
+        children.extend(breed(population, population.fitnesses, points_matrix, crossover_operator, mutator, selector,
+                              worker_state['ts_size'], worker_state['p_xo'], worker_state['p_m']))
+    children = children[:n_children]
+
+    fitnesses = evaluate_individuals(children, points_matrix, worker_state['evaluator'])
+
+    return encode_routes(children), np.array(fitnesses, dtype=np.float64)
+
+
+class ParallelBreeder:
+    ''' Produces the offspring of a (very large) population in worker processes.
+
+    The population is kept encoded in shared memory, where every worker reads it. Offspring production is split in
+    chunks of chunk_size children, each one produced (selection, crossover, mutation, constraints and evaluation) by a
+    worker with its own random stream. The seeds of the chunks only depend on the seed of the generation, so results
+    do not depend on the number of workers.
+    '''
+    def __init__(self, population, fitnesses, workers, points_matrix, fitness_evaluator, crossover_operator, mutator,
+                 ts_size, p_xo, p_m, chunk_size=1024):
+        '''
+        Args:
+            population (list): Initial individuals (routes) of the population.
+            fitnesses (list): Fitness values of the population.
+            workers (int): Number of worker processes.
+            chunk_size (int): Number of children produced by each task.
+            (remaining arguments are the same as in genetic_algorithm)
+        '''
+        codes = encode_routes(population)
+        self.chunk_size = chunk_size
+
+        self.codes_memory = shared_memory.SharedMemory(create=True, size=codes.nbytes)
+        self.fitnesses_memory = shared_memory.SharedMemory(create=True, size=len(codes) * 8)
+        self.codes = np.ndarray(codes.shape, dtype=np.int8, buffer=self.codes_memory.buf)
+        self.fitnesses = np.ndarray(codes.shape[:1], dtype=np.float64, buffer=self.fitnesses_memory.buf)
+        self.codes[:] = codes
+        self.fitnesses[:] = fitnesses
+        self.population = EncodedPopulation(self.codes, self.fitnesses)
+
+        try:
+            self.pool = multiprocessing.Pool(workers, initializer=attach_breeder,
+                                             initargs=(self.codes_memory.name, self.fitnesses_memory.name, codes.shape,
+                                                       points_matrix, fitness_evaluator, crossover_operator, mutator,
+                                                       ts_size, p_xo, p_m))
+        except BaseException:
+            # the shared memory would outlive the failed breeder
+            self.pool = None
+            self.close()
+            raise
+
+    def generation(self, elite_size, selector, seed):
+        ''' Replaces the population by the next generation (elites and children produced by the workers).
+
+        Args:
+            elite_size (int): Quantity of best individuals to preserve in the next generation.
+            selector (Callable): The selection function for parent individuals.
+            seed (int): Seed of the generation (the seeds of its chunks are derived from it).
+
+        Returns:
+            Tuple(EncodedPopulation, np.ndarray): The new population and its fitness values.
+        '''
+        n_children = len(self.codes) - elite_size
+        sizes = [min(self.chunk_size, n_children - start) for start in range(0, n_children, self.chunk_size)]
+        seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(len(sizes))]
+
+        chunks = self.pool.map(produce_offspring, [(size, chunk_seed, selector) for size, chunk_seed in zip(sizes, seeds)])
+
+        # workers are done reading the population, so it can be overwritten
+        elites = select_elites(self.fitnesses, elite_size)
+        codes = np.concatenate([self.codes[elites]] + [chunk[0] for chunk in chunks])
+        fitnesses = np.concatenate([self.fitnesses[elites]] + [chunk[1] for chunk in chunks])
+        self.codes[:], self.fitnesses[:] = codes, fitnesses
+
+        return self.population, self.fitnesses
+
+    def route_indexes(self):
+        ''' Gets the population as route_index values (PH as KS), e.g. to calculate its genotype diversity.
+
+        Returns:
+            np.ndarray: Index of each area of each route, of shape (individuals, route length).
+        '''
+        return code_route_index[self.codes]
+
+    def close(self):
+        ''' Stops the workers and releases the shared memory (the population can not be used afterwards).
+        '''
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+
+        self.population = self.codes = self.fitnesses = None
+        for memory in (self.codes_memory, self.fitnesses_memory):
+            memory.unlink()
+            try:
+                memory.close()
+            except BufferError:
+                # arrays of the population are still referenced (the memory is released when they are deleted)
+                pass
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import queue
+import itertools
+import multiprocessing
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+if __package__:
+    from .algorithm import genetic_algorithm
+else:
+    from algorithm import genetic_algorithm
+
+
+def portfolio(points_matrix, configurations, budget, processes=None, algorithm=genetic_algorithm, seeds=None,
+              verbosity=False):
+    ''' Runs independent restarts of an algorithm concurrently, with different seeds and configurations, until a
+        wall-clock budget runs out, keeping the best solution found so far (anytime result).
+
+        Restarts cycle through the configurations, each with its own seed, and at most one restart per process runs at
+        a time (a new restart is started whenever one finishes). When the deadline hits, the unfinished restarts are
+        cancelled (their processes are terminated).
+
+    Args:
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+        configurations (list): Parameters of the algorithm for the restarts (without points_matrix and seed).
+        budget (float): Wall-clock time (in seconds) available.
+        processes (int): Number of restarts run at the same time (by default, the number of CPU cores).
+        algorithm (Callable): Function run in each restart, returning the best individual and its fitness.
+        seeds (iterable): Seeds of the restarts (by default, 0, 1, 2, ...).
+        verbosity (bool): Whether to display each improvement of the best solution.
+
+    Returns:
+        Tuple(list, float, dict, list): The best individual found, its fitness value, the parameters (including the
+                                        seed) of the restart that found it, and the trace of the best fitness over time
+                                        (list of (elapsed seconds, best fitness, finished restarts)).
+    '''
+    start_time = time.perf_counter()
+    deadline = start_time + budget
+    processes = processes or multiprocessing.cpu_count()
+    seeds = itertools.count() if seeds is None else iter(seeds)
+    configurations = itertools.cycle(configurations)
+
+    # results of the restarts, put by the callbacks of the pool (run in its result handler thread)
+    finished = queue.SimpleQueue()
+    best_route, best_fit, best_params = None, None, None
+    trace = []
+    restarts = 0
+    running = 0
+
+    pool = multiprocessing.Pool(processes=processes)
+    try:
+        while True:
+            # keep every process busy with one restart
+            while running < processes:
+                seed = next(seeds, None)
+                if seed is None:
+                    break
+                params = dict(next(configurations), seed=seed)
+                pool.apply_async(algorithm, kwds=dict(params, points_matrix=points_matrix),
+                                 callback=lambda result, params=params: finished.put((params, result)),
+                                 error_callback=lambda error, params=params: finished.put((params, error)))
+                running += 1
+
+            remaining = deadline - time.perf_counter()
+            if running == 0 or remaining <= 0:
+                break
+
+            try:
+                params, result = finished.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            running -= 1
+            restarts += 1
+            if isinstance(result, Exception):
+                print(f'Error message: {result}. Parameters with error: {params}')
+                continue
+
+            route, fit = result
+            if best_fit is None or fit > best_fit:
+                best_route, best_fit, best_params = route, fit, params
+                trace.append((time.perf_counter() - start_time, best_fit, restarts))
+                if verbosity:
+                    print(f'{trace[-1][0]:.2f}s | restart {restarts} | best fitness: {best_fit} (seed {params["seed"]})')
+    finally:
+        # cancel the restarts that did not finish before the deadline
+        pool.terminate()
+        pool.join()
+
+    trace.append((time.perf_counter() - start_time, best_fit, restarts))
+
+    return best_route, best_fit, best_params, trace
+
+
+
+if __name__ == '__main__':
+    from initializers.population import generate_population, evaluate_population
+    from initializers.test_data import gains_matrix
+    from operators.crossovers import position_crossover, order_crossover
+    from operators.mutators import displacement_mutation, inversion_mutation
+    from operators.selectors import tournament_selection
+
+    configurations = [{'initializer': generate_population, 'pop_size': 100, 'fitness_evaluator': evaluate_population,
+                       'generations': 20, 'crossover_operator': crossover_operator, 'mutator': mutator,
+                       'selector': tournament_selection, 'ts_size': 5, 'elite_size': 1, 'p_xo': 0.95, 'p_m': 0.2,
+                       'verbosity': False, 'plot': False, 'log': False}
+                      for crossover_operator in [position_crossover, order_crossover]
+                      for mutator in [displacement_mutation, inversion_mutation]]
+
+    route, fit, params, trace = portfolio(gains_matrix, configurations, budget=10, verbosity=True)
+    print(f'Best Route: {route}.')
+    print(f'Geo points gained from this route: {fit} ({trace[-1][2]} restarts).')
@@ -0,0 +1,390 @@
+import os
+import sys
+import asyncio
+import inspect
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+if __package__:
+    from .batch import batch_genetic_algorithm
+else:
+    from batch import batch_genetic_algorithm
+
+import numpy as np
+
+# parameters of batch_genetic_algorithm that are set by the service, not by the requests
+service_params = {'points_matrices', 'verbosity', 'progress'}
+
+
+def check_hashable(params):
+    ''' Checks that the parameters of a request can be hashed, since requests are grouped in batches by their
+        parameters (e.g. a tuple must be given instead of a list).
+
+    Args:
+        params (dict): Parameters of batch_genetic_algorithm.
+    '''
+    for name, value in params.items():
+        try:
+            hash(value)
+        except TypeError:
+            raise TypeError(f'Solve parameter {name} must be hashable, not {type(value).__name__}') from None
+
+
+def solve_batch(batch_id, points_matrices, params, updates):
+    ''' Runs a batch of solve requests (runs in a worker process of the service).
+
+    Args:
+        batch_id (int): Identifier of the batch, sent with its progress.
+        points_matrices (np.ndarray): Geo gains matrix of each request, of shape (requests, len(areas), len(areas)).
+        params (dict): Parameters of batch_genetic_algorithm shared by the requests of the batch.
+        updates (multiprocessing.Queue): Queue where the best fitness of each request is put after each generation.
+
+    Returns:
+        Tuple(list, list): The best route found for each request and its fitness value.
+    '''
+    winners, fits, _ = batch_genetic_algorithm(points_matrices, **params,
+                                               progress=lambda generation, best: updates.put(
+                                                   (batch_id, generation, best.tolist())))
+
+    # marks the end of the progress of the batch
+    updates.put((batch_id, None, None))
+
+    return winners, fits.tolist()
+
+
+class SolveRequest:
+    ''' A solve request submitted to a SolveService.
+
+    Awaiting it gives the best route and its fitness, and progress() streams the best fitness after each generation
+    (if it is not read fast enough, the oldest updates are dropped, so a slow reader gets the latest progress).
+    If its deadline passes before the result is ready, it fails with asyncio.TimeoutError (a batch that is already
+    running still finishes for the other requests in it).
+    '''
+    def __init__(self, points_matrix, params, max_updates=100):
+        '''
+        Args:
+            points_matrix (np.ndarray): Matrix representing the points gained by moving from each area to all the other
+                                        areas.
+            params (dict): Parameters of batch_genetic_algorithm.
+            max_updates (int): Maximum number of progress updates kept until they are read.
+        '''
+        self.points_matrix = points_matrix
+        self.params = params
+        self.result = asyncio.get_running_loop().create_future()
+        self.updates = asyncio.Queue(max_updates)
+        self.timer = None
+
+        # requests with the same matrix shape and parameters can be run in the same batch
+        self.key = (points_matrix.shape, tuple(sorted(params.items(), key=lambda item: item[0])))
+
+    def __await__(self):
+        return self.result.__await__()
+
+    def done(self):
+        return self.result.done()
+
+    def expire_at(self, deadline):
+        ''' Sets the deadline of the request.
+
+        Args:
+            deadline (float): Time of the event loop when the request expires.
+        '''
+        self.timer = asyncio.get_running_loop().call_at(
+            deadline, self.fail, asyncio.TimeoutError('the deadline of the solve request passed'))
+
+    def resolve(self, result):
+        if not self.done():
+            self.result.set_result(result)
+            self.close()
+
+    def fail(self, error):
+        if not self.done():
+            self.result.set_exception(error)
+            self.close()
+
+    def cancel(self):
+        if self.result.cancel():
+            self.close()
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        self.push(None)
+
+    def push(self, update):
+        ''' Queues a progress update (or None, which ends the progress), dropping the oldest one if the queue is full.
+
+        Args:
+            update (tuple): Generation number and best fitness of the request in that generation.
+        '''
+        if self.updates.full():
+            self.updates.get_nowait()
+        self.updates.put_nowait(update)
+
+    async def progress(self):
+        ''' Streams the progress of the run of the request, until it is resolved.
+
+        Yields:
+            Tuple(int, float): Generation number and best fitness of the request in that generation.
+        '''
+        while True:
+            update = await self.updates.get()
+            if update is None:
+                return
+            yield update
+
+
+class SolveService:
+    ''' Asyncio front end that solves route requests without blocking the event loop.
+
+    Requests wait in a bounded queue (submit waits while it is full, which gives backpressure to the callers). A
+    dispatcher takes them only when a worker process is free, and coalesces the requests that arrive within
+    batch_window seconds (up to max_batch) into batched runs of batch_genetic_algorithm, one run per group of requests
+    with the same parameters. While every worker is busy, requests accumulate, so batches get larger under load.
+    The progress of each run is sent by the worker through a manager queue and relayed to each request by one thread.
+
+    Requests are solved by batch_genetic_algorithm, not genetic_algorithm, since it evolves the populations of a whole
+    batch at once. Its parameters differ: the operators are the batched ones (e.g. batch_order_crossover and
+    batch_swap_mutation), parents are always selected by tournament, elitism keeps the elite_size best individuals of
+    each population, children that violate any constraints are replaced by their first parent, and there is no
+    logging, plotting or archive of the runs.
+
+    It is used as an async context manager:
+
+        async with SolveService(workers=4, pop_size=100, generations=50) as service:
+            route, fit = await service.solve(points_matrix, timeout=5.0)
+    '''
+    def __init__(self, workers=None, max_batch=64, batch_window=0.01, max_pending=1024, max_updates=100, **defaults):
+        '''
+        Args:
+            workers (int): Number of worker processes (by default, the number of CPU cores).
+            max_batch (int): Maximum number of requests in a batch.
+            batch_window (float): Time (in seconds) the dispatcher waits for more requests to join a batch.
+            max_pending (int): Maximum number of requests waiting to be dispatched.
+            max_updates (int): Maximum number of progress updates kept for each request until they are read (the
+                               oldest are dropped).
+            **defaults: Default parameters of batch_genetic_algorithm for the requests (e.g. pop_size, generations).
+        '''
+        self.workers = workers or multiprocessing.cpu_count()
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.max_updates = max_updates
+        check_hashable(defaults)
+        self.defaults = defaults
+        self.solve_params = set(inspect.signature(batch_genetic_algorithm).parameters) - service_params
+
+        self.batch_ids = itertools.count()
+        self.batches = {}
+        self.running = set()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        ''' Starts the worker processes, the dispatcher and the progress relay.
+        '''
+        self.pending = asyncio.Queue(self.max_pending)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.manager = multiprocessing.Manager()
+        self.updates = self.manager.Queue()
+        self.executor = ProcessPoolExecutor(self.workers)
+
+        self.dispatcher = asyncio.create_task(self.dispatch())
+        self.relay_task = asyncio.create_task(self.relay())
+
+    async def close(self):
+        ''' Cancels the requests that were not dispatched, waits for the running batches and stops the service.
+        '''
+        self.dispatcher.cancel()
+        await asyncio.gather(self.dispatcher, return_exceptions=True)
+        while not self.pending.empty():
+            self.pending.get_nowait().cancel()
+
+        await asyncio.gather(*self.running, return_exceptions=True)
+
+        self.updates.put(None)
+        await self.relay_task
+        self.executor.shutdown()
+        self.manager.shutdown()
+
+    async def submit(self, points_matrix, timeout=None, block=True, **params):
+        ''' Submits a solve request.
+
+        Args:
+            points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+            timeout (float): Time (in seconds) until the deadline of the request, including the time waiting in the
+                             queue (no deadline by default).
+            block (bool): Whether to wait while the queue is full (otherwise, asyncio.QueueFull is raised).
+            **params: Parameters of batch_genetic_algorithm (the defaults of the service are used for the others).
+
+        Returns:
+            SolveRequest: The request, to await its result or stream its progress.
+        '''
+        unknown = params.keys() - self.solve_params
+        if unknown:
+            raise TypeError(f'Unknown solve parameters: {sorted(unknown)}')
+        check_hashable(params)
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        request = SolveRequest(np.asarray(points_matrix, dtype=np.float64), {**self.defaults, **params},
+                               self.max_updates)
+
+        if not block:
+            self.pending.put_nowait(request)
+        elif deadline is None:
+            await self.pending.put(request)
+        else:
+            await asyncio.wait_for(self.pending.put(request), timeout)
+
+        if deadline is not None:
+            request.expire_at(deadline)
+
+        return request
+
+    async def solve(self, points_matrix, timeout=None, **params):
+        ''' Submits a solve request and waits for its result.
+
+        Args:
+            (same as in submit)
+
+        Returns:
+            Tuple(list, float): The best route found and its fitness value.
+        '''
+        return await (await self.submit(points_matrix, timeout, **params))
+
+    async def dispatch(self):
+        ''' Collects the pending requests in batches and starts their runs (runs until the service is closed).
+        '''
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                # wait for a free worker before collecting a batch, so requests coalesce while all workers are busy
+                await self.slots.acquire()
+                batch = [await self.pending.get()]
+                window_end = loop.time() + self.batch_window
+
+                while len(batch) < self.max_batch:
+                    if not self.pending.empty():
+                        batch.append(self.pending.get_nowait())
+                        continue
+                    remaining = window_end - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.pending.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                # requests that expired or were cancelled while waiting are dropped
+                groups = {}
+                for request in batch:
+                    if not request.done():
+                        groups.setdefault(request.key, []).append(request)
+                batch = []
+
+                if not groups:
+                    self.slots.release()
+                for i, requests in enumerate(groups.values()):
+                    if i > 0:
+                        await self.slots.acquire()
+                    task = asyncio.create_task(self.run_batch(requests))
+                    self.running.add(task)
+                    task.add_done_callback(self.running.discard)
+        except asyncio.CancelledError:
+            for request in batch:
+                request.cancel()
+            raise
+
+    async def run_batch(self, requests):
+        ''' Runs a batch of requests in a worker process and resolves them (frees its worker slot afterwards).
+
+        Args:
+            requests (list): Requests of the batch (with the same parameters).
+        '''
+        loop = asyncio.get_running_loop()
+        batch_id = next(self.batch_ids)
+        flushed = asyncio.Event()
+        self.batches[batch_id] = (requests, flushed)
+
+        try:
+            points_matrices = np.stack([request.points_matrix for request in requests])
+            winners, fits = await loop.run_in_executor(self.executor, solve_batch, batch_id, points_matrices,
+                                                       requests[0].params, self.updates)
+            # wait until the progress of the batch is relayed, so it reaches the requests before their results
+            await flushed.wait()
+        except Exception as error:
+            for request in requests:
+                request.fail(error)
+        else:
+            for request, route, fit in zip(requests, winners, fits):
+                request.resolve((route, fit))
+        finally:
+            del self.batches[batch_id]
+            self.slots.release()
+
+    async def relay(self):
+        ''' Relays the progress sent by the workers to the requests of each batch (until the service is closed).
+        '''
+        loop = asyncio.get_running_loop()
+        while True:
+            # the manager queue blocks, so it is read in a thread
+            update = await loop.run_in_executor(None, self.updates.get)
+            if update is None:
+                return
+
+            batch_id, generation, best = update
+            if batch_id not in self.batches:
+                continue
+
+            requests, flushed = self.batches[batch_id]
+            if generation is None:
+                flushed.set()
+                continue
+            for request, fit in zip(requests, best):
+                if not request.done():
+                    request.push((generation, fit))
+
+
+
+if __name__ == '__main__':
+    import time
+    from initializers.test_data import generate_points_matrices
+
+    async def main(n_requests=200, burst=50):
+        ''' Local client: sends bursts of concurrent requests and streams the progress of the first one.
+        '''
+        points_matrices = generate_points_matrices(n_requests, seed=0)
+
+        async with SolveService(pop_size=100, generations=50) as service:
+            start_time = time.perf_counter()
+            requests = []
+            for start in range(0, n_requests, burst):
+                requests += await asyncio.gather(*(service.submit(matrix, timeout=60.0)
+                                                   for matrix in points_matrices[start:start + burst]))
+                await asyncio.sleep(0.05)
+
+            async for generation, best_fit in requests[0].progress():
+                if generation % 10 == 0:
+                    print(f'Request 0 | generation {generation} | best fitness: {best_fit}')
+
+            results = await asyncio.gather(*requests, return_exceptions=True)
+            elapsed = time.perf_counter() - start_time
+
+        solved = [result for result in results if not isinstance(result, Exception)]
+        print(f'{len(solved)}/{n_requests} requests solved in {elapsed:.2f}s ({len(solved) / elapsed:.1f} solves/s) '
+              f'| {next(service.batch_ids)} batches')
+
+    asyncio.run(main())
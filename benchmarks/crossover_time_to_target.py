@@ -0,0 +1,101 @@
+import os
+import sys
+import itertools
+import statistics
+
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+from algorithm.algorithm import *
+from initializers.individual import batch_check_constraints
+from initializers.population import batch_evaluate_population
+
+import numpy as np
+
+operators = [order_crossover,
+             position_crossover,
+             cycle_crossover,
+             partially_mapped_crossover,
+             modified_partially_mapped_crossover,
+             edge_recombination_crossover]
+
+
+class CountingEvaluator:
+    ''' Fitness evaluator that counts the individuals evaluated after each call (one call per generation).
+    '''
+    def __init__(self):
+        self.counts = []
+        self.total = 0
+
+    def __call__(self, population, points_matrix):
+        self.total += len(population)
+        self.counts.append(self.total)
+
+        return evaluate_population(population, points_matrix)
+
+
+class TraceRecorder:
+    ''' Receives the per-generation trace of a run (used as the log of genetic_algorithm, instead of a RunArchive).
+    '''
+    def record(self, points_matrix, params, seed, best_route, best_fit, best_fits, mean_fits, gen_times, elapsed,
+               diversities=()):
+        self.best_fits, self.gen_times = best_fits, gen_times
+
+
+def optimum(points_matrix):
+    ''' Finds the best fitness of an instance by evaluating every valid route.
+
+    Args:
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+    Returns:
+        float: Best fitness of the instance.
+    '''
+    routes = np.array(list(itertools.permutations(range(1, len(areas)))))[None]
+    fitnesses, skip_ks = batch_evaluate_population(routes, np.asarray(points_matrix, dtype=np.float64)[None])
+
+    return fitnesses[~batch_check_constraints(routes, skip_ks)].max()
+
+
+def time_to_target(crossover_operator, points_matrix, target, seed, pop_size, generations):
+    ''' Runs the genetic algorithm until the last generation and finds when the best fitness reached the target.
+
+    Returns:
+        Tuple(int, float): Individuals evaluated and seconds elapsed until the target was reached (None if it was not).
+    '''
+    evaluator, recorder = CountingEvaluator(), TraceRecorder()
+    genetic_algorithm(generate_population, pop_size, points_matrix, evaluator, generations, crossover_operator,
+                      displacement_mutation, tournament_selection, 5, 1, 0.95, 0.2, False, False, seed, recorder)
+
+    for generation, best_fit in enumerate(recorder.best_fits):
+        if best_fit >= target:
+            return evaluator.counts[generation], sum(recorder.gen_times[:generation + 1])
+
+    return None
+
+
+if __name__ == '__main__':
+    n_instances = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n_seeds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    target_ratio, pop_size, generations = 1.0, 50, 50
+
+    instances = [matrix.tolist() for matrix in generate_points_matrices(n_instances, seed=0)]
+    targets = [target_ratio * optimum(matrix) for matrix in instances]
+
+    print(f'{n_instances} instances x {n_seeds} seeds, pop_size={pop_size}, generations={generations}, '
+          f'target={target_ratio:.0%} of the optimum')
+    for operator in operators:
+        results = [time_to_target(operator, matrix, target, seed, pop_size, generations)
+                   for matrix, target in zip(instances, targets) for seed in range(n_seeds)]
+        reached = [result for result in results if result is not None]
+
+        line = f'{operator.__name__:<38} reached: {len(reached) / len(results):6.1%}'
+        if reached:
+            line += (f' | median evaluations: {statistics.median(result[0] for result in reached):7.0f}'
+                     f' | median time: {statistics.median(result[1] for result in reached) * 1000:6.1f} ms')
+        print(line)
+
+'''
+python benchmarks/crossover_time_to_target.py 5 10
+'''
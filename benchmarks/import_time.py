@@ -0,0 +1,43 @@
+import os
+import statistics
+import subprocess
+import sys
+
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# statements timed in a fresh interpreter, same way a CLI run or a grid search worker imports them
+statements = {'algorithm.algorithm': 'import algorithm.algorithm',
+              'grid_search': "import sys; sys.path.insert(0, 'algorithm'); import grid_search"}
+
+
+def time_import(statement, repeats):
+    ''' Measures the wall-clock time of importing a module in a new python process.
+
+    Args:
+        statement (str): Import statement to execute.
+        repeats (int): Number of fresh interpreters to time.
+
+    Returns:
+        float: Median import time in milliseconds (interpreter start-up excluded).
+    '''
+    timer = ('import time; start = time.perf_counter(); {}; '
+             'print((time.perf_counter() - start) * 1000)')
+    times = []
+
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', timer.format(statement)],
+                                cwd=parentdir, capture_output=True, text=True, check=True)
+        times.append(float(output.stdout.strip().splitlines()[-1]))
+
+    return statistics.median(times)
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    for name, statement in statements.items():
+        print(f'{name}: {time_import(statement, repeats):.1f} ms (median of {repeats} runs)')
+
+'''
+python benchmarks/import_time.py 20
+'''
@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+from collections import OrderedDict
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+from initializers.individual import check_constraints
+from initializers.test_data import instance_hash
+import numpy as np
+
+
+class EliteArchive:
+    ''' Bounded archive of the best routes found for each instance (points matrix), keyed by the instance hash.
+
+    Routes of an instance that was solved before can seed the initial population of a new run on the same instance,
+    or on the most similar archived instance (the one with the nearest points matrix). Instances that have not been
+    used for max_age seconds are evicted, and so are the least recently used ones when there are more than
+    max_instances.
+    '''
+    def __init__(self, max_instances=64, routes_per_instance=10, max_age=3600.0):
+        '''
+        Args:
+            max_instances (int): Maximum number of instances kept in the archive.
+            routes_per_instance (int): Maximum number of routes kept for each instance.
+            max_age (float): Time (in seconds) after which an instance that has not been used is evicted.
+        '''
+        self.max_instances = max_instances
+        self.routes_per_instance = routes_per_instance
+        self.max_age = max_age
+        # instance hash -> (points matrix, sorted list of (fitness, route), time of last use), least recent first
+        self.entries = OrderedDict()
+
+    def evict(self):
+        ''' Removes the stale instances and the least recently used ones beyond max_instances.
+        '''
+        now = time.monotonic()
+        while self.entries:
+            key, (_, _, last_used) = next(iter(self.entries.items()))
+            if len(self.entries) <= self.max_instances and now - last_used <= self.max_age:
+                break
+            del self.entries[key]
+
+    def add(self, points_matrix, routes, fitnesses):
+        ''' Adds the best routes of a population to the archive of its instance.
+
+        Args:
+            points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+            routes (list): Routes of the population.
+            fitnesses (list): Fitness of each route.
+        '''
+        key = instance_hash(points_matrix)
+        matrix, elites, _ = self.entries.pop(key, (np.asarray(points_matrix, dtype=np.float64), [], None))
+
+        # keep only the best distinct routes
+        known = {route for _, route in elites}
+        for fitness, route in sorted(zip(fitnesses, map(tuple, routes)), reverse=True)[:self.routes_per_instance]:
+            if route not in known:
+                known.add(route)
+                elites.append((fitness, route))
+        elites.sort(reverse=True)
+        del elites[self.routes_per_instance:]
+
+        self.entries[key] = (matrix, elites, time.monotonic())
+        self.evict()
+
+    def nearest(self, points_matrix):
+        ''' Finds the archived instance with the nearest points matrix (Frobenius distance).
+
+        Args:
+            points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+        Returns:
+            str: Hash of the nearest instance (None if the archive has no instance of the same shape).
+        '''
+        matrix = np.asarray(points_matrix, dtype=np.float64)
+        keys = [key for key, entry in self.entries.items() if entry[0].shape == matrix.shape]
+        if not keys:
+            return None
+
+        distances = np.linalg.norm(np.stack([self.entries[key][0] for key in keys]) - matrix, axis=(1, 2))
+
+        return keys[int(np.argmin(distances))]
+
+    def routes(self, points_matrix, n):
+        ''' Gets the best archived routes for an instance, or for the nearest archived instance if it is not archived.
+
+        Args:
+            points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+            n (int): Maximum number of routes.
+
+        Returns:
+            list: Up to n feasible routes, best first (KS is skipped or put back according to points_matrix, and routes
+                  that violate the constraints of points_matrix are left out).
+        '''
+        self.evict()
+
+        key = instance_hash(points_matrix)
+        if key not in self.entries:
+            key = self.nearest(points_matrix)
+            if key is None:
+                return []
+
+        matrix, elites, _ = self.entries[key]
+        self.entries.move_to_end(key)
+        self.entries[key] = (matrix, elites, time.monotonic())
+
+        routes = []
+        for _, route in elites:
+            if len(routes) == n:
+                break
+            route = list(route)
+            # whether skipping KS pays off depends on the instance, and the route is checked again once KS is skipped
+            # or put back (e.g. skipping the KS between QG and CS puts CS right after QG)
+            if check_constraints(route, points_matrix) or check_constraints(route, points_matrix):
+                continue
+            routes.append(route)
+
+        return routes
+
+
+# archive shared by all the runs of this process (see default_elite_archive)
+elite_archive = None
+
+def default_elite_archive():
+    ''' Gets the elite archive shared by all the runs of this process (created when first needed).
+
+    Returns:
+        EliteArchive: The archive of this process.
+    '''
+    global elite_archive
+
+    if elite_archive is None:
+        elite_archive = EliteArchive()
+
+    return elite_archive
@@ -1,7 +1,102 @@
 import random
+import numpy as np
 
 areas = ['D', 'FC', 'G','QS', 'QG', 'CS', 'KS','RG', 'DV', 'SN']
 
+# index of each area in the points matrix (PH takes the place of KS, so it is counted as KS)
+area_index = {area: index for index, area in enumerate(areas)}
+route_index = dict(area_index, PH=area_index['KS'])
+
+# KS skip tables of the most recently used points matrices (id -> (matrix, table))
+ks_skip_tables = {}
+
+
+def ks_skip_table(points_matrix):
+    '''Returns the geo gained by skipping KS between each pair of areas: table[a][b] = points_matrix[a][b] -
+       (points_matrix[a][KS] + points_matrix[KS][b]). The table is computed once per points matrix, so deciding
+       whether to replace KS by PH, or evaluating a route with PH, takes a single lookup.
+
+    Args:
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+    Returns:
+        list: Geo gained by skipping KS between area a and area b, for every a and b.
+    '''
+    entry = ks_skip_tables.get(id(points_matrix))
+    # the matrix is kept in the entry, so its id can not be reused by another matrix while the entry exists
+    if entry is not None and entry[0] is points_matrix:
+        return entry[1]
+
+    matrix = np.asarray(points_matrix)
+    ks = area_index['KS']
+    table = (matrix - matrix[:, ks][:, None] - matrix[ks, :][None, :]).tolist()
+
+    if len(ks_skip_tables) >= 64:
+        ks_skip_tables.clear()
+    ks_skip_tables[id(points_matrix)] = (points_matrix, table)
+
+    return table
+
+
+def ks_skip_gain(individual, position, points_matrix):
+    '''Calculates the geo gained by skipping the KS (or PH) at a position of a route.
+
+    Args:
+        individual (list): The individual representing a route.
+        position (int): Position of KS (or PH) in the route.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+    Returns:
+        float: Geo gains of the route without KS minus geo gains of the route with KS.
+    '''
+    # routes always have neighbours on both sides of KS (they start and end in D), except partial routes
+    if 0 < position < len(individual) - 1:
+        return ks_skip_table(points_matrix)[route_index[individual[position - 1]]][route_index[individual[position + 1]]]
+
+    ks = area_index['KS']
+    if position > 0:
+        return -points_matrix[route_index[individual[position - 1]]][ks]
+    if position < len(individual) - 1:
+        return -points_matrix[ks][route_index[individual[position + 1]]]
+    return 0
+
+
+class Individual(list):
+    '''A route (the list of its areas is the genome) that carries its cached fitness, whether it complies with the
+       constraints, and whether its genome changed since its fitness was calculated (dirty).
+       Only dirty individuals need to be evaluated.
+       Individuals used as parents also cache the prefix sums of the geo gains of their edges (see route_edge_sums).
+    '''
+    __slots__ = ('fitness', 'feasible', 'dirty', 'edge_sums')
+
+    def __init__(self, genome=(), fitness=None, feasible=True):
+        '''
+        Args:
+            genome (list): The areas of the route.
+            fitness (float): Fitness of the route, if already known (otherwise the individual is dirty).
+            feasible (bool): Whether the route complies with all constraints.
+        '''
+        super().__init__(genome)
+        self.fitness = fitness
+        self.feasible = feasible
+        self.dirty = fitness is None
+        self.edge_sums = None
+
+    def clone(self):
+        '''Creates a copy of the individual, keeping its cached fitness.
+
+        Returns:
+            Individual: Copy of the individual.
+        '''
+        copy = Individual(self, self.fitness, self.feasible)
+        copy.dirty = self.dirty
+        copy.edge_sums = self.edge_sums
+
+        return copy
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
 def check_constraints(individual, points_matrix):
     '''Checks if individuals comply with all constraints: 
        - Routes that have Distant Village (DV) right after Queens Station (QS) can exclude Kings Station (KS).
@@ -39,20 +134,15 @@ def check_constraints(individual, points_matrix):
     
     # Check if removing KS is better, if DV comes right after QS
     if (individual.index('DV') - individual.index('QS') == 1):
-        # Create copy of individual to compare with and without KS
-        ind_copy = individual.copy()
+        position = individual.index('KS') if 'KS' in individual else individual.index('PH')
+        skip_gain = ks_skip_gain(individual, position, points_matrix)
 
         # Replace KS with a placeholder (PH) in case fitness is better without it
-        if 'KS' in individual:
-            ind_copy[ind_copy.index('KS')] = 'PH'
-            if route_geo_gains(ind_copy, points_matrix) > route_geo_gains(individual, points_matrix):
-                individual[individual.index('KS')] = 'PH'
-
+        if skip_gain > 0:
+            individual[position] = 'PH'
         # Put KS back in (after operators) in case fitness is better with it
-        if 'PH' in individual:
-            ind_copy[ind_copy.index('PH')] = 'KS'
-            if route_geo_gains(ind_copy, points_matrix) > route_geo_gains(individual, points_matrix):
-                individual[individual.index('PH')] = 'KS'
+        elif skip_gain < 0:
+            individual[position] = 'KS'
 
     # put KS back in (after operators) in case DV is not right after QS
     if (individual.index('DV') - individual.index('QS') != 1) and 'PH' in individual :
@@ -93,16 +183,157 @@ def route_geo_gains(individual, points_matrix):
         int: Total geo gained from that route.
              Removes KS from route if DV comes right after QS and geo gains without it are greater.  
     '''
-    id_to_count = individual.copy()
-    if 'PH' in individual:
-        id_to_count.remove('PH')
-    
+    # PH is counted as KS, and the gain of skipping KS is added afterwards
     gains = 0
     
-    for i in range(len(id_to_count) - 1):
-        current_area_index = areas.index(id_to_count[i])
-        next_area_index = areas.index(id_to_count[i + 1])
-        
-        gains += points_matrix[current_area_index][next_area_index]
+    for i in range(len(individual) - 1):
+        gains += points_matrix[route_index[individual[i]]][route_index[individual[i + 1]]]
+
+    if 'PH' in individual:
+        gains += ks_skip_gain(individual, individual.index('PH'), points_matrix)
         
-    return gains
\ No newline at end of file
+    return gains
+
+
+def route_edge_sums(individual, points_matrix):
+    '''Calculates the prefix sums of the geo gains of the edges of a route (PH counted as KS): sums[i] is the geo
+       gained from the start of the route until its area i. They are cached in the individual, for the points matrix
+       they were calculated with (buffered operators overwrite individuals, so they can not be used with them).
+
+    Args:
+        individual (Individual): The individual representing a route.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+    Returns:
+        list: Geo gained until each area of the route.
+    '''
+    if individual.edge_sums is not None and individual.edge_sums[0] is points_matrix:
+        return individual.edge_sums[1]
+
+    sums = [0]
+    for i in range(len(individual) - 1):
+        sums.append(sums[-1] + points_matrix[route_index[individual[i]]][route_index[individual[i + 1]]])
+
+    individual.edge_sums = (points_matrix, sums)
+
+    return sums
+
+
+def inherited_geo_gains(child, segments, points_matrix):
+    '''Calculates the total geo gains of a crossover offspring from the segments it copied intact from its parents:
+       the edges inside the segments are added from the prefix sums of the parents, and only the new edges (between
+       the segments) are looked up in the points matrix. Gives the same result as route_geo_gains.
+
+    Args:
+        child (list): The individual representing the route of the offspring.
+        segments (list): Segments (child_index, parent, start, stop, parent_start) of the offspring, reported by the
+                         crossover (see copied_segments), in the order of their positions.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+    Returns:
+        float: Total geo gained from that route.
+    '''
+    gains = 0
+    position = 0
+
+    for _, parent, start, stop, parent_start in segments:
+        # new edges before the segment
+        for i in range(position, start):
+            gains += points_matrix[route_index[child[i]]][route_index[child[i + 1]]]
+
+        sums = route_edge_sums(parent, points_matrix)
+        gains += sums[parent_start + stop - start - 1] - sums[parent_start]
+        position = stop - 1
+
+    for i in range(position, len(child) - 1):
+        gains += points_matrix[route_index[child[i]]][route_index[child[i + 1]]]
+
+    if 'PH' in child:
+        gains += ks_skip_gain(child, child.index('PH'), points_matrix)
+
+    return gains
+
+
+# BATCHED ROUTES
+# routes of a batch are arrays with the indexes (in areas) of the areas between the two D, one row per individual
+
+def batch_skip_ks(routes, points_matrices):
+    '''Decides, for a batch of routes, in which ones KS is replaced by a placeholder (PH): when DV comes right after QS
+       and the route gains more geo without KS.
+
+    Args:
+        routes (np.ndarray): Routes of shape (instances, individuals, len(areas) - 1).
+        points_matrices (np.ndarray): Geo gains matrix of each instance, of shape (instances, len(areas), len(areas)).
+
+    Returns:
+        Tuple(np.ndarray, np.ndarray): Whether KS is skipped in each route and the geo gained by skipping it.
+    '''
+    instances = np.arange(routes.shape[0])[:, None]
+    full_routes = batch_full_routes(routes)
+
+    # position of each area in each route
+    positions = np.empty_like(full_routes)
+    np.put_along_axis(positions, full_routes[..., :-1], np.arange(full_routes.shape[-1] - 1), axis=-1)
+
+    ks_position = positions[..., area_index['KS']]
+    before_ks = np.take_along_axis(full_routes, ks_position[..., None] - 1, axis=-1)[..., 0]
+    after_ks = np.take_along_axis(full_routes, ks_position[..., None] + 1, axis=-1)[..., 0]
+
+    ks = area_index['KS']
+    skip_gains = (points_matrices[instances, before_ks, after_ks]
+                  - points_matrices[instances, before_ks, ks] - points_matrices[instances, ks, after_ks])
+
+    dv_after_qs = positions[..., area_index['DV']] - positions[..., area_index['QS']] == 1
+
+    return dv_after_qs & (skip_gains > 0), skip_gains
+
+
+def batch_full_routes(routes):
+    '''Adds D to the beginning and end of a batch of routes.
+
+    Args:
+        routes (np.ndarray): Routes of shape (..., len(areas) - 1).
+
+    Returns:
+        np.ndarray: Routes of shape (..., len(areas) + 1).
+    '''
+    d = np.full(routes.shape[:-1] + (1,), area_index['D'], dtype=routes.dtype)
+
+    return np.concatenate([d, routes, d], axis=-1)
+
+
+def batch_check_constraints(routes, skip_ks):
+    '''Checks which routes of a batch violate any constraints (same rules as check_constraints):
+       - Routes cannot have City Storerooms (CS) right after Queens Gardens (QG), even with KS skipped between them.
+       - The Resting Grounds (RG) can only be reached in the last half of the session.
+       (batched routes are permutations, so each area is always visited only once)
+
+    Args:
+        routes (np.ndarray): Routes of shape (instances, individuals, len(areas) - 1).
+        skip_ks (np.ndarray): Whether KS is skipped in each route.
+
+    Returns:
+        np.ndarray: True for the routes that violate constraints, False for the others.
+    '''
+    positions = np.empty_like(routes)
+    np.put_along_axis(positions, routes - 1, np.arange(1, routes.shape[-1] + 1), axis=-1)
+
+    # positions[..., area - 1] is the position of the area in the route (D is at position 0)
+    qg, cs, ks = (positions[..., area_index[area] - 1] for area in ('QG', 'CS', 'KS'))
+    cs_after_qg = (cs - qg == 1) | (skip_ks & (ks - qg == 1) & (cs - ks == 1))
+    rg_first_half = positions[..., area_index['RG'] - 1] <= (routes.shape[-1] + 2) // 2
+
+    return cs_after_qg | rg_first_half
+
+
+def batch_decode_route(route, skip_ks):
+    '''Converts a batched route back into a list of areas (KS is removed if it is skipped).
+
+    Args:
+        route (np.ndarray): Indexes of the areas between the two D.
+        skip_ks (bool): Whether KS is skipped in the route.
+
+    Returns:
+        list: The individual representing a route.
+    '''
+    return ['D'] + [areas[index] for index in route if not (skip_ks and areas[index] == 'KS')] + ['D']
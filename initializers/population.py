@@ -1,12 +1,14 @@
 import os
 import sys
-import inspect
 
-currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+currentdir = os.path.dirname(os.path.abspath(__file__))
 parentdir = os.path.dirname(currentdir)
-sys.path.insert(0, parentdir) 
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
 
 from initializers.individual import *
+from initializers.elite_archive import default_elite_archive
+import numpy as np
 
 def generate_population(pop_size, points_matrix):
     '''Creates a population of individuals (routes).
@@ -22,6 +24,25 @@ def generate_population(pop_size, points_matrix):
     return [generate_individual(points_matrix) for _ in range(pop_size)]
 
 
+def warm_start_population(pop_size, points_matrix, archive=None, fraction=0.5):
+    '''Creates a population seeded with the best routes archived for the same instance (or for the nearest archived
+       instance), completed with random individuals.
+
+    Args:
+        pop_size (int): Desired population size.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+        archive (EliteArchive): Archive of elite routes (by default, the archive of this process).
+        fraction (float): Maximum fraction of the population seeded from the archive.
+
+    Returns:
+        list: An array of individuals that compose the population.
+    '''
+    archive = default_elite_archive() if archive is None else archive
+    seeds = archive.routes(points_matrix, int(pop_size * fraction))
+
+    return seeds + generate_population(pop_size - len(seeds), points_matrix)
+
+
 def evaluate_population(population, points_matrix):
     '''Creates a list of the geo gains of each individual in the population.
 
@@ -35,4 +56,69 @@ def evaluate_population(population, points_matrix):
 
     return [route_geo_gains(individual,points_matrix) for individual in population]
 
-    
\ No newline at end of file
+    
+
+def evaluate_individuals(individuals, points_matrix, fitness_evaluator):
+    '''Evaluates only the individuals whose genome changed since their fitness was calculated (dirty individuals).
+
+    Args:
+        individuals (list): Array of Individual objects.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+        fitness_evaluator (Callable): The function to evaluate the fitness of the population.
+
+    Returns:
+        list: Fitness values corresponding to each individual (cached or newly calculated).
+    '''
+    dirty = [individual for individual in individuals if individual.dirty]
+
+    if dirty:
+        for individual, fitness in zip(dirty, fitness_evaluator(dirty, points_matrix)):
+            individual.fitness = fitness
+            individual.dirty = False
+
+    return [individual.fitness for individual in individuals]
+
+
+def generate_batch_population(instances, pop_size, rng):
+    '''Creates one population of routes for each instance of a batch (only routes that do not violate constraints).
+
+    Args:
+        instances (int): Number of instances.
+        pop_size (int): Desired population size.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: Routes of shape (instances, pop_size, len(areas) - 1).
+    '''
+    genes = np.arange(1, len(areas), dtype=np.int8)
+    routes = rng.permuted(np.broadcast_to(genes, (instances, pop_size, len(genes))), axis=-1)
+
+    # generate only acceptable individuals (the skipped KS can only make a route violate constraints if CS and QG
+    # are next to KS, so the check is done as if KS was never skipped and the rare cases are repaired later)
+    invalid = batch_check_constraints(routes, np.zeros(routes.shape[:-1], dtype=bool))
+    while invalid.any():
+        routes[invalid] = rng.permuted(np.broadcast_to(genes, (invalid.sum(), len(genes))), axis=-1)
+        invalid = batch_check_constraints(routes, np.zeros(routes.shape[:-1], dtype=bool))
+
+    return routes
+
+
+def batch_evaluate_population(routes, points_matrices):
+    '''Calculates the geo gains of every route of a batch of populations.
+
+    Args:
+        routes (np.ndarray): Routes of shape (instances, individuals, len(areas) - 1).
+        points_matrices (np.ndarray): Geo gains matrix of each instance, of shape (instances, len(areas), len(areas)).
+
+    Returns:
+        Tuple(np.ndarray, np.ndarray): Geo gains of each route, and whether KS is skipped in each route.
+    '''
+    instances = np.arange(routes.shape[0])[:, None, None]
+    full_routes = batch_full_routes(routes)
+
+    gains = points_matrices[instances, full_routes[..., :-1], full_routes[..., 1:]].sum(axis=-1)
+
+    # removes KS from the routes where DV comes right after QS and geo gains without it are greater
+    skip_ks, skip_gains = batch_skip_ks(routes, points_matrices)
+
+    return gains + np.where(skip_ks, skip_gains, 0), skip_ks
@@ -1,4 +1,7 @@
 import random
+import hashlib
+import functools
+import numpy as np
 
 # geo points matrix example
 gains_matrix = [[0, 10, 120, -230, 342, 10, 101, 432, -20, 243], 
@@ -26,7 +29,7 @@ def generate_points_matrix():
     data = [[random.randint(-500, 500) for _ in range(10)] for _ in range(10)]
     
     # find all positive values in the matrix (except points of moving from G to FC)
-    positive_values = [value for row in data for value in row if value > 0 and (data.index(row), row.index(value)) != (2, 1)]
+    positive_values = [value for i, row in enumerate(data) for j, value in enumerate(row) if value > 0 and (i, j) != (2, 1)]
     
     # make sure points of moving from G to FC are at least 3.2% less than the minimum positive value
     if positive_values:
@@ -36,4 +39,87 @@ def generate_points_matrix():
         
         data[2][1] = max(data[2][1] - adjustment, 0) 
     
-    return data
\ No newline at end of file
+    return data
+
+
+def generate_points_matrices(n, seed=None, size=10, low=-500, high=500):
+    '''Creates a stack of random geo gains matrices at once (see generate_points_matrix), applying the G to FC
+        adjustment to all of them.
+
+    Args:
+        n (int): Number of matrices (instances).
+        seed (int): Initial value used by random number generator.
+        size (int): Number of areas.
+        low (int): Minimum geo gain.
+        high (int): Maximum geo gain.
+
+    Returns:
+        np.ndarray: Random geo gains matrices, of shape (n, size, size).
+    '''
+    rng = np.random.default_rng(seed)
+    data = rng.integers(low, high, size=(n, size, size), endpoint=True).astype(np.float64)
+
+    # minimum positive value of each matrix (except points of moving from G to FC)
+    positive_values = np.where(data > 0, data, np.inf)
+    positive_values[:, 2, 1] = np.inf
+    min_positive_values = positive_values.min(axis=(1, 2))
+
+    # make sure points of moving from G to FC are at least 3.2% less than the minimum positive value
+    adjusted = np.isfinite(min_positive_values)
+    data[adjusted, 2, 1] = np.maximum(data[adjusted, 2, 1] - 0.032 * min_positive_values[adjusted], 0)
+
+    return data
+
+
+def save_points_matrices(path, points_matrices):
+    '''Saves a stack of geo gains matrices to a .npy dataset.
+
+    Args:
+        path (str): File of the dataset.
+        points_matrices (np.ndarray): Geo gains matrices, of shape (instances, len(areas), len(areas)).
+    '''
+    np.save(path, np.asarray(points_matrices, dtype=np.float64))
+
+
+@functools.lru_cache(maxsize=None)
+def load_points_matrices(path):
+    '''Opens a .npy dataset of geo gains matrices as a read-only memory map. The matrices are read from disk when they
+        are used, and processes that open the same dataset share the pages of the file instead of copying them (each
+        process opens the dataset only once).
+
+    Args:
+        path (str): File of the dataset.
+
+    Returns:
+        np.memmap: Geo gains matrices, of shape (instances, len(areas), len(areas)).
+    '''
+    return np.load(path, mmap_mode='r')
+
+
+def instance_hash(points_matrix):
+    '''Creates a content hash of a geo gains matrix, so that the same instance is always identified by the same key
+        (independently of it being a list or an array, or of its values being integers or floats).
+
+    Args:
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas.
+
+    Returns:
+        str: Hexadecimal hash of the matrix.
+    '''
+    data = np.ascontiguousarray(points_matrix, dtype=np.float64)
+
+    # the shape is part of the hash to tell apart matrices with the same values but different dimensions
+    return hashlib.blake2b(str(data.shape).encode() + data.tobytes(), digest_size=16).hexdigest()
+
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generates a dataset of random geo gains matrices.')
+    parser.add_argument('path', help='.npy file of the dataset')
+    parser.add_argument('n', type=int, help='number of matrices')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    save_points_matrices(args.path, generate_points_matrices(args.n, args.seed))
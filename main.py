@@ -17,7 +17,7 @@ genetic_algorithm(initializer=generate_population,
                   p_xo=0.95,
                   p_m=0.2,
                   verbosity=True,
-                  plot=True,
+                  plot=True,  # rendered to log/ga_progress.png
                   seed=1,
                   log=False)
 
@@ -1,7 +1,17 @@
+import os
+import sys
 import random
+import numpy as np
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+from initializers.individual import area_index
 
 # ORDER CROSSOVER
-def order_xo_one(p1,p2, point_1, point_2):
+def order_xo_one(p1,p2, point_1, point_2, sources=None):
     '''Performs order crossover between two individiuals of the population, taking into account that the first and last
        elements of every individual should always be D.
 
@@ -10,6 +20,8 @@ def order_xo_one(p1,p2, point_1, point_2):
         p2 (list): An individual representing a route.
         point_1 (int): First crossover point.
         point_2 (int): Second crossover point.
+        sources (list): List where the parent and position each area of the child was copied from are added (optional,
+                        see copied_segments).
 
     Returns:
         list: offspring of crossover.
@@ -22,14 +34,21 @@ def order_xo_one(p1,p2, point_1, point_2):
     child[point_1:point_2] = p1_xo[point_1:point_2]
 
     # remaining areas of p1 are placed into the child in the order in which they appear in p2
-    remainig_areas = [area_p for area_p in p2_xo if area_p in (p1_xo[:point_1] + p1_xo[point_2:])]
+    outside = p1_xo[:point_1] + p1_xo[point_2:]
+    outside_areas = set(outside)
+    remainig_areas = [area_p for area_p in p2_xo if area_p in outside_areas]
 
     # in case crossover includes individuals with PH
-    if len(remainig_areas) < len(p1_xo[:point_1] + p1_xo[point_2:]):
+    if len(remainig_areas) < len(outside):
         if 'PH' in p1_xo: 
             remainig_areas.append('PH')
         else:
             remainig_areas.append('KS')
+
+    # areas outside the crossover points come from p2, in order (except a KS or PH appended above)
+    if sources is not None:
+        fill = iter([(p2, j + 1) for j, area_p in enumerate(p2_xo) if area_p in outside_areas])
+        sources.extend((p1, i + 1) if point_1 <= i < point_2 else next(fill, None) for i in range(len(child)))
     
     for i in range(len(child)):
         if child[i] == 'x': 
@@ -38,12 +57,14 @@ def order_xo_one(p1,p2, point_1, point_2):
 
     return ['D'] + child  + ['D']
 
-def order_crossover(p1,p2):
+def order_crossover(p1,p2, segments=None):
     '''Performs order crossover between two individiuals of the population.
 
     Args:
         p1 (list): An individual representing a route.
         p2 (list): An individual representing a route.
+        segments (list): List where the segments of the offsprings copied intact from the parents are added (optional,
+                         see copied_segments).
 
     Returns:
         tuple: offsprings of crossover.
@@ -52,13 +73,17 @@ def order_crossover(p1,p2):
     xo_point_1 = random.randint(0, len(p1) - 4)
     xo_point_2 = random.randint(xo_point_1+1, len(p1) - 3)
 
-    return (order_xo_one(p1, p2, xo_point_1, xo_point_2), 
-            order_xo_one(p2, p1, xo_point_1, xo_point_2))
+    sources = ([], []) if segments is not None else (None, None)
+    offsprings = (order_xo_one(p1, p2, xo_point_1, xo_point_2, sources[0]),
+                  order_xo_one(p2, p1, xo_point_1, xo_point_2, sources[1]))
+    report_segments(segments, sources)
+
+    return offsprings
 
 
 
 # POSITION-BASED CROSSOVER
-def position_xo_one(p1, p2, positions):
+def position_xo_one(p1, p2, positions, sources=None):
     '''Performs position-based crossover between two individiuals of the population, taking into account that the first and last
        elements of every individual should always be D.
 
@@ -66,6 +91,8 @@ def position_xo_one(p1, p2, positions):
         p1 (list): An individual representing a route.
         p2 (list): An individual representing a route.
         positions (list): Crossover points.
+        sources (list): List where the parent and position each area of the child was copied from are added (optional,
+                        see copied_segments).
 
     Returns:
         list: offspring of crossover.
@@ -79,7 +106,8 @@ def position_xo_one(p1, p2, positions):
         child[i] = p1_xo[i]
 
     # remaining areas of p1 are placed into the child in the order in which they appear in p2
-    remainig_areas = [area_p for area_p in p2_xo if (area_p in p1_xo) and (area_p not in child)]
+    p1_areas, child_areas = set(p1_xo), set(child)
+    remainig_areas = [area_p for area_p in p2_xo if (area_p in p1_areas) and (area_p not in child_areas)]
 
     # in case crossover includes individuals with PH
     if len(remainig_areas) < len(p1_xo)-len(positions):
@@ -87,6 +115,12 @@ def position_xo_one(p1, p2, positions):
             remainig_areas.append('PH')
         else:
             remainig_areas.append('KS')
+
+    # areas outside the crossover points come from p2, in order (except a KS or PH appended above)
+    if sources is not None:
+        fill = iter([(p2, j + 1) for j, area_p in enumerate(p2_xo)
+                     if (area_p in p1_areas) and (area_p not in child_areas)])
+        sources.extend((p1, i + 1) if child[i] != 'x' else next(fill, None) for i in range(len(child)))
     
     for i in range(len(child)):
         if child[i] == 'x': 
@@ -95,12 +129,14 @@ def position_xo_one(p1, p2, positions):
 
     return ['D'] + child  + ['D']
 
-def position_crossover(p1, p2):
+def position_crossover(p1, p2, segments=None):
     '''Performs position-based crossover between two individiuals of the population.
 
     Args:
         p1 (list): An individual representing a route.
         p2 (list): An individual representing a route.
+        segments (list): List where the segments of the offsprings copied intact from the parents are added (optional,
+                         see copied_segments).
 
     Returns:
         tuple: offsprings of crossover.
@@ -109,19 +145,25 @@ def position_crossover(p1, p2):
     len_positions = random.randint(1, len(p1) - 3)
     positions_xo = random.sample(range(0, len(p1) - 3), len_positions)
 
-    return (position_xo_one(p1, p2, positions_xo),
-             position_xo_one(p2,p1, positions_xo))
+    sources = ([], []) if segments is not None else (None, None)
+    offsprings = (position_xo_one(p1, p2, positions_xo, sources[0]),
+                  position_xo_one(p2, p1, positions_xo, sources[1]))
+    report_segments(segments, sources)
+
+    return offsprings
 
 
 
 # CYCLE CROSSOVER
-def cycle_xo_one(p1, p2, start_index):
+def cycle_xo_one(p1, p2, start_index, sources=None):
     '''Performs cycle crossover between two individiuals of the population
 
     Args:
         p1 (list): An individual representing a route.
         p2 (list): An individual representing a route.
         start_index (int): Start position for crossover.
+        sources (list): List where the parent and position each area of the child was copied from are added (optional,
+                        see copied_segments).
 
     Returns:
         list: offspring of crossover.
@@ -165,14 +207,19 @@ def cycle_xo_one(p1, p2, start_index):
         if child[i] == 'x':
             child[i] = p2_xo[i]
 
+    if sources is not None:
+        sources.extend(aligned_sources(child, p1, p1_xo, p2, p2_xo))
+
     return ['D'] + child  + ['D']
 
-def cycle_crossover(p1, p2):
+def cycle_crossover(p1, p2, segments=None):
     '''Performs position-based crossover between two individiuals of the population.
 
     Args:
         p1 (list): An individual representing a route.
         p2 (list): An individual representing a route.
+        segments (list): List where the segments of the offsprings copied intact from the parents are added (optional,
+                         see copied_segments).
 
     Returns:
         tuple: offsprings of crossover.
@@ -180,12 +227,16 @@ def cycle_crossover(p1, p2):
     # determine start index
     start = 0  # random.randint(0, size - 1)
 
-    return (cycle_xo_one(p1, p2, start), cycle_xo_one(p2, p1, start))
+    sources = ([], []) if segments is not None else (None, None)
+    offsprings = (cycle_xo_one(p1, p2, start, sources[0]), cycle_xo_one(p2, p1, start, sources[1]))
+    report_segments(segments, sources)
+
+    return offsprings
 
 
 
 # PARTIALLY-MAPPED CROSSOVER
-def partially_mapped_xo_one(p1,p2, point_1, point_2):
+def partially_mapped_xo_one(p1,p2, point_1, point_2, sources=None):
     '''Performs partially-mapped crossover between two individiuals of the population, taking into account that the first and last
        elements of every individual should always be D.
 
@@ -194,6 +245,8 @@ def partially_mapped_xo_one(p1,p2, point_1, point_2):
         p2 (list): An individual representing a route.
         point_1 (int): First crossover point.
         point_2 (int): Second crossover point.
+        sources (list): List where the parent and position each area of the child was copied from are added (optional,
+                        see copied_segments).
 
     Returns:
         list: offspring of crossover.
@@ -226,15 +279,20 @@ def partially_mapped_xo_one(p1,p2, point_1, point_2):
     for i in range(len(child)):
         if child[i] == 'x':
             child[i] = p2_xo[i]
+
+    if sources is not None:
+        sources.extend(aligned_sources(child, p1, p1_xo, p2, p2_xo))
     
     return ['D'] + child  + ['D']
 
-def partially_mapped_crossover(p1,p2):
+def partially_mapped_crossover(p1,p2, segments=None):
     '''Performs partially-mapped crossover between two individiuals of the population.
 
     Args:
         p1 (list): An individual representing a route.
         p2 (list): An individual representing a route.
+        segments (list): List where the segments of the offsprings copied intact from the parents are added (optional,
+                         see copied_segments).
 
     Returns:
         tuple: offsprings of crossover.
@@ -243,13 +301,17 @@ def partially_mapped_crossover(p1,p2):
     xo_point_1 = random.randint(0, len(p1) - 4)
     xo_point_2 = random.randint(xo_point_1+1, len(p1) - 3)
 
-    return (partially_mapped_xo_one(p1, p2, xo_point_1, xo_point_2),
-             partially_mapped_xo_one(p2, p1, xo_point_1, xo_point_2))
+    sources = ([], []) if segments is not None else (None, None)
+    offsprings = (partially_mapped_xo_one(p1, p2, xo_point_1, xo_point_2, sources[0]),
+                  partially_mapped_xo_one(p2, p1, xo_point_1, xo_point_2, sources[1]))
+    report_segments(segments, sources)
+
+    return offsprings
     
 
 
 # MODIFIED PARTIALLY-MAPPED CROSSOVER 
-def modified_pm_xo_one(p1,p2, point_1, point_2):
+def modified_pm_xo_one(p1,p2, point_1, point_2, sources=None):
     '''Performs modified partially-mapped crossover between two individiuals of the population, taking into account that
        the first and last elements of every individual should always be D.
 
@@ -258,6 +320,8 @@ def modified_pm_xo_one(p1,p2, point_1, point_2):
         p2 (list): An individual representing a route.
         point_1 (int): First crossover point.
         point_2 (int): Second crossover point.
+        sources (list): List where the parent and position each area of the child was copied from are added (optional,
+                        see copied_segments).
 
     Returns:
         list: offspring of crossover.
@@ -289,14 +353,19 @@ def modified_pm_xo_one(p1,p2, point_1, point_2):
             child[i] = remaining_areas[0]
             remaining_areas.remove(remaining_areas[0])
 
+    if sources is not None:
+        sources.extend(aligned_sources(child, p1, p1_xo, p2, p2_xo))
+
     return ['D'] + child  + ['D']
 
-def modified_partially_mapped_crossover(p1,p2):
+def modified_partially_mapped_crossover(p1,p2, segments=None):
     '''Performs modified partially-mapped crossover between two individiuals of the population.
 
     Args:
         p1 (list): An individual representing a route.
         p2 (list): An individual representing a route.
+        segments (list): List where the segments of the offsprings copied intact from the parents are added (optional,
+                         see copied_segments).
 
     Returns:
         tuple: offsprings of crossover.
@@ -305,5 +374,583 @@ def modified_partially_mapped_crossover(p1,p2):
     xo_point_1 = random.randint(0, len(p1) - 4)
     xo_point_2 = random.randint(xo_point_1+1, len(p1) - 3)
 
-    return (modified_pm_xo_one(p1, p2, xo_point_1, xo_point_2),
-             modified_pm_xo_one(p2, p1, xo_point_1, xo_point_2))
\ No newline at end of file
+    sources = ([], []) if segments is not None else (None, None)
+    offsprings = (modified_pm_xo_one(p1, p2, xo_point_1, xo_point_2, sources[0]),
+                  modified_pm_xo_one(p2, p1, xo_point_1, xo_point_2, sources[1]))
+    report_segments(segments, sources)
+
+    return offsprings
+
+
+
+# COPIED SEGMENTS (fitness of the offsprings from the edges inherited from their parents)
+def aligned_sources(child, p1, p1_xo, p2, p2_xo):
+    '''Finds the parent each area of a child was copied from, for crossovers that keep the positions of the areas.
+
+    Args:
+        child (list): Areas of the child between the two D.
+        p1 (list): An individual representing a route.
+        p1_xo (list): Areas of p1 between the two D (PH may be replaced by KS).
+        p2 (list): An individual representing a route.
+        p2_xo (list): Areas of p2 between the two D (PH may be replaced by KS).
+
+    Returns:
+        list: Parent and position (in the parent) of each area of the child, or None for areas found in no parent.
+    '''
+    return [(p1, i + 1) if area == p1_xo[i] else (p2, i + 1) if area == p2_xo[i] else None
+            for i, area in enumerate(child)]
+
+def copied_segments(child_index, sources):
+    '''Groups the areas of a child copied from consecutive positions of the same parent into segments. The edges
+       inside a segment are edges of the parent, so their geo gains are already known (see inherited_geo_gains).
+
+    Args:
+        child_index (int): Index of the child among the offsprings of the crossover.
+        sources (list): Parent and position (in the parent) each area of the child between the two D was copied from
+                        (None for areas that were not copied).
+
+    Returns:
+        list: Segments (child_index, parent, start, stop, parent_start), in which child[start:stop] has the areas of
+              parent[parent_start:parent_start + stop - start] (with at least one edge).
+    '''
+    # the D at both ends of the child extend the segments that start or end the parents
+    length = len(sources) + 2
+    sources = [None] + sources + [None]
+    if sources[1] is not None and sources[1][1] == 1:
+        sources[0] = (sources[1][0], 0)
+    if sources[-2] is not None and sources[-2][1] == length - 2:
+        sources[-1] = (sources[-2][0], length - 1)
+
+    segments = []
+    start = 0
+    for position in range(1, length + 1):
+        first, source = sources[start], sources[position] if position < length else None
+        # the segment goes on while the areas come from the next positions of the same parent
+        if first is not None and source is not None and source[0] is first[0] \
+                and source[1] == first[1] + position - start:
+            continue
+        if first is not None and position - start > 1:
+            segments.append((child_index, first[0], start, position, first[1]))
+        start = position
+
+    return segments
+
+def report_segments(segments, sources):
+    '''Adds the segments copied from the parents to the segments list of a crossover (if it was given).
+
+    Args:
+        segments (list): List of segments of the crossover (None if they were not requested).
+        sources (tuple): Sources of each offspring (see copied_segments).
+    '''
+    if segments is not None:
+        for child_index, child_sources in enumerate(sources):
+            segments.extend(copied_segments(child_index, child_sources))
+
+# crossover operators that report the segments copied from the parents (the genetic algorithm passes a segments list)
+segment_crossovers = {order_crossover, position_crossover, cycle_crossover, partially_mapped_crossover,
+                      modified_partially_mapped_crossover}
+
+
+# EDGE RECOMBINATION CROSSOVER
+def edge_tables(p1, p2):
+    '''Builds the directed adjacency tables of two parents (PH is read as KS). The edges into the final D are left out:
+       every child ends in D, so that edge only depends on which area the child visits last, which the successors of
+       the other areas decide (its gain is inherited only when the last area of a parent also ends up last).
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+
+    Returns:
+        tuple: successors of each area in any of the parents (dict of sets), and the edges shared by both parents.
+    '''
+    successors = {}
+    edges = []
+
+    for parent in (p1, p2):
+        route = ['KS' if area == 'PH' else area for area in parent[:-1]]
+        edges.append(set(zip(route, route[1:])))
+        for area in route:
+            successors.setdefault(area, set())
+        for area, successor in zip(route, route[1:]):
+            successors[area].add(successor)
+
+    return successors, edges[0] & edges[1]
+
+def edge_recombination_xo_one(successors, shared, first, length, points_matrix=None):
+    '''Builds a child from the adjacency tables of two parents, starting at D and following their edges: after each
+       area comes one of its successors in the parents (edges of both parents first, then the successor with fewest
+       successors left, then the one with the highest geo gain, with random ties). When the current area has no
+       successor left, any remaining area is chosen the same way. Areas that would violate the CS and RG constraints
+       are only chosen when there is no other option.
+
+    Args:
+        successors (dict): Successors of each area in the parents.
+        shared (set): Edges shared by both parents.
+        first (str): First area of the child (after D).
+        length (int): Length of the routes (including both D).
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas
+                              (used to break ties, optional).
+
+    Returns:
+        list: offspring of crossover.
+    '''
+    child = ['D', first]
+    remaining = set(successors) - {'D', first}
+
+    while remaining:
+        current = child[-1]
+
+        # CS can not come right after QG, and RG can only be reached in the last half of the route
+        allowed = [area for area in remaining if not (area == 'CS' and current == 'QG')
+                   and not (area == 'RG' and len(child) <= length // 2)]
+        candidates = [area for area in allowed if area in successors[current]] or allowed or list(remaining)
+
+        def rank(area):
+            gain = points_matrix[area_index[current]][area_index[area]] if points_matrix is not None else 0
+            return ((current, area) in shared, -len(successors[area] & remaining), gain)
+
+        best = max(map(rank, candidates))
+        area = random.choice([area for area in candidates if rank(area) == best])
+
+        child.append(area)
+        remaining.remove(area)
+
+    return child + ['D']
+
+def edge_recombination_crossover(p1, p2, points_matrix=None):
+    '''Performs directed edge recombination crossover between two individiuals of the population: children are built
+       mostly from the edges (pairs of consecutive areas) of the parents, since the geo gained by a route is the sum of
+       the gains of its edges (except the edge into the final D, see edge_tables). There is no buffered version.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        points_matrix (list): Matrix representing the points gained by moving from each area to all the other areas
+                              (used to break ties, optional).
+
+    Returns:
+        tuple: offsprings of crossover.
+    '''
+    # adjacency tables are built once for both children
+    successors, shared = edge_tables(p1, p2)
+
+    # each child starts with the first area of one of the parents
+    first_1, first_2 = ('KS' if area == 'PH' else area for area in (p1[1], p2[1]))
+
+    return (edge_recombination_xo_one(successors, shared, first_1, len(p1), points_matrix),
+            edge_recombination_xo_one(successors, shared, first_2, len(p1), points_matrix))
+
+# crossover operators that break ties with the points matrix (the genetic algorithm passes it as a keyword argument)
+matrix_crossovers = {edge_recombination_crossover}
+
+
+# BATCHED ORDER CROSSOVER
+def batch_order_crossover(parents_1, parents_2, rng):
+    '''Performs order crossover between every pair of rows of two batches of parents (batched routes do not include D).
+
+    Args:
+        parents_1 (np.ndarray): Routes of shape (pairs, route length).
+        parents_2 (np.ndarray): Routes of shape (pairs, route length).
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        tuple: offsprings of crossover (two arrays with the same shape as the parents).
+    '''
+    pairs, length = parents_1.shape
+
+    # create two random crossover points for each pair (same bounds as order_crossover)
+    point_1 = rng.integers(0, length - 1, pairs)
+    point_2 = rng.integers(point_1 + 1, length)
+
+    positions = np.arange(length)
+    segment = (positions >= point_1[:, None]) & (positions < point_2[:, None])
+
+    return (batch_order_xo_one(parents_1, parents_2, segment),
+            batch_order_xo_one(parents_2, parents_1, segment))
+
+def batch_order_xo_one(parents_1, parents_2, segment):
+    '''Performs order crossover for a batch of pairs of parents, given the crossover segment of each pair.
+
+    Args:
+        parents_1 (np.ndarray): Routes of shape (pairs, route length).
+        parents_2 (np.ndarray): Routes of shape (pairs, route length).
+        segment (np.ndarray): Positions inherited from parents_1, for each pair.
+
+    Returns:
+        np.ndarray: offspring of crossover.
+    '''
+    # child inherits the segment of p1
+    children = parents_1.copy()
+
+    # which areas are in the segment of p1 (indexed by area)
+    in_segment = np.zeros((parents_1.shape[0], parents_1.max() + 1), dtype=bool)
+    np.put_along_axis(in_segment, parents_1, segment, axis=1)
+
+    # remaining areas of p1 are placed into the child in the order in which they appear in p2: the areas of p2 that
+    # are not in the segment and the positions outside the segment are both moved to the front, keeping their order
+    remaining_areas = np.take_along_axis(parents_2, np.argsort(np.take_along_axis(in_segment, parents_2, axis=1),
+                                                               axis=1, kind='stable'), axis=1)
+    free_positions = np.argsort(segment, axis=1, kind='stable')
+
+    # only the first (route length - segment length) areas and positions are used
+    used = np.arange(parents_1.shape[1]) < (~segment).sum(axis=1)[:, None]
+    values = np.where(used, remaining_areas, np.take_along_axis(children, free_positions, axis=1))
+    np.put_along_axis(children, free_positions, values, axis=1)
+
+    return children
+
+
+
+# BATCHED EDGE RECOMBINATION CROSSOVER
+def batch_successor_table(parents):
+    '''Builds the directed adjacency table of a batch of parents (batched routes do not include D).
+
+    Args:
+        parents (np.ndarray): Routes of shape (pairs, route length).
+
+    Returns:
+        np.ndarray: Successor of each area (D included) in each route, of shape (pairs, route length + 1), with -1 for
+                    the last area (whose successor is the final D).
+    '''
+    pairs, length = parents.shape
+    full_routes = np.concatenate([np.zeros((pairs, 1), dtype=parents.dtype), parents], axis=1)
+
+    table = np.full((pairs, length + 1), -1, dtype=parents.dtype)
+    np.put_along_axis(table, full_routes[:, :-1], full_routes[:, 1:], axis=1)
+
+    return table
+
+def batch_edge_recombination_crossover(parents_1, parents_2, rng, points_matrices=None):
+    '''Performs directed edge recombination crossover between every pair of rows of two batches of parents (same
+       choices as edge_recombination_crossover, one position at a time for all pairs).
+
+    Args:
+        parents_1 (np.ndarray): Routes of shape (pairs, route length).
+        parents_2 (np.ndarray): Routes of shape (pairs, route length).
+        rng (np.random.Generator): Random number generator.
+        points_matrices (np.ndarray): Geo gains matrix of each pair, of shape (pairs, len(areas), len(areas)) (used to
+                                      break ties, optional).
+
+    Returns:
+        tuple: offsprings of crossover (two arrays with the same shape as the parents).
+    '''
+    # adjacency tables are built once for both children
+    successors_1, successors_2 = batch_successor_table(parents_1), batch_successor_table(parents_2)
+
+    # each child starts with the first area of one of the parents
+    return (batch_edge_recombination_xo_one(successors_1, successors_2, parents_1[:, 0], rng, points_matrices),
+            batch_edge_recombination_xo_one(successors_1, successors_2, parents_2[:, 0], rng, points_matrices))
+
+def batch_edge_recombination_xo_one(successors_1, successors_2, first, rng, points_matrices=None):
+    '''Builds a child for each pair of parents from their adjacency tables (see edge_recombination_xo_one).
+
+    Args:
+        successors_1 (np.ndarray): Successor of each area in the first parents (see batch_successor_table).
+        successors_2 (np.ndarray): Successor of each area in the second parents.
+        first (np.ndarray): First area of each child.
+        rng (np.random.Generator): Random number generator.
+        points_matrices (np.ndarray): Geo gains matrix of each pair (used to break ties, optional).
+
+    Returns:
+        np.ndarray: offspring of crossover.
+    '''
+    pairs, n_areas = successors_1.shape
+    length = n_areas - 1
+    rows = np.arange(pairs)
+    all_areas = np.arange(n_areas)
+
+    children = np.empty((pairs, length), dtype=successors_1.dtype)
+    children[:, 0] = current = first
+    visited = np.zeros((pairs, n_areas), dtype=bool)
+    visited[:, 0] = True
+    visited[rows, first] = True
+
+    for k in range(1, length):
+        next_1, next_2 = successors_1[rows, current][:, None], successors_2[rows, current][:, None]
+
+        # number of successors left of each area (the successors of both parents may be the same area)
+        left_1 = (successors_1 >= 0) & ~np.take_along_axis(visited, np.maximum(successors_1, 0), axis=1)
+        left_2 = ((successors_2 >= 0) & (successors_2 != successors_1)
+                  & ~np.take_along_axis(visited, np.maximum(successors_2, 0), axis=1))
+
+        # CS can not come right after QG, and RG can only be reached in the last half of the route (position k + 1)
+        allowed = ~((all_areas == area_index['CS']) & (current == area_index['QG'])[:, None])
+        if k + 1 <= (length + 2) // 2:
+            allowed &= all_areas != area_index['RG']
+
+        successor = (all_areas == next_1) | (all_areas == next_2)
+        shared = (all_areas == next_1) & (next_1 == next_2)
+        gains = points_matrices[rows, current] if points_matrices is not None else 0
+
+        # allowed successors first, then edges of both parents, fewest successors left and highest gain
+        scores = (4e8 * allowed + 2e8 * successor + 1e8 * shared - 1e7 * (left_1 + left_2) + gains).astype(np.float64)
+        scores[visited] = -np.inf
+
+        # random choice among the best areas
+        ties = scores == scores.max(axis=1, keepdims=True)
+        current = np.argmax(ties * rng.random(scores.shape), axis=1)
+
+        children[:, k] = current
+        visited[rows, current] = True
+
+    return children
+
+# batched crossover operators that break ties with the points matrices (batch_genetic_algorithm passes them)
+matrix_crossovers.add(batch_edge_recombination_crossover)
+
+
+# BUFFERED CROSSOVERS
+# Alternative protocol that writes the offspring into caller-provided routes (of the same length as the parents) instead
+# of creating new lists. Parents are only read, and PH is read as KS (check_constraints decides again whether KS should
+# be replaced by PH in the children).
+
+def find_area(route, area):
+    '''Finds the position of an area in a route, taking into account that KS may have been replaced by PH.
+
+    Args:
+        route (list): An individual representing a route.
+        area (str): Area to find.
+
+    Returns:
+        int: Position of the area in the route.
+    '''
+    if area == 'KS' and 'KS' not in route:
+        return route.index('PH')
+
+    return route.index(area)
+
+def clear_route(child):
+    '''Prepares a route buffer for a crossover: D at the ends and None in every other position.
+
+    Args:
+        child (list): Route buffer.
+    '''
+    last = len(child) - 1
+    child[0] = child[last] = 'D'
+    for i in range(1, last):
+        child[i] = None
+
+def order_xo_one_into(p1, p2, child, point_1, point_2):
+    '''Performs order crossover between two individuals, writing the offspring into child.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        child (list): Route buffer where the offspring is written.
+        point_1 (int): First crossover point.
+        point_2 (int): Second crossover point.
+    '''
+    clear_route(child)
+
+    # child inherits order of p1 between crossover points
+    for i in range(point_1 + 1, point_2 + 1):
+        child[i] = 'KS' if p1[i] == 'PH' else p1[i]
+
+    # remaining areas are placed into the child in the order in which they appear in p2
+    position = 1
+    for j in range(1, len(p2) - 1):
+        area = 'KS' if p2[j] == 'PH' else p2[j]
+        if area not in child:
+            if position == point_1 + 1:
+                position = point_2 + 1
+            child[position] = area
+            position += 1
+
+def order_crossover_into(p1, p2, c1, c2):
+    '''Performs order crossover between two individuals of the population, writing the offsprings into c1 and c2.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        c1 (list): Route buffer for the first offspring.
+        c2 (list): Route buffer for the second offspring.
+    '''
+    # create two random crossover points
+    xo_point_1 = random.randint(0, len(p1) - 4)
+    xo_point_2 = random.randint(xo_point_1+1, len(p1) - 3)
+
+    order_xo_one_into(p1, p2, c1, xo_point_1, xo_point_2)
+    order_xo_one_into(p2, p1, c2, xo_point_1, xo_point_2)
+
+def position_xo_one_into(p1, p2, child, positions):
+    '''Performs position-based crossover between two individuals, writing the offspring into child.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        child (list): Route buffer where the offspring is written.
+        positions (list): Crossover points.
+    '''
+    clear_route(child)
+
+    # child inherits areas of p1 in the position of crossover points
+    for i in positions:
+        child[i + 1] = 'KS' if p1[i + 1] == 'PH' else p1[i + 1]
+
+    # remaining areas are placed into the child in the order in which they appear in p2
+    position = 1
+    for j in range(1, len(p2) - 1):
+        area = 'KS' if p2[j] == 'PH' else p2[j]
+        if area not in child:
+            while child[position] is not None:
+                position += 1
+            child[position] = area
+
+def position_crossover_into(p1, p2, c1, c2):
+    '''Performs position-based crossover between two individuals of the population, writing the offsprings into c1 and
+       c2.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        c1 (list): Route buffer for the first offspring.
+        c2 (list): Route buffer for the second offspring.
+    '''
+    # Create random crossover poinst
+    len_positions = random.randint(1, len(p1) - 3)
+    positions_xo = random.sample(range(0, len(p1) - 3), len_positions)
+
+    position_xo_one_into(p1, p2, c1, positions_xo)
+    position_xo_one_into(p2, p1, c2, positions_xo)
+
+def cycle_xo_one_into(p1, p2, child, start_index):
+    '''Performs cycle crossover between two individuals, writing the offspring into child.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        child (list): Route buffer where the offspring is written.
+        start_index (int): Start position for crossover.
+    '''
+    clear_route(child)
+
+    # follow the cycle that starts in start_index, taking the areas from p1
+    index = start_index + 1
+    while child[index] is None:
+        child[index] = 'KS' if p1[index] == 'PH' else p1[index]
+        index = find_area(p1, 'KS' if p2[index] == 'PH' else p2[index])
+
+    # fill the remaining positions with the corresponding areas of p2
+    for i in range(1, len(child) - 1):
+        if child[i] is None:
+            child[i] = 'KS' if p2[i] == 'PH' else p2[i]
+
+def cycle_crossover_into(p1, p2, c1, c2):
+    '''Performs cycle crossover between two individuals of the population, writing the offsprings into c1 and c2.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        c1 (list): Route buffer for the first offspring.
+        c2 (list): Route buffer for the second offspring.
+    '''
+    cycle_xo_one_into(p1, p2, c1, 0)
+    cycle_xo_one_into(p2, p1, c2, 0)
+
+def partially_mapped_xo_one_into(p1, p2, child, point_1, point_2):
+    '''Performs partially-mapped crossover between two individuals, writing the offspring into child.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        child (list): Route buffer where the offspring is written.
+        point_1 (int): First crossover point.
+        point_2 (int): Second crossover point.
+    '''
+    clear_route(child)
+
+    # child inherits order of p1 between crossover points
+    for i in range(point_1 + 1, point_2 + 1):
+        child[i] = 'KS' if p1[i] == 'PH' else p1[i]
+
+    # map the elements from parent2 to the child
+    for i in range(point_1 + 1, point_2 + 1):
+        area = 'KS' if p2[i] == 'PH' else p2[i]
+        if area not in child:
+            index = find_area(p2, child[i])
+            while child[index] is not None:
+                index = find_area(p2, 'KS' if p1[index] == 'PH' else p1[index])
+            child[index] = area
+
+    # copy the remaining elements from parent2 to the child
+    for i in range(1, len(child) - 1):
+        if child[i] is None:
+            child[i] = 'KS' if p2[i] == 'PH' else p2[i]
+
+def partially_mapped_crossover_into(p1, p2, c1, c2):
+    '''Performs partially-mapped crossover between two individuals of the population, writing the offsprings into c1
+       and c2.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        c1 (list): Route buffer for the first offspring.
+        c2 (list): Route buffer for the second offspring.
+    '''
+    # create two random crossover points
+    xo_point_1 = random.randint(0, len(p1) - 4)
+    xo_point_2 = random.randint(xo_point_1+1, len(p1) - 3)
+
+    partially_mapped_xo_one_into(p1, p2, c1, xo_point_1, xo_point_2)
+    partially_mapped_xo_one_into(p2, p1, c2, xo_point_1, xo_point_2)
+
+def modified_pm_xo_one_into(p1, p2, child, point_1, point_2):
+    '''Performs modified partially-mapped crossover between two individuals, writing the offspring into child.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        child (list): Route buffer where the offspring is written.
+        point_1 (int): First crossover point.
+        point_2 (int): Second crossover point.
+    '''
+    clear_route(child)
+
+    # child inherits order of p1 between crossover points
+    for i in range(point_1 + 1, point_2 + 1):
+        child[i] = 'KS' if p1[i] == 'PH' else p1[i]
+
+    # corresponding positions in p2 pass areas to child, if they have not already been inherited from parent 1
+    for i in range(1, len(child) - 1):
+        area = 'KS' if p2[i] == 'PH' else p2[i]
+        if child[i] is None and area not in child:
+            child[i] = area
+
+    # remaining areas of p1 are randomly placed in the child (each one goes to a random empty position)
+    empty = child.count(None)
+    for j in range(1, len(p1) - 1):
+        area = 'KS' if p1[j] == 'PH' else p1[j]
+        if area not in child:
+            target = random.randint(1, empty)
+            for i in range(1, len(child) - 1):
+                if child[i] is None:
+                    target -= 1
+                    if target == 0:
+                        child[i] = area
+                        break
+            empty -= 1
+
+def modified_partially_mapped_crossover_into(p1, p2, c1, c2):
+    '''Performs modified partially-mapped crossover between two individuals of the population, writing the offsprings
+       into c1 and c2.
+
+    Args:
+        p1 (list): An individual representing a route.
+        p2 (list): An individual representing a route.
+        c1 (list): Route buffer for the first offspring.
+        c2 (list): Route buffer for the second offspring.
+    '''
+    # create two random crossover points
+    xo_point_1 = random.randint(0, len(p1) - 4)
+    xo_point_2 = random.randint(xo_point_1+1, len(p1) - 3)
+
+    modified_pm_xo_one_into(p1, p2, c1, xo_point_1, xo_point_2)
+    modified_pm_xo_one_into(p2, p1, c2, xo_point_1, xo_point_2)
+
+# buffered version of each crossover operator
+buffered_crossovers = {order_crossover: order_crossover_into,
+                       position_crossover: position_crossover_into,
+                       cycle_crossover: cycle_crossover_into,
+                       partially_mapped_crossover: partially_mapped_crossover_into,
+                       modified_partially_mapped_crossover: modified_partially_mapped_crossover_into}
@@ -0,0 +1,175 @@
+import os
+import sys
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+if parentdir not in sys.path:
+    sys.path.insert(0, parentdir)
+
+from initializers.individual import areas, route_index
+import numpy as np
+
+
+class GenotypeDiversity:
+    ''' Keeps track of the genotype diversity of a population, updated incrementally as individuals are added,
+        removed or replaced (O(route length) per individual).
+
+    It counts how many individuals use each directed edge (edge_counts[a][b]) and how many have each area in each
+    position (position_counts[position][area]), along with the sum of the squares of these counts. The average
+    pairwise similarity of the population follows from these sums, without comparing individuals:
+       - edge diversity: 1 - average fraction of edges shared by two different individuals.
+       - position diversity: 1 - average fraction of positions where two different individuals have the same area
+         (the average Hamming distance between two individuals, normalized by the route length).
+    PH is counted as KS.
+    '''
+    def __init__(self, population=()):
+        '''
+        Args:
+            population (list): Initial individuals (routes) of the population.
+        '''
+        self.reset(population)
+
+    def reset(self, population=()):
+        ''' Starts tracking a new population.
+
+        Args:
+            population (list): Individuals (routes) of the population.
+        '''
+        self.size = 0
+        self.route_length = None
+        self.edge_counts = [[0] * len(areas) for _ in areas]
+        self.position_counts = []
+        self.edge_squares = 0
+        self.position_squares = 0
+
+        for individual in population:
+            self.add(individual)
+
+    def reset_array(self, routes):
+        ''' Starts tracking a population given as an array, counting all its edges and positions at once (for very
+            large populations).
+
+        Args:
+            routes (np.ndarray): Index of each area of each route (route_index, PH as KS), of shape
+                                 (individuals, route length).
+        '''
+        routes = np.asarray(routes, dtype=np.int64)
+        self.size, self.route_length = routes.shape
+        n_areas = len(areas)
+
+        edge_counts = np.bincount((routes[:, :-1] * n_areas + routes[:, 1:]).ravel(),
+                                  minlength=n_areas * n_areas).reshape(n_areas, n_areas)
+        position_counts = np.bincount((np.arange(self.route_length) * n_areas + routes).ravel(),
+                                      minlength=self.route_length * n_areas).reshape(self.route_length, n_areas)
+
+        self.edge_counts, self.position_counts = edge_counts.tolist(), position_counts.tolist()
+        self.edge_squares, self.position_squares = int((edge_counts ** 2).sum()), int((position_counts ** 2).sum())
+
+    def update(self, individual, delta):
+        ''' Adds (delta = 1) or removes (delta = -1) the edges and positions of an individual from the counts.
+
+        Args:
+            individual (list): The individual representing a route.
+            delta (int): 1 to add the individual, -1 to remove it.
+        '''
+        if self.route_length is None:
+            self.route_length = len(individual)
+            self.position_counts = [[0] * len(areas) for _ in range(len(individual))]
+
+        # each count c that changes to c + delta changes the sum of squares by 2 * c * delta + 1
+        previous = None
+        for position, area in enumerate(individual):
+            current = route_index[area]
+
+            counts = self.position_counts[position]
+            self.position_squares += 2 * counts[current] * delta + 1
+            counts[current] += delta
+
+            if previous is not None:
+                counts = self.edge_counts[previous]
+                self.edge_squares += 2 * counts[current] * delta + 1
+                counts[current] += delta
+
+            previous = current
+
+        self.size += delta
+
+    def add(self, individual):
+        ''' Adds an individual to the population.
+
+        Args:
+            individual (list): The individual representing a route.
+        '''
+        self.update(individual, 1)
+
+    def remove(self, individual):
+        ''' Removes an individual from the population.
+
+        Args:
+            individual (list): The individual representing a route.
+        '''
+        self.update(individual, -1)
+
+    def replace(self, old, new):
+        ''' Replaces an individual of the population by another one.
+
+        Args:
+            old (list): The individual leaving the population.
+            new (list): The individual joining the population.
+        '''
+        self.update(old, -1)
+        self.update(new, 1)
+
+    def replace_population(self, previous, current):
+        ''' Replaces a population by the next one, updating the counts only with the individuals that left or joined
+            it (the individuals carried over, e.g. the elites, are not counted again).
+
+        Args:
+            previous (list): Individuals of the population (each one a different object).
+            current (list): Individuals of the next population; the ones carried over must be the same (unchanged)
+                            objects as in previous.
+        '''
+        previous_ids = {id(individual) for individual in previous}
+        current_ids = {id(individual) for individual in current}
+
+        for individual in previous:
+            if id(individual) not in current_ids:
+                self.remove(individual)
+        for individual in current:
+            if id(individual) not in previous_ids:
+                self.add(individual)
+
+    def edge_diversity(self):
+        ''' Calculates the edge diversity of the population.
+
+        Returns:
+            float: 1 - average fraction of edges shared by two different individuals (between 0 and 1).
+        '''
+        if self.size < 2:
+            return 0.0
+
+        edges = self.route_length - 1
+        shared = (self.edge_squares - self.size * edges) / (self.size * (self.size - 1) * edges)
+
+        return 1 - shared
+
+    def position_diversity(self):
+        ''' Calculates the position-based diversity of the population.
+
+        Returns:
+            float: Average normalized Hamming distance between two different individuals (between 0 and 1).
+        '''
+        if self.size < 2:
+            return 0.0
+
+        same = (self.position_squares - self.size * self.route_length) / (self.size * (self.size - 1) * self.route_length)
+
+        return 1 - same
+
+    def value(self):
+        ''' Calculates the genotype diversity of the population (edge diversity, since fitness is a sum over edges).
+
+        Returns:
+            float: Genotype diversity of the population (between 0 and 1).
+        '''
+        return self.edge_diversity()
@@ -1,4 +1,5 @@
 import random
+import numpy as np
 
 # SWAP MUTATION 
 def swap_mutation(individual, mutation_rate):
@@ -124,4 +125,221 @@ def inversion_mutation(individual, mutation_rate):
 
         mutated = individual[:start_position] + inverted_segment + individual[end_position:]
 
-    return mutated
\ No newline at end of file
+    return mutated
+
+# BATCHED SWAP MUTATION
+def batch_swap_mutation(routes, mutation_rate, rng):
+    '''Performs swap mutation on a batch of routes (batched routes do not include D, so every position can be swapped).
+
+    Args:
+        routes (np.ndarray): Routes of shape (individuals, route length).
+        mutation_rate (float): Probability at which each individual suffers mutation.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: Mutated routes.
+    '''
+    mutated = routes.copy()
+    rows = np.flatnonzero(rng.random(len(routes)) < mutation_rate)
+
+    # two different random positions for each mutated route
+    first = rng.integers(0, routes.shape[1], len(rows))
+    second = (first + rng.integers(1, routes.shape[1], len(rows))) % routes.shape[1]
+
+    mutated[rows, first], mutated[rows, second] = routes[rows, second], routes[rows, first]
+
+    return mutated
+
+
+# BATCHED INVERSION MUTATION
+def batch_inversion_mutation(routes, mutation_rate, rng):
+    '''Performs inversion mutation on a batch of routes (batched routes do not include D).
+
+    Args:
+        routes (np.ndarray): Routes of shape (individuals, route length).
+        mutation_rate (float): Probability at which each individual suffers mutation.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: Mutated routes.
+    '''
+    length = routes.shape[1]
+    mutate = rng.random(len(routes)) < mutation_rate
+
+    # segments of at least 2 areas (same bounds as inversion_mutation)
+    start = rng.integers(0, length - 2, len(routes))
+    end = rng.integers(start + 2, length + 1)
+
+    positions = np.arange(length)
+    inverted = (positions >= start[:, None]) & (positions < end[:, None]) & mutate[:, None]
+    order = np.where(inverted, start[:, None] + end[:, None] - 1 - positions, positions)
+
+    return np.take_along_axis(routes, order, axis=1)
+
+
+# IN-PLACE MUTATORS
+# Alternative protocol that mutates the route it receives (the caller owns it) instead of returning a mutated copy.
+# Each mutator returns whether the route was changed.
+
+# positions and areas lists reused by scramble_mutation_inplace
+scramble_positions = []
+scramble_areas = []
+
+def swap_mutation_inplace(individual, mutation_rate):
+    '''Performs swap mutation on an individual in place. First and last elements are never modified.
+
+    Args:
+        individual (list): An individual representing a route.
+        mutation_rate (float): Probability at which individual suffers mutation.
+
+    Returns:
+        bool: Whether the individual was mutated.
+    '''
+    if random.random() >= mutation_rate:
+        return False
+
+    # two different random positions
+    first = random.randint(1, len(individual) - 2)
+    second = random.randint(1, len(individual) - 3)
+    if second >= first:
+        second += 1
+
+    individual[first], individual[second] = individual[second], individual[first]
+
+    return True
+
+def scramble_mutation_inplace(individual, mutation_rate):
+    '''Performs scramble mutation on an individual in place. First and last elements are never modified.
+
+    Args:
+        individual (list): An individual representing a route.
+        mutation_rate (float): Probability at which individual suffers mutation.
+
+    Returns:
+        bool: Whether the individual was mutated.
+    '''
+    if random.random() >= mutation_rate:
+        return False
+
+    # choose a random set of positions (the first size positions of a partial Fisher-Yates shuffle, in a reused list)
+    size = random.randint(1, len(individual) - 2)
+    positions = scramble_positions
+    positions.clear()
+    positions.extend(range(1, len(individual) - 1))
+    for i in range(size):
+        j = random.randint(i, len(positions) - 1)
+        positions[i], positions[j] = positions[j], positions[i]
+
+    # keep the areas of the chosen positions, to tell whether the shuffle changed them
+    areas_before = scramble_areas
+    areas_before.clear()
+    for i in range(size):
+        areas_before.append(individual[positions[i]])
+
+    # shuffle the areas of the chosen positions among them
+    for i in range(size - 1, 0, -1):
+        j = random.randint(0, i)
+        individual[positions[i]], individual[positions[j]] = individual[positions[j]], individual[positions[i]]
+
+    # (a single position, or a shuffle that keeps the order, leaves the individual unchanged)
+    for i in range(size):
+        if individual[positions[i]] != areas_before[i]:
+            return True
+
+    return False
+
+def reverse_range(individual, start, end):
+    '''Reverses the areas of an individual between two positions, in place.
+
+    Args:
+        individual (list): An individual representing a route.
+        start (int): First position to reverse.
+        end (int): Position after the last one to reverse.
+    '''
+    end -= 1
+    while start < end:
+        individual[start], individual[end] = individual[end], individual[start]
+        start += 1
+        end -= 1
+
+def displacement_mutation_inplace(individual, mutation_rate):
+    '''Performs displacement mutation on an individual in place. First and last elements are never modified.
+
+    Args:
+        individual (list): An individual representing a route.
+        mutation_rate (float): Probability at which individual suffers mutation.
+
+    Returns:
+        bool: Whether the individual was mutated.
+    '''
+    if random.random() >= mutation_rate:
+        return False
+
+    # segment size should be at least 1 but not larger than half the individual
+    segment_size = random.randint(1, len(individual) // 2)
+
+    # displacement segment and position should not include the first or last position on the individual
+    start_position = random.randint(1, len(individual) - 1 - segment_size)
+    end_position = start_position + segment_size
+    displacement_position = random.randint(1, len(individual) - 1 - segment_size)
+
+    # moving the segment is a rotation of the range between its old and new positions (done with three reversals)
+    if displacement_position < start_position:
+        first, middle, last = displacement_position, start_position, end_position
+    else:
+        first, middle, last = start_position, end_position, displacement_position + segment_size
+
+    reverse_range(individual, first, middle)
+    reverse_range(individual, middle, last)
+    reverse_range(individual, first, last)
+
+    return displacement_position != start_position
+
+def thrors_mutation_inplace(individual, mutation_rate):
+    '''Performs thrors mutation on an individual in place. First and last elements are never modified.
+
+    Args:
+        individual (list): An individual representing a route.
+        mutation_rate (float): Probability at which individual suffers mutation.
+
+    Returns:
+        bool: Whether the individual was mutated.
+    '''
+    if random.random() >= mutation_rate:
+        return False
+
+    first_i = random.randint(1, len(individual)-4)
+    second_i = random.randint(first_i + 1, len(individual)-3)
+    third_i = random.randint(second_i + 1, len(individual)-2)
+
+    # first becomes second, second becomes third, and third becomes first
+    individual[first_i], individual[second_i], individual[third_i] = individual[third_i], individual[first_i], individual[second_i]
+
+    return True
+
+def inversion_mutation_inplace(individual, mutation_rate):
+    '''Performs inversion mutation on an individual in place. First and last elements are never modified.
+
+    Args:
+        individual (list): An individual representing a route.
+        mutation_rate (float): Probability at which individual suffers mutation.
+
+    Returns:
+        bool: Whether the individual was mutated.
+    '''
+    if random.random() >= mutation_rate:
+        return False
+
+    start_position = random.randint(1, len(individual) - 4)
+    end_position = random.randint(start_position + 2, len(individual) - 2)
+
+    reverse_range(individual, start_position, end_position)
+
+    return True
+
+# in-place version of each mutator
+inplace_mutators = {swap_mutation: swap_mutation_inplace,
+                    scramble_mutation: scramble_mutation_inplace,
+                    displacement_mutation: displacement_mutation_inplace,
+                    thrors_mutation: thrors_mutation_inplace,
+                    inversion_mutation: inversion_mutation_inplace}
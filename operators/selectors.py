@@ -13,11 +13,8 @@ def roulette_wheel_selection(population, fitnesses):
     Returns:
         tuple: Selected individuals.
     '''    
-    # calculate selection probabilities for each individual (based on fitness values)
-    probabilities = [fit / sum(fitnesses) for fit in fitnesses]
-
-    # select two parents 
-    parents = random.choices(population, probabilities, k=2)
+    # select two parents, with probabilities proportional to their fitness values (O(population) per call)
+    parents = random.choices(population, fitnesses, k=2)
 
     return tuple(parents)
 
@@ -80,17 +77,22 @@ def calculate_diversity(fitnesses):
     
     return sum(abs(fit - avg_fit) for fit in fitnesses) / (len(fitnesses) * fit_range/ 2)
 
-def self_adaptative_tournament_selection(population, fitnesses):
+def self_adaptative_tournament_selection(population, fitnesses, diversity=None):
     '''Performs self-adaptative tournament selection to choose parents from a population.
     Args:
         population (list): Array of individuals.
         fitnesses (list): Fitness values of the population.
+        diversity (float): Diversity of the population, between 0 and 1 (calculated once per generation by
+                           genetic_algorithm). By default, it is calculated from the fitness values at each call.
 
     Returns:
         tuple: Selected individuals.
     '''   
+    if diversity is None:
+        diversity = calculate_diversity(fitnesses)
+
     # calculate tournament size based in population diversity
-    adapt_t_size = int(2 + (len(population) -2) * calculate_diversity(fitnesses))
+    adapt_t_size = min(len(population), int(2 + (len(population) -2) * diversity))
 
     return (ts_inner(population, fitnesses, adapt_t_size), 
             ts_inner(population, fitnesses, adapt_t_size))
@@ -154,44 +156,87 @@ def exponential_ranking_selection(population, fitnesses, k=1.0):
 
 
 
+# STOCHASTIC UNIVERSAL SAMPLING
+def sus_sample(population, fitnesses, n, shift=None):
+    ''' Selects n individuals from a population with stochastic universal sampling: n equally spaced pointers, with a
+        single random offset, are swept once over the cumulative weights of the population (vectorized, so it also
+        suits the fitness arrays of very large populations).
 
+    Args:
+        population (list): Array of individuals.
+        fitnesses (list): Fitness values of the population.
+        n (int): Number of individuals to select.
+        shift (float): Value added to every fitness to obtain the selection weights (negative weights are treated as 0).
+                       By default, fitnesses are only shifted when there are negative values, by subtracting the
+                       minimum fitness.
 
+    Returns:
+        list: Selected individuals (in random order).
+    '''
+    fitnesses = np.asarray(fitnesses, dtype=np.float64)
+    if shift is None:
+        shift = -fitnesses.min() if fitnesses.min() < 0 else 0
 
+    cumulative_weights = np.cumsum(np.maximum(fitnesses + shift, 0))
+    total_weight = cumulative_weights[-1]
 
+    # all individuals are equally likely to be selected when no individual has a positive weight
+    if total_weight <= 0:
+        cumulative_weights = np.arange(1, len(population) + 1, dtype=np.float64)
+        total_weight = len(population)
 
+    # one sweep over the cumulative weights: each pointer selects the first individual with a cumulative weight above it
+    step = total_weight / n
+    pointers = random.uniform(0, step) + step * np.arange(n)
+    indexes = np.minimum(np.searchsorted(cumulative_weights, pointers, side='right'), len(population) - 1)
+    selected = [population[index] for index in indexes.tolist()]
 
+    # the sweep selects individuals in population order, so they are shuffled to be paired randomly
+    random.shuffle(selected)
 
+    return selected
 
+def stochastic_universal_sampling(population, fitnesses, shift=None, pool=None, pool_size=None):
+    ''' Performs stochastic universal sampling to choose parents from a population. Parents are selected in a single
+        sweep (pool_size parents at a time) into a pool, and handed out two at a time; a new sweep is made when the pool
+        runs out. The pool belongs to the caller, which gives a new one whenever the population changes
+        (genetic_algorithm gives one per generation, and one per batch of children in steady-state mode).
 
+    Args:
+        population (list): Array of individuals.
+        fitnesses (list): Fitness values of the population.
+        shift (float): Value added to every fitness to obtain the selection weights (see sus_sample).
+        pool (list): Parents selected from this population that were not handed out yet, updated in place (without a
+                     pool, only two parents are selected).
+        pool_size (int): Number of parents selected in each sweep (by default, len(population)).
 
+    Returns:
+        tuple: Selected individuals.
+    '''
+    if pool is None:
+        return tuple(sus_sample(population, fitnesses, 2, shift))
 
+    if len(pool) < 2:
+        pool.extend(sus_sample(population, fitnesses, max(pool_size or len(population), 2), shift))
 
+    return pool.pop(), pool.pop()
 
 
-def calculate_probabilities(fitnesses, maximization):
-    if maximization:
-        probabilities = [fit / sum(fitnesses) for fit in fitnesses]
-    else:
-        probabilities = [1 - (fit / sum(fitnesses)) for fit in fitnesses]
-    return probabilities
+# BATCHED TOURNAMENT SELECTION
+def batch_tournament_selection(fitnesses, n, rng, t_size=5):
+    ''' Performs tournament selection on a batch of populations.
 
+    Args:
+        fitnesses (np.ndarray): Fitness values of shape (instances, individuals).
+        n (int): Number of individuals to select from each population.
+        rng (np.random.Generator): Random number generator.
+        t_size (int): Tournament size.
 
-def stochastic_universal_sampling(maximization):
-    def inner_fps(population, fitnesses):
-        probabilities = calculate_probabilities(fitnesses, maximization)
-        total_fitness = sum(fitnesses)
-        pointer_distance = total_fitness / len(population)
-        start = random.uniform(0, pointer_distance)
-        pointers = [start + i * pointer_distance for i in range(len(population))]
-        selected = []
-        current_fitness = 0
-        index = 0
-        for pointer in pointers:
-            while current_fitness < pointer:
-                current_fitness += probabilities[index]
-                index = (index + 1) % len(population)
-            selected.append(population[index])
-        selected_probabilities = [probabilities[population.index(individual)] for individual in selected]
-        return random.choices(selected, selected_probabilities)[0]
-    return inner_fps
+    Returns:
+        np.ndarray: Indexes of the selected individuals, of shape (instances, n).
+    '''
+    # individuals participating in each tournament (sampled with replacement, unlike ts_inner)
+    t_indexes = rng.integers(0, fitnesses.shape[1], (fitnesses.shape[0], n, t_size))
+    t_fitnesses = np.take_along_axis(fitnesses[:, None, :], t_indexes, axis=2)
 
+    return np.take_along_axis(t_indexes, t_fitnesses.argmax(axis=2)[..., None], axis=2)[..., 0]
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# the modules of algorithm/ are imported the way its scripts and grid search workers import them (from algorithm/)
+rootdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (rootdir, os.path.join(rootdir, 'algorithm')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
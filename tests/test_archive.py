@@ -0,0 +1,70 @@
+import numpy as np
+
+from archive import RunArchive, decode_route, encode_route
+from initializers.test_data import gains_matrix, generate_points_matrix, instance_hash
+from operators.selectors import tournament_selection
+
+route = ['D', 'QG', 'SN', 'PH', 'DV', 'FC', 'CS', 'G', 'QS', 'RG', 'D']
+
+
+def record_run(archive, points_matrix, seed, best_fit, **params):
+    archive.record(points_matrix, {'selector': tournament_selection, 'pop_size': 50, **params}, seed, route, best_fit,
+                   best_fits=[best_fit - 10, best_fit], mean_fits=[best_fit - 50, best_fit - 20],
+                   gen_times=[0.01, 0.02], elapsed=0.03, diversities=[0.9, 0.8])
+
+
+def test_route_encoding_round_trip():
+    assert decode_route(encode_route(route)) == route
+    assert decode_route(np.array([0, 3, -1, -1])) == ['D', 'QS']
+
+
+def test_runs_round_trip(tmp_path):
+    archive = RunArchive(str(tmp_path), buffer_size=2)
+    other_matrix = generate_points_matrix()
+
+    record_run(archive, gains_matrix, 0, 3000)
+    record_run(archive, gains_matrix, 1, 3500)
+    # the buffer was full, so the first chunk is already on disk
+    assert len(list((tmp_path / 'runs').glob('*.npz'))) == 1
+
+    record_run(archive, other_matrix, None, 2500, p_m=0.2)
+
+    # a new archive on the same path reads what the first one wrote (load flushes the buffer)
+    archive.flush()
+    columns = RunArchive(str(tmp_path)).load()
+
+    assert columns['seed'].tolist() == [0, 1, -1]
+    assert columns['best_fit'].tolist() == [3000, 3500, 2500]
+    assert [decode_route(codes) for codes in columns['best_route']] == [route] * 3
+    assert columns['param_selector'].tolist() == ['tournament_selection'] * 3
+    assert columns['best_fits'][2].tolist() == [2490, 2500]
+    assert columns['diversities'][0].tolist() == [0.9, 0.8]
+    np.testing.assert_array_equal(archive.instance(columns['instance'][2]), np.asarray(other_matrix, dtype=float))
+
+
+def test_parameters_missing_from_a_chunk(tmp_path):
+    archive = RunArchive(str(tmp_path))
+    record_run(archive, gains_matrix, 0, 3000)
+    archive.flush()
+    record_run(archive, gains_matrix, 1, 3100, p_m=0.2)
+
+    # p_m is a number in one chunk and missing (an empty string) in the other
+    columns = archive.load()
+    assert columns['param_p_m'].tolist() == ['', '0.2']
+
+
+def test_query_and_best_runs(tmp_path):
+    archive = RunArchive(str(tmp_path))
+    other_matrix = generate_points_matrix()
+    record_run(archive, gains_matrix, 0, 3000)
+    record_run(archive, gains_matrix, 1, 3500, pop_size=100)
+    record_run(archive, other_matrix, 2, 4000)
+
+    assert archive.query(points_matrix=gains_matrix)['seed'].tolist() == [0, 1]
+    assert archive.query(instance=instance_hash(other_matrix))['seed'].tolist() == [2]
+    assert archive.query(selector=tournament_selection, pop_size=50)['seed'].tolist() == [0, 2]
+    assert archive.query(min_fitness=3200)['seed'].tolist() == [1, 2]
+    assert len(archive.query(unknown_param=1)['seed']) == 0
+
+    best_fit, best_route, seed, _ = archive.best_runs(k=1, points_matrix=gains_matrix)[0]
+    assert (best_fit, best_route, seed) == (3500, route, 1)
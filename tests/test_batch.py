@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from batch import batch_genetic_algorithm
+from initializers.individual import (areas, batch_check_constraints, batch_decode_route, batch_full_routes,
+                                     batch_skip_ks, check_constraints, route_geo_gains)
+from initializers.population import batch_evaluate_population, generate_batch_population
+from initializers.test_data import generate_points_matrices
+from operators.crossovers import batch_edge_recombination_crossover, batch_order_crossover
+from operators.mutators import batch_inversion_mutation, batch_swap_mutation
+
+
+def listed_route(route):
+    return [areas[index] for index in batch_full_routes(route)]
+
+
+def test_batch_fitness_matches_route_geo_gains():
+    points_matrices = generate_points_matrices(8, seed=0)
+    routes = generate_batch_population(8, 50, np.random.default_rng(0))
+    gains, skip_ks = batch_evaluate_population(routes, points_matrices)
+
+    for instance, points_matrix in enumerate(points_matrices.tolist()):
+        for individual, route in enumerate(routes[instance]):
+            # check_constraints replaces KS by PH when the route gains more geo without it
+            individual_route = listed_route(route)
+            assert not check_constraints(individual_route, points_matrix)
+            assert ('PH' in individual_route) == skip_ks[instance, individual]
+            assert gains[instance, individual] == route_geo_gains(individual_route, points_matrix)
+
+            # decoded routes leave the skipped KS out, which gains the same geo
+            decoded = batch_decode_route(route, skip_ks[instance, individual])
+            assert gains[instance, individual] == route_geo_gains(decoded, points_matrix)
+
+
+def test_batch_constraints_match_check_constraints():
+    points_matrices = generate_points_matrices(4, seed=1)
+    rng = np.random.default_rng(1)
+    routes = rng.permuted(np.broadcast_to(np.arange(1, len(areas), dtype=np.int8), (4, 200, len(areas) - 1)), axis=-1)
+    skip_ks, _ = batch_skip_ks(routes, points_matrices)
+    invalid = batch_check_constraints(routes, skip_ks)
+
+    for instance, points_matrix in enumerate(points_matrices.tolist()):
+        for individual, route in enumerate(routes[instance]):
+            assert invalid[instance, individual] == bool(check_constraints(listed_route(route), points_matrix))
+
+
+@pytest.mark.parametrize('crossover_operator, mutator', [(batch_order_crossover, batch_swap_mutation),
+                                                          (batch_edge_recombination_crossover, batch_inversion_mutation)])
+def test_batch_genetic_algorithm(crossover_operator, mutator):
+    points_matrices = generate_points_matrices(5, seed=2)
+    progress = []
+    winners, fits, best_fits = batch_genetic_algorithm(points_matrices, pop_size=30, generations=10,
+                                                       crossover_operator=crossover_operator, mutator=mutator, seed=2,
+                                                       progress=lambda generation, best: progress.append(generation))
+
+    assert best_fits.shape == (11, 5)
+    assert progress == list(range(11))
+    for winner, fit, points_matrix in zip(winners, fits, points_matrices.tolist()):
+        # every area is visited once (KS can be skipped)
+        assert winner[0] == winner[-1] == 'D'
+        assert len(set(winner[1:-1])) == len(winner) - 2 and set(winner[1:-1]) | {'KS'} == set(areas[1:])
+        assert fit == route_geo_gains(winner, points_matrix)
+    # with elitism, the best fitness of each instance never decreases
+    assert (np.diff(best_fits, axis=0) >= 0).all()
+    np.testing.assert_array_equal(fits, best_fits[-1])
+
+    # runs with the same seed are identical
+    assert batch_genetic_algorithm(points_matrices, 30, 10, crossover_operator, mutator, seed=2)[0] == winners
@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from algorithm import genetic_algorithm
+from initializers.population import evaluate_population, generate_population
+from initializers.test_data import gains_matrix, generate_points_matrix
+from operators.crossovers import (buffered_crossovers, cycle_crossover, modified_partially_mapped_crossover,
+                                  order_crossover, partially_mapped_crossover, position_crossover)
+from operators.mutators import displacement_mutation, inplace_mutators, inversion_mutation, thrors_mutation
+from operators.selectors import tournament_selection
+
+
+def population(size, seed=0, with_ph=None):
+    ''' Random routes (only the ones with or without PH, if with_ph is given).
+    '''
+    random.seed(seed)
+    routes = []
+    while len(routes) < size:
+        routes += [route for route in generate_population(size, gains_matrix)
+                   if with_ph is None or ('PH' in route) == with_ph]
+
+    return routes[:size]
+
+
+def is_route(route):
+    ''' Whether a route starts and ends in D and visits every other area once (PH standing for KS).
+    '''
+    areas = ['KS' if area == 'PH' else area for area in route[1:-1]]
+
+    return route[0] == route[-1] == 'D' and sorted(areas) == ['CS', 'DV', 'FC', 'G', 'KS', 'QG', 'QS', 'RG', 'SN']
+
+
+def crossover_into(crossover_operator, p1, p2):
+    c1, c2 = ['D'] * len(p1), ['D'] * len(p2)
+    buffered_crossovers[crossover_operator](p1, p2, c1, c2)
+
+    return c1, c2
+
+
+@pytest.mark.parametrize('crossover_operator', sorted(buffered_crossovers, key=lambda operator: operator.__name__))
+def test_buffered_crossovers_produce_routes(crossover_operator):
+    parents = population(200)
+    for i in range(0, len(parents), 2):
+        p1, p2 = parents[i], parents[i + 1]
+        p1_before, p2_before = list(p1), list(p2)
+        c1, c2 = crossover_into(crossover_operator, p1, p2)
+
+        assert is_route(c1) and is_route(c2)
+        # parents are only read
+        assert (p1, p2) == (p1_before, p2_before)
+
+
+@pytest.mark.parametrize('crossover_operator', [order_crossover, position_crossover, cycle_crossover,
+                                                partially_mapped_crossover])
+def test_buffered_crossovers_match_unbuffered(crossover_operator):
+    # with the same random numbers, both versions produce the same children (PH is read as KS by the buffered ones)
+    parents = population(200, with_ph=False)
+    for i in range(0, len(parents), 2):
+        p1, p2 = parents[i], parents[i + 1]
+        random.seed(i)
+        children = [list(child) for child in crossover_operator(list(p1), list(p2))]
+        random.seed(i)
+
+        assert list(crossover_into(crossover_operator, p1, p2)) == children
+
+
+def test_buffered_modified_partially_mapped_crossover_keeps_segment():
+    parents = population(200)
+    for i in range(0, len(parents), 2):
+        p1, p2 = parents[i], parents[i + 1]
+        random.seed(i)
+        point_1 = random.randint(0, len(p1) - 4)
+        point_2 = random.randint(point_1 + 1, len(p1) - 3)
+        random.seed(i)
+        c1, c2 = crossover_into(modified_partially_mapped_crossover, p1, p2)
+
+        # the areas between the crossover points come from the first parent of each child
+        for child, parent in ((c1, p1), (c2, p2)):
+            assert child[point_1 + 1:point_2 + 1] == ['KS' if area == 'PH' else area
+                                                      for area in parent[point_1 + 1:point_2 + 1]]
+
+
+@pytest.mark.parametrize('mutator', sorted(inplace_mutators, key=lambda operator: operator.__name__))
+def test_inplace_mutators_report_changes(mutator):
+    for route in population(300):
+        mutated = list(route)
+        changed = inplace_mutators[mutator](mutated, 0.7)
+
+        assert is_route(mutated)
+        assert changed == (mutated != route)
+
+
+@pytest.mark.parametrize('mutator', [displacement_mutation, thrors_mutation, inversion_mutation])
+def test_inplace_mutators_match_mutators(mutator):
+    for i, route in enumerate(population(300)):
+        random.seed(i)
+        expected = list(mutator(list(route), 0.7))
+        mutated = list(route)
+        random.seed(i)
+        inplace_mutators[mutator](mutated, 0.7)
+
+        assert mutated == expected
+
+
+@pytest.mark.parametrize('crossover_operator, mutator', [(order_crossover, inversion_mutation),
+                                                          (cycle_crossover, displacement_mutation),
+                                                          (partially_mapped_crossover, inversion_mutation)])
+def test_buffered_run_matches_unbuffered(crossover_operator, mutator):
+    points_matrix = generate_points_matrix()
+    runs = [genetic_algorithm(initializer=generate_population, pop_size=30, points_matrix=points_matrix,
+                              fitness_evaluator=evaluate_population, generations=5,
+                              crossover_operator=crossover_operator, mutator=mutator, selector=tournament_selection,
+                              ts_size=3, elite_size=1, p_xo=0.9, p_m=0.3, verbosity=False, plot=False, seed=seed,
+                              log=False, buffered=buffered)
+            for seed in range(2) for buffered in (False, True)]
+
+    assert runs[0] == runs[1] and runs[2] == runs[3]
@@ -0,0 +1,70 @@
+import threading
+import types
+from multiprocessing.connection import Client
+
+import pytest
+
+import grid_search
+from distributed import Coordinator, distributed_grid_search, worker
+from grid_search import SearchSpace, ga_parameters
+from initializers.test_data import generate_points_matrices, save_points_matrices
+from operators.crossovers import order_crossover, position_crossover
+from operators.mutators import inversion_mutation, swap_mutation
+from operators.selectors import stochastic_universal_sampling, tournament_selection
+
+parameters = dict(ga_parameters, pop_size=[10], generations=[2], crossover_operator=[order_crossover, position_crossover],
+                  mutator=[swap_mutation, inversion_mutation], selector=[stochastic_universal_sampling, tournament_selection],
+                  ts_size=[3, 5], elite_size=[1], p_xo=[0.9], p_m=[0.2], seed=[0])
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    ''' Data matrices shared by the serial and the distributed searches (and no pause before each evaluation). The
+        searches run in a temporary directory, where their results are logged.
+    '''
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(grid_search, 'time', types.SimpleNamespace(sleep=lambda seconds: None))
+    path = str(tmp_path / 'matrices.npy')
+    save_points_matrices(path, generate_points_matrices(2, seed=0))
+
+    return path
+
+
+def test_distributed_search_matches_grid_search(dataset):
+    expected = grid_search.grid_search(grid_search.genetic_algorithm, 2, parameters, dataset=dataset)
+
+    assert distributed_grid_search(grid_search.genetic_algorithm, 2, parameters, local_workers=3,
+                                   dataset=dataset) == expected
+
+
+def test_leases_of_a_disconnected_worker_are_reissued(dataset):
+    space = SearchSpace(parameters)
+    coordinator = Coordinator(space, grid_search.genetic_algorithm, 2, dataset)
+    result = []
+    running = threading.Thread(target=lambda: result.append(coordinator.run()))
+    running.start()
+
+    # a worker leases the first combination and leaves without sending its result
+    connection = Client(coordinator.address, authkey=coordinator.authkey)
+    connection.recv()
+    connection.send(('ready',))
+    assert connection.recv()[:2] == ('task', 0)
+    connection.close()
+
+    evaluated = []
+    workers = [threading.Thread(target=lambda: evaluated.append(worker(coordinator.address, coordinator.authkey)))
+               for _ in range(2)]
+    for thread in workers:
+        thread.start()
+    for thread in workers + [running]:
+        thread.join(timeout=60)
+
+    # every combination (including the abandoned one) was evaluated once, and the best one is the serial best
+    assert sum(evaluated) == len(space)
+    best_index, _ = result[0]
+    assert space[best_index] == grid_search.grid_search(grid_search.genetic_algorithm, 2, parameters, dataset=dataset)
+
+
+def test_non_loopback_address_requires_a_key():
+    with pytest.raises(ValueError):
+        Coordinator([], grid_search.genetic_algorithm, 1, [], ('0.0.0.0', 0))
@@ -0,0 +1,104 @@
+import random
+from functools import partial
+
+import numpy as np
+import pytest
+
+from algorithm import genetic_algorithm
+from initializers.individual import areas, check_constraints
+from initializers.population import evaluate_population, generate_batch_population, generate_population
+from initializers.test_data import gains_matrix
+from operators.crossovers import (batch_edge_recombination_crossover, edge_recombination_crossover, edge_tables,
+                                  order_crossover)
+from operators.mutators import swap_mutation
+from operators.selectors import tournament_selection
+
+p1 = ['D', 'QS', 'FC', 'CS', 'KS', 'SN', 'DV', 'RG', 'G', 'QG', 'D']
+p2 = ['D', 'CS', 'QS', 'DV', 'QG', 'PH', 'G', 'FC', 'SN', 'RG', 'D']
+
+
+def population(size, seed=0):
+    random.seed(seed)
+
+    return generate_population(size, gains_matrix)
+
+
+def test_edge_tables():
+    successors, shared = edge_tables(p1, p2)
+
+    # PH is read as KS, and the edges into the final D are left out
+    assert successors['KS'] == {'SN', 'G'}
+    assert successors['QG'] == {'KS'}
+    assert successors['RG'] == {'G'}
+    assert successors['D'] == {'QS', 'CS'}
+    assert shared == set()
+
+    successors, shared = edge_tables(p1, p1)
+    assert shared == set(zip(p1[:-2], p1[1:-1]))
+    assert all(len(successors[area]) == 1 for area in p1[:-2])
+
+
+def test_children_are_built_from_parent_edges():
+    routes = population(400)
+    new_edges = edges = 0
+    for i in range(0, len(routes), 2):
+        parents = routes[i], routes[i + 1]
+        successors, _ = edge_tables(*parents)
+        children = edge_recombination_crossover(*parents, points_matrix=gains_matrix)
+
+        for child, parent in zip(children, parents):
+            assert child[0] == child[-1] == 'D'
+            assert sorted(child[1:-1]) == sorted(areas[1:])
+            assert child[1] == ('KS' if parent[1] == 'PH' else parent[1])
+
+            edges += len(child) - 2
+            new_edges += sum(area not in successors[previous] for previous, area in zip(child[:-2], child[1:-1]))
+
+    # new edges are only added when an area has no successor left
+    assert new_edges / edges < 0.25
+
+
+def test_children_rarely_violate_constraints():
+    routes = population(400)
+    children = [child for i in range(0, len(routes), 2)
+                for child in edge_recombination_crossover(routes[i], routes[i + 1], gains_matrix)]
+
+    assert sum(bool(check_constraints(child, gains_matrix)) for child in children) <= len(children) * 0.05
+
+
+def test_identical_parents_give_the_same_route():
+    for parent in population(50):
+        expected = ['KS' if area == 'PH' else area for area in parent]
+        assert list(edge_recombination_crossover(parent, parent, gains_matrix)) == [expected, expected]
+
+
+def test_batch_edge_recombination_crossover():
+    rng = np.random.default_rng(0)
+    genes = np.arange(1, len(areas), dtype=np.int8)
+    parents_1, parents_2 = generate_batch_population(2, 200, rng)
+    points_matrices = np.repeat(np.asarray(gains_matrix, dtype=np.float64)[None], 200, axis=0)
+
+    c1, c2 = batch_edge_recombination_crossover(parents_1, parents_2, rng, points_matrices)
+    for children, parents in ((c1, parents_1), (c2, parents_2)):
+        assert (np.sort(children, axis=1) == genes).all()
+        assert (children[:, 0] == parents[:, 0]).all()
+
+    # identical parents (that comply with the constraints) give the same route
+    c1, c2 = batch_edge_recombination_crossover(parents_1, parents_1, rng, points_matrices)
+    assert (c1 == parents_1).all() and (c2 == parents_1).all()
+
+
+@pytest.mark.parametrize('crossover_operator', [edge_recombination_crossover,
+                                                partial(edge_recombination_crossover, points_matrix=gains_matrix)])
+def test_buffered_edge_recombination_is_rejected(crossover_operator):
+    params = dict(initializer=generate_population, pop_size=20, points_matrix=gains_matrix,
+                  fitness_evaluator=evaluate_population, generations=2, crossover_operator=crossover_operator,
+                  mutator=swap_mutation, selector=tournament_selection, ts_size=3, elite_size=1, p_xo=0.9, p_m=0.2,
+                  verbosity=False, plot=False, seed=0, log=False)
+
+    with pytest.raises(ValueError, match='edge_recombination_crossover'):
+        genetic_algorithm(**params, buffered=True)
+
+    route, fit = genetic_algorithm(**params)
+    assert fit == evaluate_population([route], gains_matrix)[0]
+    assert genetic_algorithm(**dict(params, crossover_operator=order_crossover), buffered=True)
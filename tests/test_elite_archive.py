@@ -0,0 +1,114 @@
+import random
+import types
+
+import pytest
+
+import initializers.elite_archive
+from initializers.elite_archive import EliteArchive
+from initializers.individual import check_constraints
+from initializers.population import evaluate_population, generate_population, warm_start_population
+from initializers.test_data import generate_points_matrix, instance_hash
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    ''' Replaces the clock of the archive by one that only moves when told to.
+    '''
+    clock = types.SimpleNamespace(now=0.0)
+    monkeypatch.setattr(initializers.elite_archive, 'time', types.SimpleNamespace(monotonic=lambda: clock.now))
+
+    return clock
+
+
+def add_population(archive, points_matrix, size=20):
+    population = generate_population(size, points_matrix)
+    archive.add(points_matrix, population, evaluate_population(population, points_matrix))
+
+    return population
+
+
+def test_best_distinct_routes_are_kept():
+    random.seed(0)
+    archive = EliteArchive(routes_per_instance=5)
+    points_matrix = generate_points_matrix()
+    population = add_population(archive, points_matrix)
+    add_population(archive, points_matrix)
+    archive.add(points_matrix, population, evaluate_population(population, points_matrix))
+
+    _, elites, _ = archive.entries[next(iter(archive.entries))]
+    assert len(elites) == 5 == len({route for _, route in elites})
+    assert [fitness for fitness, _ in elites] == sorted((fitness for fitness, _ in elites), reverse=True)
+
+    routes = archive.routes(points_matrix, 3)
+    assert routes == [list(route) for _, route in elites[:3]]
+
+
+def test_least_recently_used_instances_are_evicted(clock):
+    random.seed(0)
+    archive = EliteArchive(max_instances=3)
+    points_matrices = [generate_points_matrix() for _ in range(4)]
+    for points_matrix in points_matrices[:3]:
+        add_population(archive, points_matrix)
+        clock.now += 1
+
+    # using the first instance makes the second one the least recently used
+    assert archive.routes(points_matrices[0], 1)
+    add_population(archive, points_matrices[3])
+
+    assert list(archive.entries) == [instance_hash(points_matrices[i]) for i in (2, 0, 3)]
+
+
+def test_stale_instances_are_evicted(clock):
+    random.seed(0)
+    archive = EliteArchive(max_age=10.0)
+    old_matrix, new_matrix = generate_points_matrix(), generate_points_matrix()
+    add_population(archive, old_matrix)
+    clock.now = 8.0
+    add_population(archive, new_matrix)
+
+    clock.now = 12.0
+    assert archive.routes(new_matrix, 1)
+    assert len(archive.entries) == 1
+
+    clock.now = 30.0
+    assert archive.routes(new_matrix, 1) == []
+    assert not archive.entries
+
+
+def test_warm_start_uses_nearest_instance():
+    random.seed(0)
+    archive = EliteArchive()
+    points_matrix = generate_points_matrix()
+    add_population(archive, points_matrix)
+
+    # a slightly different instance is seeded with the routes of the archived one
+    similar_matrix = [row[:] for row in points_matrix]
+    similar_matrix[1][2] += 1
+    population = warm_start_population(10, similar_matrix, archive=archive, fraction=0.5)
+
+    assert len(population) == 10
+    assert population[:5] == archive.routes(similar_matrix, 5)
+
+
+def test_routes_infeasible_on_the_nearest_instance_are_skipped():
+    random.seed(0)
+    archive = EliteArchive()
+    points_matrix = generate_points_matrix()
+    # KS between QG and CS, and DV right after QS, so KS may be skipped
+    route = ['D', 'FC', 'QG', 'KS', 'CS', 'G', 'QS', 'DV', 'RG', 'SN', 'D']
+    qg, ks, cs = 4, 6, 5
+    # keeping KS pays off on the archived instance
+    points_matrix[qg][ks], points_matrix[ks][cs], points_matrix[qg][cs] = 100, 100, 0
+    assert not check_constraints(list(route), points_matrix)
+    add_population(archive, points_matrix)
+    archive.add(points_matrix, [route], [float('inf')])
+
+    # skipping it pays off on a neighbouring instance, which puts CS right after QG
+    similar_matrix = [row[:] for row in points_matrix]
+    similar_matrix[qg][cs] = 500
+    routes = archive.routes(similar_matrix, 10)
+
+    assert routes == archive.routes(points_matrix, 11)[1:]
+    assert not any(check_constraints(list(route), similar_matrix) for route in routes)
+    population = warm_start_population(10, similar_matrix, archive=archive, fraction=0.5)
+    assert not any(check_constraints(list(route), similar_matrix) for route in population)
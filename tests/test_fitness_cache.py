@@ -0,0 +1,77 @@
+import multiprocessing
+import random
+
+from fitness_cache import SharedFitnessCache, cached_evaluate_population, route_key, use_fitness_cache
+from initializers.population import evaluate_population, generate_population
+from initializers.test_data import gains_matrix, generate_points_matrix, instance_hash
+
+
+def population(size, seed=0):
+    random.seed(seed)
+
+    return generate_population(size, gains_matrix)
+
+
+def test_cached_fitness_matches_evaluation():
+    cache = SharedFitnessCache(capacity=1024)
+    routes = population(100)
+
+    assert cache.evaluate(routes, gains_matrix) == evaluate_population(routes, gains_matrix)
+    assert cache.evaluate(routes, gains_matrix) == evaluate_population(routes, gains_matrix)
+
+    stats = cache.summary()
+    assert (stats['lookups'], stats['inserts'], stats['hits'], stats['cross_hits']) == (200, 100, 100, 0)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_routes_are_cached_per_instance():
+    cache = SharedFitnessCache(capacity=1024)
+    other_matrix = generate_points_matrix()
+    routes = population(20)
+    cache.evaluate(routes, gains_matrix)
+
+    # the same routes on another instance are evaluated again
+    assert cache.evaluate(routes, other_matrix) == evaluate_population(routes, other_matrix)
+    assert cache.summary()['inserts'] == 40
+
+
+def test_small_cache_evicts_without_wrong_hits():
+    cache = SharedFitnessCache(capacity=8, max_probes=2)
+    routes = population(200)
+
+    for _ in range(3):
+        assert cache.evaluate(routes, gains_matrix) == evaluate_population(routes, gains_matrix)
+    assert cache.summary()['evictions'] > 0
+    assert sum(key != 0 for key in cache.keys) <= 8
+
+
+def test_torn_entries_are_misses():
+    cache = SharedFitnessCache(capacity=64)
+    route = population(1)[0]
+    key = route_key(instance_hash(gains_matrix).encode(), route)
+    cache.store(key, 123.0)
+    assert cache.lookup(key)[0] == 123.0
+
+    # a value written without its check (e.g. read while another process writes it) is not accepted
+    index = next(i for i, stored in enumerate(cache.keys) if stored == key)
+    cache.values[index] = 456.0
+    assert cache.lookup(key) is None
+
+
+def evaluate_in_worker(seed):
+    return cached_evaluate_population(population(30, seed), gains_matrix)
+
+
+def test_cache_is_shared_by_pool_workers():
+    cache = SharedFitnessCache(capacity=1024)
+    with multiprocessing.get_context('fork').Pool(2, initializer=use_fitness_cache, initargs=(cache,)) as pool:
+        assert pool.map(evaluate_in_worker, [0, 1]) == [evaluate_population(population(30, seed), gains_matrix)
+                                                         for seed in (0, 1)]
+
+    # the parent process finds the routes evaluated by the workers
+    use_fitness_cache(cache)
+    try:
+        assert cached_evaluate_population(population(30, 0), gains_matrix) == evaluate_in_worker(0)
+    finally:
+        use_fitness_cache(None)
+    assert cache.summary()['cross_hits'] >= 30
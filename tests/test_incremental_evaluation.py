@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from algorithm import breed, genetic_algorithm
+from initializers.individual import Individual, check_constraints, inherited_geo_gains, route_geo_gains
+from initializers.population import evaluate_individuals, evaluate_population, generate_population
+from initializers.test_data import generate_points_matrix
+from operators.crossovers import segment_crossovers
+from operators.mutators import swap_mutation
+from operators.selectors import tournament_selection
+
+crossovers = sorted(segment_crossovers, key=lambda operator: operator.__name__)
+
+
+def parents(size, points_matrix, seed=0):
+    ''' Evaluated individuals, about half of them with KS replaced by PH.
+    '''
+    random.seed(seed)
+    routes = generate_population(size, points_matrix)
+    for route in routes[::2]:
+        if 'KS' in route:
+            route[route.index('KS')] = 'PH'
+
+    return [Individual(route, fitness) for route, fitness in zip(routes, evaluate_population(routes, points_matrix))]
+
+
+def as_ks(areas):
+    return ['KS' if area == 'PH' else area for area in areas]
+
+
+@pytest.mark.parametrize('crossover_operator', crossovers)
+def test_segments_are_copied_from_the_parents(crossover_operator):
+    points_matrix = generate_points_matrix()
+    population = parents(200, points_matrix)
+    for i in range(0, len(population), 2):
+        p1, p2 = population[i], population[i + 1]
+        segments = []
+        random.seed(i)
+        children = crossover_operator(p1, p2, segments=segments)
+
+        # reporting the segments does not change the children
+        random.seed(i)
+        assert crossover_operator(p1, p2) == children
+
+        # (PH is read as KS, like in the edge gains)
+        for child_index, parent, start, stop, parent_start in segments:
+            assert stop - start > 1
+            assert parent is p1 or parent is p2
+            assert as_ks(children[child_index][start:stop]) == as_ks(parent[parent_start:parent_start + stop - start])
+
+
+@pytest.mark.parametrize('crossover_operator', crossovers)
+def test_inherited_gains_match_full_evaluation(crossover_operator):
+    points_matrix = generate_points_matrix()
+    population = parents(200, points_matrix)
+    for i in range(0, len(population), 2):
+        segments = []
+        children = crossover_operator(population[i], population[i + 1], segments=segments)
+
+        for child_index, child in enumerate(children):
+            child = Individual(child)
+            check_constraints(child, points_matrix)
+            child_segments = [segment for segment in segments if segment[0] == child_index]
+            assert inherited_geo_gains(child, child_segments, points_matrix) == pytest.approx(route_geo_gains(child, points_matrix))
+
+
+@pytest.mark.parametrize('crossover_operator', crossovers)
+def test_breed_estimates_match_full_evaluation(crossover_operator):
+    points_matrix = generate_points_matrix()
+    population = parents(30, points_matrix)
+    fitnesses = evaluate_individuals(population, points_matrix, evaluate_population)
+    estimated = 0
+
+    for _ in range(200):
+        children = breed(population, fitnesses, points_matrix, crossover_operator, swap_mutation, tournament_selection,
+                         5, 1.0, 0.1, incremental=True)
+        for child in children:
+            # children that were not mutated are evaluated from the segments of their parents
+            if not child.dirty:
+                estimated += 1
+                assert child.fitness == pytest.approx(route_geo_gains(child, points_matrix))
+
+            # children become parents, so segments are also copied from routes with PH
+            evaluate_individuals([child], points_matrix, evaluate_population)
+            index = random.randrange(len(population))
+            population[index], fitnesses[index] = child, child.fitness
+
+    assert estimated > 0
+
+
+@pytest.mark.parametrize('crossover_operator', crossovers)
+def test_incremental_run_matches_full_evaluation(crossover_operator):
+    params = dict(initializer=generate_population, pop_size=40, points_matrix=generate_points_matrix(),
+                  fitness_evaluator=evaluate_population, generations=10, crossover_operator=crossover_operator,
+                  mutator=swap_mutation, selector=tournament_selection, ts_size=5, elite_size=1, p_xo=0.95, p_m=0.2,
+                  verbosity=False, plot=False, log=False)
+
+    for seed in range(2):
+        assert (genetic_algorithm(**params, seed=seed, incremental_evaluation=True)
+                == genetic_algorithm(**params, seed=seed))
@@ -0,0 +1,46 @@
+import pytest
+
+from algorithm import genetic_algorithm
+from memory import MemoryMonitor, budget_pop_size
+from initializers.individual import Individual, areas
+from initializers.population import evaluate_population, generate_population
+from initializers.test_data import gains_matrix
+from operators.crossovers import position_crossover
+from operators.mutators import displacement_mutation
+from operators.selectors import tournament_selection
+
+params = dict(initializer=generate_population, pop_size=100, points_matrix=gains_matrix,
+              fitness_evaluator=evaluate_population, generations=30, crossover_operator=position_crossover,
+              mutator=displacement_mutation, selector=tournament_selection, ts_size=5, elite_size=1, p_xo=0.95, p_m=0.2,
+              verbosity=False, plot=False, log=False)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_workers_return_the_same_types_as_serial_runs(seed):
+    serial_route, serial_fit = genetic_algorithm(**params, seed=seed)
+    parallel_route, parallel_fit = genetic_algorithm(**params, seed=seed, offspring_workers=2)
+
+    # both runs reach the optimum of the instance, and report it as a plain float
+    assert parallel_fit == serial_fit == evaluate_population([serial_route], gains_matrix)[0]
+    assert type(parallel_fit) is type(serial_fit) is float
+    assert type(parallel_route) is type(serial_route) is list
+
+
+def test_runs_do_not_depend_on_the_number_of_workers():
+    assert genetic_algorithm(**params, seed=0, offspring_workers=1) == genetic_algorithm(**params, seed=0,
+                                                                                        offspring_workers=2)
+
+
+def test_memory_of_workers_is_measured_encoded():
+    # routes are kept as int8 area codes and a float64 fitness value by the workers
+    monitor = MemoryMonitor()
+    try:
+        genetic_algorithm(**dict(params, generations=2), seed=0, offspring_workers=1, memory=monitor)
+    finally:
+        monitor.stop()
+    assert monitor.summary()['bytes_per_individual'] == len(areas) + 1 + 8
+
+    # the budget of a run with workers is bounded by its initial (decoded) population
+    route = Individual(areas + ['D'], 0.0)
+    decoded = budget_pop_size(10 ** 9, 10 ** 7, route)
+    assert decoded < budget_pop_size(10 ** 9, 10 ** 7, route, copies=3, encoded=True) <= 2 * decoded
@@ -0,0 +1,86 @@
+import math
+
+import pytest
+
+from grid_search import SearchSpace, ga_parameters, parameter_grid
+from operators.selectors import roulette_wheel_selection, stochastic_universal_sampling, tournament_selection
+
+parameters = {'selector': [roulette_wheel_selection, tournament_selection, stochastic_universal_sampling],
+              'ts_size': [5, 10, 15],
+              'pop_size': [20, 50],
+              'p_m': [0.1, 0.2],
+              'elite_size': [0, 1]}
+
+
+def reference(parameters):
+    ''' All combinations of the grid, without the ones that only differ in ts_size when the selector does not use it.
+    '''
+    return [combination for combination in parameter_grid(parameters)
+            if combination['selector'] == tournament_selection or combination['ts_size'] == parameters['ts_size'][0]]
+
+
+def test_iteration_matches_pruned_grid():
+    space = SearchSpace(parameters)
+
+    assert list(space) == reference(parameters)
+    assert len(space) == len(reference(parameters)) == 2 * 2 * 2 * (2 + 3)
+
+
+def test_indexing_matches_iteration():
+    space = SearchSpace(parameters)
+    combinations = list(space)
+
+    assert [space[index] for index in range(len(space))] == combinations
+    assert space[-1] == combinations[-1]
+    with pytest.raises(IndexError):
+        space[len(space)]
+    with pytest.raises(IndexError):
+        space[-len(space) - 1]
+
+
+@pytest.mark.parametrize('n_shards', [1, 3, 7, 40, 100])
+def test_shards_split_the_space(n_shards):
+    space = SearchSpace(parameters)
+    shards = [space.shard(shard_index, n_shards) for shard_index in range(n_shards)]
+
+    # contiguous, disjoint and balanced slices that cover the whole space
+    assert [index for shard in shards for index in shard] == list(range(len(space)))
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+    assert [space[index] for index in shards[-1]] == list(space)[shards[-1].start:]
+
+
+def test_large_space_is_not_materialized():
+    space = SearchSpace(ga_parameters)
+    selectors = len(ga_parameters['selector'])
+    others = math.prod(len(values) for key, values in ga_parameters.items() if key not in ('selector', 'ts_size'))
+
+    assert len(space) == others * (selectors - 1 + len(ga_parameters['ts_size']))
+
+    # any combination is computed from its index, in the order of the pruned grid
+    for index in (0, 1, 12345, len(space) // 2, len(space) - 1):
+        combination = space[index]
+        assert set(combination) == set(ga_parameters)
+        if combination['selector'] != tournament_selection:
+            assert combination['ts_size'] == ga_parameters['ts_size'][0]
+
+    shard = space.shard(5, 8)
+    assert [space[index] for index in shard[:3]] == [space[shard.start], space[shard.start + 1], space[shard.start + 2]]
+
+
+def test_custom_conditions():
+    # a conditional parameter whose name sorts before the parameter it depends on
+    space = SearchSpace({'alpha': [1, 2, 3], 'mode': ['a', 'b'], 'x': [0, 1]}, conditions={'alpha': ('mode', ['b'])})
+    combinations = list(space)
+
+    assert len(space) == len(combinations) == (1 + 3) * 2
+    assert [space[index] for index in range(len(space))] == combinations
+    assert {combination['alpha'] for combination in combinations if combination['mode'] == 'a'} == {1}
+
+    with pytest.raises(ValueError):
+        SearchSpace({'a': [1], 'b': [2]}, conditions={'a': ('b', [2]), 'b': ('a', [1])})
+
+
+def test_parameter_grid_matches_scikit_learn():
+    model_selection = pytest.importorskip('sklearn.model_selection')
+
+    assert list(parameter_grid(parameters)) == list(model_selection.ParameterGrid(parameters))
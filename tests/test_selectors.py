@@ -0,0 +1,112 @@
+import math
+import random
+from collections import Counter
+from functools import partial
+
+import pytest
+
+from algorithm import bind_selector, genetic_algorithm
+from initializers.population import evaluate_population, generate_population
+from initializers.test_data import gains_matrix
+from operators.crossovers import position_crossover
+from operators.mutators import swap_mutation
+from operators.selectors import self_adaptative_tournament_selection, stochastic_universal_sampling, sus_sample
+
+
+def counts(selected, size):
+    counter = Counter(selected)
+
+    return [counter[index] for index in range(size)]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_sus_sample_has_minimum_spread(seed):
+    # each individual is selected floor(n * w / W) or ceil(n * w / W) times
+    random.seed(seed)
+    size = random.randint(2, 40)
+    n = random.randint(1, 100)
+    fitnesses = [random.choice([0, random.randint(1, 1000)]) for _ in range(size)]
+    fitnesses[0] = max(fitnesses[0], 1)
+    total = sum(fitnesses)
+
+    selected = counts(sus_sample(list(range(size)), fitnesses, n), size)
+
+    assert sum(selected) == n
+    for fitness, times in zip(fitnesses, selected):
+        assert math.floor(n * fitness / total) <= times <= math.ceil(n * fitness / total)
+
+
+def test_sus_sample_matches_expected_frequencies():
+    random.seed(0)
+    fitnesses = [1, 2, 3, 4]
+    selected = counts(sum((sus_sample(list(range(4)), fitnesses, 3) for _ in range(5000)), []), 4)
+
+    for fitness, times in zip(fitnesses, selected):
+        assert times / (5000 * 3) == pytest.approx(fitness / 10, abs=0.01)
+
+
+def test_sus_sample_weights():
+    random.seed(0)
+    population = list(range(5))
+
+    # negative fitnesses are shifted by the minimum, so the worst individual is never selected
+    for _ in range(100):
+        assert 0 not in sus_sample(population, [-50, -10, 0, 20, 40], 4)
+
+    # with a shift, negative weights are treated as 0
+    for _ in range(100):
+        assert set(sus_sample(population, [-50, -10, 0, 20, 40], 4, shift=-5)) <= {3, 4}
+
+    # without any positive weight, all individuals are equally likely
+    assert counts(sus_sample(population, [-3] * 5, 10, shift=0), 5) == [2] * 5
+
+
+def test_stochastic_universal_sampling_pool():
+    random.seed(0)
+    population = list(range(10))
+    fitnesses = [10] * 5 + [30] * 5
+    pool = []
+
+    # a sweep of pool_size parents is handed out two at a time, then a new sweep is made
+    parents = []
+    for _ in range(4):
+        parents += stochastic_universal_sampling(population, fitnesses, pool=pool, pool_size=8)
+        assert len(pool) == 8 - len(parents)
+    # (expected 8 * 10 / 200 = 0.4 times for the first individuals and 1.2 times for the others)
+    assert all(times <= 1 for times in counts(parents, 10)[:5])
+    assert all(1 <= times <= 2 for times in counts(parents, 10)[5:])
+
+    stochastic_universal_sampling(population, fitnesses, pool=pool, pool_size=8)
+    assert len(pool) == 6
+
+    # without a pool, two parents are selected in their own sweep
+    assert len(stochastic_universal_sampling(population, fitnesses)) == 2
+
+
+def test_partial_selectors_are_bound():
+    selector = bind_selector(partial(stochastic_universal_sampling, shift=600), 0.5, 10)
+    assert selector.func is stochastic_universal_sampling
+    assert selector.keywords == {'shift': 600, 'pool': [], 'pool_size': 10}
+
+    # each binding gets its own pool
+    assert bind_selector(partial(stochastic_universal_sampling, shift=600), 0.5, 10).keywords['pool'] is not \
+        selector.keywords['pool']
+
+    selector = bind_selector(partial(stochastic_universal_sampling, pool_size=4), 0.5, 10)
+    assert selector.keywords == {'pool': [], 'pool_size': 4}
+
+    selector = bind_selector(partial(self_adaptative_tournament_selection), 0.5, 10)
+    assert selector.func is self_adaptative_tournament_selection
+    assert selector.keywords == {'diversity': 0.5}
+
+
+def test_partial_sus_selects_from_a_pool(monkeypatch):
+    # the pool of the bound selector is filled with a single sweep, instead of a sweep for each pair of parents
+    sweeps = []
+    monkeypatch.setattr('operators.selectors.sus_sample',
+                        lambda population, fitnesses, n, shift=None: sweeps.append(n) or sus_sample(population, fitnesses, n, shift))
+    genetic_algorithm(generate_population, 20, gains_matrix, evaluate_population, 3, position_crossover, swap_mutation,
+                      partial(stochastic_universal_sampling, shift=600), ts_size=None, elite_size=2, p_xo=0.9, p_m=0.2,
+                      verbosity=False, plot=False, seed=0, log=False)
+
+    assert sweeps and all(n == 20 for n in sweeps)
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from batch import batch_genetic_algorithm
+from initializers.test_data import generate_points_matrices
+from operators.mutators import batch_inversion_mutation, batch_swap_mutation
+from service import SolveService
+
+points_matrices = generate_points_matrices(3, seed=0)
+
+
+def test_identical_requests_are_solved_in_one_batch():
+    async def main():
+        async with SolveService(workers=1, batch_window=0.5, pop_size=20, generations=5, seed=0) as service:
+            requests = [await service.submit(matrix) for matrix in points_matrices]
+            other = await service.submit(points_matrices[0], mutator=batch_inversion_mutation)
+            results = await asyncio.gather(*requests, other)
+
+        return results, next(service.batch_ids)
+
+    results, batches = asyncio.run(main())
+
+    # the three requests with the same parameters share a run, and the other one gets its own
+    assert batches == 2
+    winners, fits, _ = batch_genetic_algorithm(points_matrices, pop_size=20, generations=5, seed=0)
+    assert results[:3] == [(route, fit) for route, fit in zip(winners, fits.tolist())]
+
+
+def test_full_queue_raises_without_blocking():
+    async def main():
+        async with SolveService(workers=1, max_pending=1, pop_size=20, generations=5) as service:
+            request = await service.submit(points_matrices[0], block=False)
+            with pytest.raises(asyncio.QueueFull):
+                await service.submit(points_matrices[1], block=False)
+            await request
+
+    asyncio.run(main())
+
+
+def test_request_fails_after_its_deadline():
+    async def main():
+        async with SolveService(workers=1, pop_size=50, generations=200) as service:
+            with pytest.raises(asyncio.TimeoutError):
+                await service.solve(points_matrices[0], timeout=0.01)
+
+            # the service still solves the next requests
+            route, fit = await service.solve(points_matrices[1], generations=5)
+
+        return route, fit
+
+    route, fit = asyncio.run(main())
+
+    assert route[0] == route[-1] == 'D' and len(set(route[1:-1])) == 9
+
+
+def test_progress_stream_ends_with_the_request():
+    async def main():
+        async with SolveService(workers=1, pop_size=20, generations=5) as service:
+            request = await service.submit(points_matrices[0])
+            updates = [update async for update in request.progress()]
+
+        return updates, request.done(), await request
+
+    updates, done, (_, fit) = asyncio.run(main())
+
+    assert done
+    assert [generation for generation, _ in updates] == list(range(6))
+    assert updates[-1][1] == fit
+
+
+def test_unhashable_parameters_are_rejected_on_submit():
+    async def main():
+        async with SolveService(workers=1, pop_size=20, generations=5) as service:
+            with pytest.raises(TypeError, match='mutator'):
+                await service.submit(points_matrices[0], mutator=[batch_swap_mutation])
+
+            # the dispatcher is still running
+            return await service.solve(points_matrices[0])
+
+    assert asyncio.run(main())
+
+    with pytest.raises(TypeError, match='seed'):
+        SolveService(seed=[0])